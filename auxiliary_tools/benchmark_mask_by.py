@@ -0,0 +1,101 @@
+#!usr/bin/env python
+from __future__ import print_function
+
+import argparse
+import copy
+import time
+import tracemalloc
+
+import cdms2
+import numpy as np
+
+from e3sm_diags.derivations.acme import masked_view
+
+"""
+Usage: benchmark_mask_by.py [options]
+Example: python benchmark_mask_by.py --plevs 37 --regions 8
+
+Options:
+  --plevs N, The number of pressure levels of the 3D variable
+  --regions N, The number of land/ocean regions the variable is masked by
+  --repeat N, The number of times each way of masking is timed
+
+About:
+This script compares the time and memory used to mask a 3D variable on a
+1 degree grid by the land/ocean mask of several regions, by deep copying the
+variable and updating its mask (like mask_by() did before) and with
+masked_view(), which only allocates a new mask and shares the data.
+"""
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--plevs", dest="plevs", type=int, default=37)
+parser.add_argument("--regions", dest="regions", type=int, default=8)
+parser.add_argument("--repeat", dest="repeat", type=int, default=3)
+args = parser.parse_args()
+
+
+def create_variable(num_plevs):
+    rng = np.random.default_rng(0)
+    data = rng.random((num_plevs, 180, 360), dtype=np.float32)
+    # Below ground values, as after interpolating to pressure levels.
+    mask = np.zeros(data.shape, dtype=bool)
+    mask[num_plevs // 2 :, :30, :] = True
+
+    plev = cdms2.createAxis(np.linspace(1000, 10, num_plevs), id="plev")
+    plev.designateLevel()
+    lat = cdms2.createUniformLatitudeAxis(-89.5, 180, 1.0)
+    lon = cdms2.createUniformLongitudeAxis(0.5, 360, 1.0)
+    var = cdms2.createVariable(
+        np.ma.masked_array(data, mask=mask), axes=[plev, lat, lon], id="T"
+    )
+    var.units = "K"
+    return var
+
+
+def mask_by_deepcopy(var, region_mask):
+    var_domain = copy.deepcopy(var)
+    var_domain.mask = var_domain.mask | region_mask
+    return var_domain
+
+
+def benchmark(mask_fcn, var, region_masks):
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for region_mask in region_masks:
+            mask_fcn(var, region_mask)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    # The variables are kept, like the test and ref of all of the regions.
+    results = [mask_fcn(var, region_mask) for region_mask in region_masks]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+
+    return min(times), peak
+
+
+var = create_variable(args.plevs)
+rng = np.random.default_rng(1)
+region_masks = [rng.random((180, 360)) < 0.35 for _ in range(args.regions)]
+
+print(
+    "Masking a {} variable of {:.1f} MB by {} regions:".format(
+        var.shape, var.nbytes / 1024**2, args.regions
+    )
+)
+for name, mask_fcn in [
+    ("deepcopy", mask_by_deepcopy),
+    ("masked_view", masked_view),
+]:
+    seconds, peak = benchmark(mask_fcn, var, region_masks)
+    print(
+        "{:>12}: {:.3f} s, {:.1f} MB allocated".format(name, seconds, peak / 1024**2)
+    )
+
+for region_mask in region_masks:
+    np.testing.assert_array_equal(
+        mask_by_deepcopy(var, region_mask).mask, masked_view(var, region_mask).mask
+    )
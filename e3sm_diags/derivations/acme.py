@@ -1,9 +1,9 @@
 from __future__ import print_function
 
-import copy
 from collections import OrderedDict
 from typing import TYPE_CHECKING, Optional, Tuple
 
+import cdms2
 import MV2
 import numpy as np
 from genutil import udunits
@@ -77,25 +77,39 @@ def convert_units(var, target_units):
 def mask_by(input_var, maskvar, low_limit=None, high_limit=None):
     """masks a variable var to be missing except where maskvar>=low_limit and maskvar<=high_limit.
     None means to omit the constrint, i.e. low_limit = -infinity or high_limit = infinity.
-    var is changed and returned; we don't make a new variable.
+    A new variable sharing the data of var is returned, var isn't changed.
     var and maskvar: dimensioned the same variables.
     low_limit and high_limit: scalars.
     """
-    var = copy.deepcopy(input_var)
     if low_limit is None and high_limit is None:
-        return var
+        return masked_view(input_var, False)
     if low_limit is None and high_limit is not None:
         maskvarmask = maskvar > high_limit
     elif low_limit is not None and high_limit is None:
         maskvarmask = maskvar < low_limit
     else:
         maskvarmask = (maskvar < low_limit) | (maskvar > high_limit)
-    if var.mask is False:
-        newmask = maskvarmask
-    else:
-        newmask = var.mask | maskvarmask
-    var.mask = newmask
-    return var
+    return masked_view(input_var, np.ma.getdata(maskvarmask))
+
+
+def masked_view(var, mask):
+    """
+    Return a variable with the data, axes and attributes of var, masked where
+    var or mask (which is broadcast to var) is masked.
+
+    Only the mask is new, the data is shared with var instead of being copied,
+    so the returned variable must not be modified in place.
+    """
+    new_mask = np.logical_or(np.ma.getmaskarray(var), mask)
+    return cdms2.createVariable(
+        np.ma.getdata(var),
+        mask=new_mask,
+        copy=0,
+        axes=var.getAxisList(),
+        grid=var.getGrid(),
+        id=var.id,
+        attributes=var.attributes,
+    )
 
 
 def qflxconvert_units(var):
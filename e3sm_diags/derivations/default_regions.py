@@ -1,6 +1,8 @@
+from typing import Any, Dict
+
 import cdutil
 
-regions_specs = {
+regions_specs: Dict[str, Dict[str, Any]] = {
     "NHEX": {"domain": cdutil.region.domain(latitude=(30.0, 90, "ccb"))},
     "SHEX": {"domain": cdutil.region.domain(latitude=(-90.0, -30, "ccb"))},
     "TROPICS": {"domain": cdutil.region.domain(latitude=(-30.0, 30, "ccb"))},
@@ -3,8 +3,6 @@ from __future__ import print_function
 from typing import TYPE_CHECKING, Any, Dict, List
 
 import cdutil
-import MV2
-from cdms2 import createAxis
 
 from e3sm_diags.driver.utils.dataset import Dataset
 from e3sm_diags.driver.utils.general import (
@@ -16,7 +14,6 @@ from e3sm_diags.driver.utils.general import (
 from e3sm_diags.plot import plot
 
 if TYPE_CHECKING:
-    from cdms2.axis import TransientAxis
     from cdms2.tvariable import TransientVariable
 
     from e3sm_diags.parameter.core_parameter import CoreParameter
@@ -138,29 +135,5 @@ def _create_annual_cycle(dataset: Dataset, variable: str) -> "TransientVariable"
     :return: Variable's annual climatology cycle
     :rtype: tvariable.TransientVariable
     """
-    months = range(1, 13)
-    month_list = [f"{x:02}" for x in list(months)]
-
-    for index, month in enumerate(month_list):
-        var = dataset.get_climo_variable(variable, month)
-        if month == "01":
-            var_ann_cycle: "TransientVariable" = MV2.zeros([12] + list(var.shape))
-            var_ann_cycle.id = var.id
-            var_ann_cycle.long_name = var.long_name
-            var_ann_cycle.units = var.units
-
-            time: "TransientAxis" = createAxis(months)
-            time.id = "time"
-
-            var_ann_cycle.setAxis(0, time)
-            time.designateTime()
-
-            for iax in list(range(len(var.shape))):
-                var_ann_cycle.setAxis(1 + iax, var.getAxis(iax))
-            # var_ann_cycle.setAxis(2, var.getAxis(1))
-
-            var_ann_cycle[0] = var
-        else:
-            var_ann_cycle[index] = var
-
-    return var_ann_cycle
+    # The months are read and computed together, not one at a time.
+    return dataset.get_annual_cycle(variable)
@@ -4,11 +4,11 @@ import os
 
 import cdms2
 import cdutil
+import numpy
 
-import e3sm_diags
 from e3sm_diags.driver import utils
 from e3sm_diags.logger import custom_logger
-from e3sm_diags.metrics import mean
+from e3sm_diags.metrics import area_weights, mean
 from e3sm_diags.plot.cartopy import area_mean_time_series_plot
 
 logger = custom_logger(__name__)
@@ -24,6 +24,103 @@ def create_metrics(ref_domain):
     return {"mean": mean(ref_domain)}
 
 
+def get_region_weights(var, regions, land_frac, ocean_frac, parameter):
+    """
+    Return the area weights of each region on the grid of var, as a
+    (region, lat * lon) array that is 0 outside of the region and where the
+    land/ocean fraction is below the threshold of the region, or None if var
+    isn't on a lat/lon grid.
+
+    The weights are those cdutil.averager() uses for the region selected with
+    select_region(), which are found by selecting the region from a field of
+    the indices of the cells of the grid.
+    """
+    grid = var.getGrid()
+    if not isinstance(grid, cdms2.grid.AbstractRectGrid):
+        return None
+
+    lat = grid.getLatitude()
+    lon = grid.getLongitude()
+    cells = cdms2.createVariable(
+        numpy.arange(len(lat) * len(lon), dtype=numpy.float64).reshape(
+            len(lat), len(lon)
+        ),
+        axes=[lat, lon],
+        grid=grid,
+    )
+    cells.units = ""
+
+    weights = numpy.zeros((len(regions), cells.size))
+    for i, region in enumerate(regions):
+        cells_domain = utils.general.select_region(
+            region, cells, land_frac, ocean_frac, parameter
+        )
+        area = area_weights(cells_domain)
+        if area is None:
+            return None
+
+        valid = ~numpy.ma.getmaskarray(cells_domain)
+        cell_index = numpy.ma.getdata(cells_domain)[valid].astype(numpy.int64)
+        numpy.add.at(weights[i], cell_index, area[valid])
+
+    return weights
+
+
+def get_region_means(var, regions, land_frac, ocean_frac, parameter):
+    """
+    Return the area mean of var over each region at each time step, as a
+    (region, time) masked array.
+
+    The area means of all of the regions are computed together from the
+    region weights, so var is only traversed once.
+    """
+    weights = None
+    if var.getOrder() == "tyx":
+        weights = get_region_weights(var, regions, land_frac, ocean_frac, parameter)
+
+    if weights is None:
+        region_means = []
+        for region in regions:
+            var_domain = utils.general.select_region(
+                region, var, land_frac, ocean_frac, parameter
+            )
+            region_means.append(cdutil.averager(var_domain, axis="xy").asma())
+        return numpy.ma.stack(region_means)
+
+    v = var.asma()
+    data = numpy.ma.getdata(v).reshape(v.shape[0], -1)
+    valid = ~numpy.ma.getmaskarray(v).reshape(v.shape[0], -1)
+
+    # Equivalent to cdutil.averager() over each region, the masked values are
+    # excluded from both sums.
+    weighted_sum = numpy.dot(weights, numpy.where(valid, data, 0).T)
+    sum_of_weights = numpy.dot(weights, valid.T.astype(numpy.float64))
+    no_data = sum_of_weights == 0
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        means = numpy.ma.masked_where(no_data, weighted_sum / sum_of_weights)
+
+    return means
+
+
+def get_region_yearly_means(var, regions, land_frac, ocean_frac, parameter):
+    """
+    Return the yearly means of the area mean of var over each region,
+    as a list of variables in the order of regions.
+    """
+    means = get_region_means(var, regions, land_frac, ocean_frac, parameter)
+
+    time = var.getTime().clone()
+    yearly_means = []
+    for region_means in means:
+        var_domain = cdms2.createVariable(region_means, axes=[time], id=var.id)
+        # Average over months to get the yearly mean.
+        cdutil.setTimeBoundsMonthly(var_domain)
+        var_domain_year = cdutil.YEAR(var_domain)
+        yearly_means.append(var_domain_year)
+
+    return yearly_means
+
+
 def run_diag(parameter):
     variables = parameter.variables
     regions = parameter.regions
@@ -55,81 +152,74 @@ def run_diag(parameter):
         # Get land/ocean fraction for masking.
         # For now, we're only using the climo data that we saved below.
         # So no time-series LANDFRAC or OCNFRAC from the user is used.
-        mask_path = os.path.join(
-            e3sm_diags.INSTALL_PATH, "acme_ne30_ocean_land_mask.nc"
+        land_frac, ocean_frac = utils.mask.get_default_fracs()
+
+        # The regions that are supported are in e3sm_diags/derivations/default_regions.py
+        # You can add your own if it's not in there.
+        logger.info("Selected regions: {}".format(", ".join(regions)))
+
+        # The test and reference timeseries are only read once, with the
+        # means over all of the regions computed from them.
+        test_data = utils.dataset.Dataset(parameter, test=True)
+        test = test_data.get_timeseries_variable(var)
+        test_time = utils.calendar_time.decode_time(test.getTime())
+        logger.info(
+            "Start and end time for selected time slices for test data: "
+            f"{utils.calendar_time.format_time(test_time, 0)} "
+            f"{utils.calendar_time.format_time(test_time, -1)}",
         )
-        with cdms2.open(mask_path) as f:
-            land_frac = f("LANDFRAC")
-            ocean_frac = f("OCNFRAC")
 
-        for region in regions:
-            # The regions that are supported are in e3sm_diags/derivations/default_regions.py
-            # You can add your own if it's not in there.
-            logger.info("Selected region: {}".format(region))
-            test_data = utils.dataset.Dataset(parameter, test=True)
-            test = test_data.get_timeseries_variable(var)
-            logger.info(
-                "Start and end time for selected time slices for test data: "
-                f"{test.getTime().asComponentTime()[0]} "
-                f"{test.getTime().asComponentTime()[-1]}",
-            )
+        parameter.viewer_descr[var] = getattr(test, "long_name", var)
+        # Get the name of the data, appended with the years averaged.
+        parameter.test_name_yrs = utils.general.get_name_and_yrs(parameter, test_data)
 
-            parameter.viewer_descr[var] = getattr(test, "long_name", var)
-            # Get the name of the data, appended with the years averaged.
-            parameter.test_name_yrs = utils.general.get_name_and_yrs(
-                parameter, test_data
-            )
-            test_domain = utils.general.select_region(
-                region, test, land_frac, ocean_frac, parameter
-            )
-
-            # Average over selected region, and average
-            # over months to get the yearly mean.
-            test_domain = cdutil.averager(test_domain, axis="xy")
-            cdutil.setTimeBoundsMonthly(test_domain)
-            test_domain_year = cdutil.YEAR(test_domain)
+        # Average over the regions, and average over months
+        # to get the yearly means.
+        test_domain_years = get_region_yearly_means(
+            test, regions, land_frac, ocean_frac, parameter
+        )
+        for test_domain_year in test_domain_years:
             # add back attributes since they got lost after applying cdutil.YEAR
             test_domain_year.long_name = test.long_name
             test_domain_year.units = test.units
 
-            save_data[parameter.test_name_yrs] = test_domain_year.asma().tolist()
-
-            refs = []
-
-            for ref_name in ref_names:
-                setattr(parameter, "ref_name", ref_name)
-                ref_data = utils.dataset.Dataset(parameter, ref=True)
-
-                parameter.ref_name_yrs = utils.general.get_name_and_yrs(
-                    parameter, ref_data
+        refs_domain_years = collections.OrderedDict()
+        for ref_name in ref_names:
+            setattr(parameter, "ref_name", ref_name)
+            ref_data = utils.dataset.Dataset(parameter, ref=True)
+
+            parameter.ref_name_yrs = utils.general.get_name_and_yrs(parameter, ref_data)
+
+            try:
+                ref = ref_data.get_timeseries_variable(var)
+                ref_time = utils.calendar_time.decode_time(ref.getTime())
+                logger.info(
+                    (
+                        "Start and end time for selected time slices for ref data: "
+                        f"{utils.calendar_time.format_time(ref_time, 0)} "
+                        f"{utils.calendar_time.format_time(ref_time, -1)}"
+                    )
                 )
 
-                try:
-                    ref = ref_data.get_timeseries_variable(var)
-
-                    ref_domain = utils.general.select_region(
-                        region, ref, land_frac, ocean_frac, parameter
-                    )
+                ref_domain_years = get_region_yearly_means(
+                    ref, regions, land_frac, ocean_frac, parameter
+                )
+                for ref_domain_year in ref_domain_years:
+                    ref_domain_year.ref_name = ref_name
 
-                    ref_domain = cdutil.averager(ref_domain, axis="xy")
-                    cdutil.setTimeBoundsMonthly(ref_domain)
-                    logger.info(
-                        (
-                            "Start and end time for selected time slices for ref data: "
-                            f"{ref_domain.getTime().asComponentTime()[0]} "
-                            f"{ref_domain.getTime().asComponentTime()[-1]}"
-                        )
-                    )
+                refs_domain_years[ref_name] = ref_domain_years
+            except Exception:
+                logger.exception(
+                    "No valid value for reference datasets available for the specified time range"
+                )
 
-                    ref_domain_year = cdutil.YEAR(ref_domain)
-                    ref_domain_year.ref_name = ref_name
-                    save_data[ref_name] = ref_domain_year.asma().tolist()
+        for i, region in enumerate(regions):
+            save_data[parameter.test_name_yrs] = test_domain_years[i].asma().tolist()
 
-                    refs.append(ref_domain_year)
-                except Exception:
-                    logger.exception(
-                        "No valid value for reference datasets available for the specified time range"
-                    )
+            refs = []
+            for ref_name, ref_domain_years in refs_domain_years.items():
+                save_data[ref_name] = ref_domain_years[i].asma().tolist()
+                refs.append(ref_domain_years[i])
 
             # save data for potential later use
             parameter.output_file = "-".join([var, region])
@@ -142,7 +232,7 @@ def run_diag(parameter):
                 json.dump(save_data, outfile)
 
             regions_to_data[region] = RefsTestMetrics(
-                test=test_domain_year, refs=refs, metrics=[]
+                test=test_domain_years[i], refs=refs, metrics=[]
             )
 
         area_mean_time_series_plot.plot(var, regions_to_data, parameter)
@@ -17,6 +17,32 @@ RefsTestMetrics = collections.namedtuple(
     "RefsTestMetrics", ["refs", "test", "metrics", "misc"]
 )
 
+ConvectionOnsetStatistics = collections.namedtuple(
+    "ConvectionOnsetStatistics",
+    [
+        "bin_center",
+        "hist_cwv",
+        "hist_precip_points",
+        "pr_binned_mean",
+        "pr_binned_std",
+        "pr_probability",
+        "freq_cwv",
+        "freq_precipitating_points",
+        "errorbar_precip",
+        "errorbar_precip_points",
+        "errorbar_precip_binom",
+    ],
+)
+
+# The CWV bounds and bin width (in mm) and the name of each site for
+# the convection onset statistics.
+CONVECTION_ONSET_SITES = {
+    "twpc1": (28, 69, 1.5, "Manus Island"),
+    "twpc2": (28, 70, 2.0, "Nauru"),
+    "twpc3": (28, 85, 2.0, "Darwin"),
+    "sgp": (20, 75, 2.0, "SGP"),
+}
+
 
 def get_vars_funcs_for_derived_var(data_file, var):
     vars_to_func_dict = e3sm_diags.derivations.acme.derived_variables[var]
@@ -400,13 +426,122 @@ def run_diag_convection_onset(parameter):
             ref_prw = test_data.get_timeseries_variable("TMQ", single_point=True)
         parameter.output_file = "-".join([ref_name, "convection-onset", region])
 
+        cwv_min, cwv_max, bin_width, sitename = CONVECTION_ONSET_SITES[region]
+        test_stats = get_convection_onset_statistics(
+            test_pr, test_prw, cwv_min, cwv_max, bin_width
+        )
+        ref_stats = get_convection_onset_statistics(
+            ref_pr, ref_prw, cwv_min, cwv_max, bin_width
+        )
+        time_intervals = [get_time_interval(test_prw), get_time_interval(ref_prw)]
+
         arm_diags_plot.plot_convection_onset_statistics(
-            test_pr, test_prw, ref_pr, ref_prw, parameter, region
+            test_stats, ref_stats, time_intervals, parameter, sitename, cwv_max
         )
 
     return parameter
 
 
+def get_time_interval(var):
+    """The number of hours between the first two time steps of var."""
+    hours = utils.calendar_time.decode_time(var.getTime()).hour
+    return int(hours[1] - hours[0])
+
+
+def get_convection_onset_statistics(
+    precip, cwv, cwv_min, cwv_max, bin_width, precip_threshold=0.5
+):
+    """
+    The statistics of precip (in mm/hr) binned by the column water vapor cwv
+    (in mm), with bins of bin_width from cwv_min to cwv_max. A time step is in
+    a bin if cwv is in (lower bound, upper bound] and it's precipitating if
+    precip >= precip_threshold.
+
+    Each time step is assigned its bin once, so all of the statistics are
+    computed with bin counts and sums over the time steps.
+    """
+    # Original code: Kathleen Schiro, python version 22 Dec 2016, University of California Dept. of Atmospheric and Oceanic Sciences
+    # Modifications: Baird Langenbrunner, Yi-Hung Kuo
+    # Modifications: Jill Zhang, Cheng Tao
+    # Scientific supervision: Prof. J David Neelin
+    #
+    # For related publications and research information see
+    # the Neelin group webpage  http://www.atmos.ucla.edu/~csi/ #
+    number_of_bins = int(np.ceil((cwv_max - cwv_min) / bin_width))
+    bin_center = np.arange(
+        (cwv_min + (bin_width / 2)),
+        (cwv_max - (bin_width / 2)) + bin_width,
+        bin_width,
+    )
+    if len(bin_center) != number_of_bins:
+        bin_center = np.arange(
+            (cwv_min + (bin_width / 2)), (cwv_max - (bin_width / 2)), bin_width
+        )
+
+    cwv = np.ma.filled(np.ma.masked_invalid(cwv).astype(np.float64), np.nan)
+    precip = np.ma.filled(np.ma.masked_invalid(precip).astype(np.float64), np.nan)
+    cwv = cwv.ravel()
+    precip = precip.ravel()
+
+    # The bin of each time step, with the time steps outside of all of the bins
+    # (including a nan cwv) in an extra bin at number_of_bins that is dropped.
+    bin_edges = cwv_min + np.arange(number_of_bins + 1) * bin_width
+    bin_index = np.digitize(cwv, bin_edges, right=True) - 1
+    bin_index[(bin_index < 0) | np.isnan(cwv)] = number_of_bins
+
+    def bin_sum(weights=None):
+        return np.bincount(bin_index, weights=weights, minlength=number_of_bins + 1)[
+            :number_of_bins
+        ]
+
+    has_precip = ~np.isnan(precip)
+    precip_valid = np.where(has_precip, precip, 0)
+    is_precipitating = has_precip & (precip >= precip_threshold)
+
+    hist_cwv = bin_sum()
+    hist_cwv[hist_cwv <= 1] = 0
+    # The number of time steps with a precip value, and the ones precipitating.
+    r = bin_sum(has_precip.astype(np.float64))
+    precip_points = bin_sum(is_precipitating.astype(np.float64))
+    hist_precip_points = precip_points.copy()
+    hist_precip_points[hist_precip_points <= 1] = 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pr_binned_mean = bin_sum(precip_valid) / r
+        # The population standard deviation, from the deviations to the
+        # mean of the bin for accuracy.
+        mean = np.append(pr_binned_mean, 0)[bin_index]
+        deviation = np.where(has_precip, precip - mean, 0)
+        pr_binned_std = np.sqrt(bin_sum(deviation**2) / r)
+        pr_probability = precip_points / r
+
+        freq_cwv = (hist_cwv / bin_width) / np.nansum(hist_cwv)
+        freq_precipitating_points = hist_precip_points / bin_width / np.nansum(hist_cwv)
+
+        errorbar_precip = pr_binned_std / np.sqrt(hist_cwv)
+        errorbar_precip_points = (
+            np.sqrt(hist_precip_points) / np.nansum(hist_cwv / bin_width) / bin_width
+        )
+        z = 0.675
+        phat = hist_precip_points / hist_cwv
+        binom = z * np.sqrt(phat * (1 - phat) / hist_cwv)
+    errorbar_precip_binom = np.stack([binom, binom], axis=1)
+
+    return ConvectionOnsetStatistics(
+        bin_center,
+        hist_cwv,
+        hist_precip_points,
+        pr_binned_mean,
+        pr_binned_std,
+        pr_probability,
+        freq_cwv,
+        freq_precipitating_points,
+        errorbar_precip,
+        errorbar_precip_points,
+        errorbar_precip_binom,
+    )
+
+
 def run_diag_pdf_daily(parameter):
     logger.info("'run_diag_pdf_daily' is not yet implemented.")
 
@@ -4,7 +4,6 @@ import json
 import math
 import os
 
-import cdms2
 import cdutil
 import numpy
 import scipy.stats
@@ -85,7 +84,7 @@ def calculate_nino_index_model(data, nino_region_str, parameter):
                 )
             else:
                 raise e1
-        nino_region = default_regions.regions_specs[nino_region_str]["domain"]  # type: ignore
+        nino_region = default_regions.regions_specs[nino_region_str]["domain"]
         sst_nino = sst(nino_region)
         # Domain average
         sst_avg = cdutil.averager(sst_nino, axis="xy")
@@ -112,6 +111,36 @@ def calculate_nino_index_model(data, nino_region_str, parameter):
     return nino_index
 
 
+def linregress(x, y):
+    """
+    The slope and two-sided p-value of the linear regression of each column
+    of y, (time, points), on x, (time,). Same as calling scipy.stats.linregress
+    on each column of y, but computed for all of the columns at once.
+    """
+    n = len(x)
+    x = x.astype(numpy.float64)
+    y = y.astype(numpy.float64)
+    x_dev = x - x.mean()
+    y_dev = y - y.mean(axis=0)
+    ssxm = numpy.dot(x_dev, x_dev) / n
+    ssym = (y_dev**2).sum(axis=0) / n
+    ssxym = numpy.dot(x_dev, y_dev) / n
+
+    r_den = numpy.sqrt(ssxm * ssym)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        r = numpy.where(r_den == 0, 0.0, ssxym / r_den)
+    r = numpy.clip(r, -1.0, 1.0)
+    slope = ssxym / ssxm
+
+    # The t-statistic of the correlation, with n - 2 degrees of freedom.
+    df = n - 2
+    tiny = 1.0e-20
+    t = r * numpy.sqrt(df / ((1.0 - r + tiny) * (1.0 + r + tiny)))
+    pvalue = 2 * scipy.stats.t.sf(numpy.abs(t), df)
+
+    return slope, pvalue
+
+
 def perform_regression(data, parameter, var, region, land_frac, ocean_frac, nino_index):
     ts_var = data.get_timeseries_variable(var)
     domain = utils.general.select_region(
@@ -124,34 +153,18 @@ def perform_regression(data, parameter, var, region, land_frac, ocean_frac, nino
     if parameter.print_statements:
         logger.info("domain.shape: {}".format(domain.shape))
     anomaly = cdutil.ANNUALCYCLE.departures(domain)
-    nlat = len(anomaly.getLatitude())
-    nlon = len(anomaly.getLongitude())
     reg_coe = anomaly[0, :, :](squeeze=1)
-    confidence_levels = cdutil.ANNUALCYCLE.departures(domain)[0, :, :](squeeze=1)
-    # Neither of the following methods work, so we just set values in confidence_levels
-    # to be explicitly 0 or 1.
-    # confidence_levels = anomaly[0, :, :](squeeze=1).fill(0)
-    # confidence_levels = numpy.zeros_like(reg_coe)
-    for ilat in range(nlat):
-        if parameter.print_statements:
-            logger.info("ilat: {}".format(ilat))
-        for ilon in range(nlon):
-            dependent_var = anomaly[:, ilat, ilon]
-            independent_var = nino_index
-            # Uncomment the following line to use CDAT/genutil instead
-            # (You'll also need to set pvalue)
-            # slope, intercept = genutil.statistics.linearregression(dependent_var, x=independent_var)
-            slope, _, _, pvalue, _ = scipy.stats.linregress(
-                independent_var, dependent_var
-            )
-            reg_coe[ilat, ilon] = slope
-            # Set confidence level to 1 if significant and 0 if not
-            if pvalue < 0.05:
-                # p-value < 5%
-                # This implies significance at 95% confidence level
-                confidence_levels[ilat, ilon] = 1
-            else:
-                confidence_levels[ilat, ilon] = 0
+    confidence_levels = reg_coe.clone()
+    # Regress the anomalies of all of the grid points on the nino index at
+    # once. Like scipy.stats.linregress, this ignores the mask of the anomalies.
+    dependent_var = numpy.ma.getdata(anomaly).reshape(anomaly.shape[0], -1)
+    independent_var = numpy.asarray(nino_index)
+    slope, pvalue = linregress(independent_var, dependent_var)
+    # Setting the values also unmasks them, as setting each point did.
+    reg_coe[:, :] = slope.reshape(reg_coe.shape)
+    # Set confidence level to 1 if significant and 0 if not.
+    # p-value < 5% implies significance at 95% confidence level.
+    confidence_levels[:, :] = (pvalue < 0.05).reshape(reg_coe.shape)
     if parameter.print_statements:
         logger.info(f"confidence in fn: {confidence_levels.shape}")
     sst_units = "degC"
@@ -223,16 +236,7 @@ def run_diag_map(parameter):
         )
 
         # Get land/ocean fraction for masking.
-        try:
-            land_frac = test_data.get_climo_variable("LANDFRAC", season)
-            ocean_frac = test_data.get_climo_variable("OCNFRAC", season)
-        except Exception:
-            mask_path = os.path.join(
-                e3sm_diags.INSTALL_PATH, "acme_ne30_ocean_land_mask.nc"
-            )
-            with cdms2.open(mask_path) as f:
-                land_frac = f("LANDFRAC")
-                ocean_frac = f("OCNFRAC")
+        land_frac, ocean_frac = utils.mask.get_land_ocean_fracs(test_data, season)
 
         for var in variables:
             if parameter.print_statements:
@@ -408,7 +412,7 @@ def run_diag_scatter(parameter):
             y = {"var": y_var, "region": region}
             test_data_ts = test_data.get_timeseries_variable(y_var)
             ref_data_ts = ref_data.get_timeseries_variable(y_var)
-            y_region = default_regions.regions_specs[region]["domain"]  # type: ignore
+            y_region = default_regions.regions_specs[region]["domain"]
             test_data_ts_regional = test_data_ts(y_region)
             ref_data_ts_regional = ref_data_ts(y_region)
             # Domain average
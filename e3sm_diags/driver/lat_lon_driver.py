@@ -3,13 +3,21 @@ from __future__ import print_function
 import json
 import os
 
-import cdms2
 import MV2
 
-import e3sm_diags
 from e3sm_diags.driver import utils
 from e3sm_diags.logger import custom_logger
-from e3sm_diags.metrics import corr, max_cdms, mean, min_cdms, rmse, std
+from e3sm_diags.metrics import (
+    area_weights,
+    corr,
+    field_metrics,
+    max_cdms,
+    mean,
+    min_cdms,
+    rmse,
+    rmse_corr,
+    std,
+)
 from e3sm_diags.plot import plot
 
 logger = custom_logger(__name__)
@@ -17,6 +25,10 @@ logger = custom_logger(__name__)
 
 def create_metrics(ref, test, ref_regrid, test_regrid, diff):
     """Creates the mean, max, min, rmse, corr in a dictionary"""
+    metrics_dict = _create_metrics_on_grids(ref, test, ref_regrid, test_regrid, diff)
+    if metrics_dict is not None:
+        return metrics_dict
+
     metrics_dict = {}
     metrics_dict["ref"] = {
         "min": float(min_cdms(ref)),
@@ -52,6 +64,34 @@ def create_metrics(ref, test, ref_regrid, test_regrid, diff):
     return metrics_dict
 
 
+def _create_metrics_on_grids(ref, test, ref_regrid, test_regrid, diff):
+    """
+    Same as create_metrics(), but with the area weights of each grid
+    computed once and each variable only traversed once. The metrics are
+    summed in float64 instead of by genutil, so they match within a relative
+    tolerance of about 1e-12.
+    Returns None if any of the variables isn't a 2D lat/lon variable with
+    valid values, so the variables with no valid values get the values of
+    genutil, ex: -inf when it fails.
+    """
+    variables = [ref, test, ref_regrid, test_regrid, diff]
+    weights = [area_weights(v) for v in variables]
+    if any(w is None for w in weights):
+        return None
+    if any(MV2.count(v) == 0 for v in variables):
+        return None
+
+    metrics_dict = {
+        "ref": field_metrics(ref, weights[0]),
+        "ref_regrid": field_metrics(ref_regrid, weights[2], with_std=True),
+        "test": field_metrics(test, weights[1]),
+        "test_regrid": field_metrics(test_regrid, weights[3], with_std=True),
+        "diff": field_metrics(diff, weights[4]),
+        "misc": rmse_corr(test_regrid, ref_regrid, weights[3]),
+    }
+    return metrics_dict
+
+
 def run_diag(parameter):
     variables = parameter.variables
     seasons = parameter.seasons
@@ -71,16 +111,7 @@ def run_diag(parameter):
         )
 
         # Get land/ocean fraction for masking.
-        try:
-            land_frac = test_data.get_climo_variable("LANDFRAC", season)
-            ocean_frac = test_data.get_climo_variable("OCNFRAC", season)
-        except Exception:
-            mask_path = os.path.join(
-                e3sm_diags.INSTALL_PATH, "acme_ne30_ocean_land_mask.nc"
-            )
-            with cdms2.open(mask_path) as f:
-                land_frac = f("LANDFRAC")
-                ocean_frac = f("OCNFRAC")
+        land_frac, ocean_frac = utils.mask.get_land_ocean_fracs(test_data, season)
 
         for var in variables:
             logger.info("Variable: {}".format(var))
@@ -138,23 +169,40 @@ def run_diag(parameter):
                     mv2, plev, ref_data, var, season
                 )
 
-                # Select plev.
-                for ilev in range(len(plev)):
-                    mv1 = mv1_p[
-                        ilev,
-                    ]
-                    mv2 = mv2_p[
-                        ilev,
-                    ]
-
-                    for region in regions:
-                        logger.info(f"Selected regions: {region}")
-                        mv1_domain = utils.general.select_region(
-                            region, mv1, land_frac, ocean_frac, parameter
-                        )
-                        mv2_domain = utils.general.select_region(
-                            region, mv2, land_frac, ocean_frac, parameter
-                        )
+                # Each region is selected for all of the plevs at once, and
+                # all of its plevs are regridded in a single batch, towards
+                # the lower resolution of the two variables for calculating
+                # the difference. Only the plevs of one region are kept at a
+                # time.
+                for region in regions:
+                    logger.info(f"Selected regions: {region}")
+                    mv1_p_domain = utils.general.select_region(
+                        region, mv1_p, land_frac, ocean_frac, parameter
+                    )
+                    mv2_p_domain = utils.general.select_region(
+                        region, mv2_p, land_frac, ocean_frac, parameter
+                    )
+                    mv1_p_regs, mv2_p_regs = utils.general.regrid_to_lower_res_batch(
+                        [mv1_p_domain],
+                        [mv2_p_domain],
+                        parameter.regrid_tool,
+                        parameter.regrid_method,
+                    )
+
+                    # Select plev.
+                    for ilev in range(len(plev)):
+                        mv1_domain = mv1_p_domain[
+                            ilev,
+                        ]
+                        mv2_domain = mv2_p_domain[
+                            ilev,
+                        ]
+                        mv1_reg = mv1_p_regs[0][
+                            ilev,
+                        ]
+                        mv2_reg = mv2_p_regs[0][
+                            ilev,
+                        ]
 
                         parameter.output_file = "-".join(
                             [
@@ -177,15 +225,6 @@ def run_diag(parameter):
                             )
                         )
 
-                        # Regrid towards the lower resolution of the two
-                        # variables for calculating the difference.
-                        mv1_reg, mv2_reg = utils.general.regrid_to_lower_res(
-                            mv1_domain,
-                            mv2_domain,
-                            parameter.regrid_tool,
-                            parameter.regrid_method,
-                        )
-
                         diff = mv1_reg - mv2_reg
                         metrics_dict = create_metrics(
                             mv2_domain, mv1_domain, mv2_reg, mv1_reg, diff
@@ -229,27 +268,38 @@ def run_diag(parameter):
 
             # For variables without a z-axis.
             elif mv1.getLevel() is None and mv2.getLevel() is None:
-                for region in regions:
-                    logger.info(f"Selected region: {region}")
-                    mv1_domain = utils.general.select_region(
+                mv1_domains = [
+                    utils.general.select_region(
                         region, mv1, land_frac, ocean_frac, parameter
                     )
-                    mv2_domain = utils.general.select_region(
+                    for region in regions
+                ]
+                mv2_domains = [
+                    utils.general.select_region(
                         region, mv2, land_frac, ocean_frac, parameter
                     )
+                    for region in regions
+                ]
+                # Regrid towards the lower resolution of the two
+                # variables for calculating the difference, with the
+                # regions on the same grid regridded in a single batch.
+                mv1_regs, mv2_regs = utils.general.regrid_to_lower_res_batch(
+                    mv1_domains,
+                    mv2_domains,
+                    parameter.regrid_tool,
+                    parameter.regrid_method,
+                )
+
+                for iregion, region in enumerate(regions):
+                    logger.info(f"Selected region: {region}")
+                    mv1_domain = mv1_domains[iregion]
+                    mv2_domain = mv2_domains[iregion]
+                    mv1_reg = mv1_regs[iregion]
+                    mv2_reg = mv2_regs[iregion]
 
                     parameter.output_file = "-".join([ref_name, var, season, region])
                     parameter.main_title = str(" ".join([var, season, region]))
 
-                    # Regrid towards the lower resolution of the two
-                    # variables for calculating the difference.
-                    mv1_reg, mv2_reg = utils.general.regrid_to_lower_res(
-                        mv1_domain,
-                        mv2_domain,
-                        parameter.regrid_tool,
-                        parameter.regrid_method,
-                    )
-
                     # Special case.
                     if var == "TREFHT_LAND" or var == "SST":
                         if ref_name == "WILLMOTT":
@@ -168,7 +168,7 @@ def run_diag(parameter):
             logger.info("Variable={}".format(variable))
         test_var = test_data.get_timeseries_variable(variable)
         ref_var = ref_data.get_timeseries_variable(variable)
-        qbo_region = default_regions.regions_specs[region]["domain"]  # type: ignore
+        qbo_region = default_regions.regions_specs[region]["domain"]
 
         test_region = test_var(qbo_region)
         ref_region = ref_var(qbo_region)
@@ -1,10 +1,10 @@
 from __future__ import print_function
 
 import csv
+import json
 import os
 
 import cdms2
-import cdutil
 import numpy
 import scipy.io
 
@@ -18,77 +18,110 @@ from e3sm_diags.plot.cartopy.streamflow_plot import (
 
 logger = custom_logger(__name__)
 
+# The number of gauges whose monthly series are processed at once.
+GAUGE_CHUNK_SIZE = 4096
+
+# The version of the GSIM .mat files cached as .npy, bumped whenever the
+# format of the cache changes.
+GSIM_CACHE_VERSION = 1
 
-def get_drainage_area_error(
-    radius, resolution, lon_ref, lat_ref, area_upstream, area_ref
-):
-    k_bound = len(range(-radius, radius + 1))
-    k_bound *= k_bound
-    area_test = numpy.zeros((k_bound, 1))
-    error_test = numpy.zeros((k_bound, 1))
-    lat_lon_test = numpy.zeros((k_bound, 2))
-    k = 0
-    for i in range(-radius, radius + 1):
-        for j in range(-radius, radius + 1):
-            x = int(
-                1 + ((lon_ref + j * resolution) - (-180 + resolution / 2)) / resolution
-            )
-            y = int(
-                1 + ((lat_ref + i * resolution) - (-90 + resolution / 2)) / resolution
-            )
-            area_test[k] = area_upstream[x - 1, y - 1] / 1000000
-            error_test[k] = numpy.abs(area_test[k] - area_ref) / area_ref
-            lat_lon_test[k, 0] = lat_ref + i * resolution
-            lat_lon_test[k, 1] = lon_ref + j * resolution
-            k += 1
-    # The id of the center grid in the searching area
-    center_id = (k_bound - 1) / 2
 
-    lat_lon_ref = [lat_ref, lon_ref]
-    drainage_area_error = error_test[int(center_id)]
-    return drainage_area_error, lat_lon_ref
+def get_grid_indices(lat, lon, resolution):
+    """
+    Return the (lon, lat) indices of the grid cells containing each of the
+    lat, lon points, on a global grid of the given resolution.
+    """
+    # `astype` truncates toward 0, like `int()`.
+    x = (1 + (lon - (-180 + resolution / 2)) / resolution).astype(numpy.int64)
+    y = (1 + (lat - (-90 + resolution / 2)) / resolution).astype(numpy.int64)
+    return x - 1, y - 1
 
 
-def get_seasonality(monthly):
+def get_drainage_area_error(
+    radius, resolution, lon_ref, lat_ref, area_upstream, area_ref
+):
+    """
+    The relative error between the drainage area of each gauge and the
+    upstream area of the grid cell containing it, with lon_ref, lat_ref and
+    area_ref arrays with a value per gauge.
+    """
+    offsets = numpy.arange(-radius, radius + 1) * resolution
+    # The lat, lon of each grid in the searching area around each gauge,
+    # (searching area, gauge).
+    lat_test = (lat_ref + offsets[:, numpy.newaxis, numpy.newaxis]).repeat(
+        len(offsets), axis=1
+    )
+    lon_test = (lon_ref + offsets[numpy.newaxis, :, numpy.newaxis]).repeat(
+        len(offsets), axis=0
+    )
+    x, y = get_grid_indices(lat_test, lon_test, resolution)
+    area_test = area_upstream[x, y] / 1000000
+    error_test = numpy.abs(area_test - area_ref) / area_ref
+    # The error of the center grid in the searching area
+    drainage_area_error = error_test[radius, radius]
+    return drainage_area_error
+
+
+def get_seasonality(monthly, num_years=None):
+    """
+    The seasonality index and peak month of the streamflow of each gauge,
+    with monthly of shape (12, years, gauges). num_years is the number of
+    years of record of each gauge, which defaults to all of the years.
+    Years with any missing month don't contribute to the seasonality.
+    A (12, years) monthly returns the values of a single gauge.
+    """
     monthly = monthly.astype(numpy.float64)
     # See https://agupubs.onlinelibrary.wiley.com/doi/epdf/10.1029/2018MS001603 Equations 1 and 2
     if monthly.shape[0] != 12:
         raise Exception(
             "monthly.shape={} does not include 12 months".format(monthly.shape)
         )
-    num_years = monthly.shape[1]
-    p_k = numpy.zeros((12, 1))
+    if num_years is None:
+        num_years = monthly.shape[1]
     # The total streamflow for each year (sum of Q_ij in the denominator of Equation 1, for all j)
-    # 1 x num_years
+    # years x gauges
     total_streamflow = numpy.sum(monthly, axis=0)
-    for month in range(12):
-        # The streamflow for this month in each year (Q_ij in the numerator of Equation 1, for all j)
-        # 1 x num_years
-        streamflow_month_all_years = monthly[month, :]
-        # Proportion that this month contributes to streamflow that year.
-        # 1 x num_years
-        # For all i, divide streamflow_month_all_years[i] by total_streamflow[i]
-        streamflow_proportion = numpy.divide(
-            streamflow_month_all_years, total_streamflow
-        )
-        # The sum is the sum over j in Equation 1.
-        # Dividing the sum of proportions by num_years gives the *average* proportion of annual streamflow during
-        # this month.
-        # Multiplying by 12 makes it so that Pk_i (`p_k[month]`) will be 1 if all months have equal streamflow and
-        # 12 if all streamflow occurs in one month.
-        # These steps produce the 12/n factor in Equation 1.
-        p_k[month] = numpy.nansum(streamflow_proportion) * 12 / num_years
+    # Proportion that each month contributes to streamflow that year.
+    # 12 x years x gauges
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        streamflow_proportion = numpy.divide(monthly, total_streamflow)
+    # The sum is the sum over j in Equation 1.
+    # Dividing the sum of proportions by num_years gives the *average* proportion of annual streamflow during
+    # this month.
+    # Multiplying by 12 makes it so that Pk_i (`p_k[month]`) will be 1 if all months have equal streamflow and
+    # 12 if all streamflow occurs in one month.
+    # These steps produce the 12/n factor in Equation 1.
+    p_k = numpy.nansum(streamflow_proportion, axis=1) * 12 / num_years
     # From Equation 2
-    seasonality_index = numpy.max(p_k)
-    # `p_k == numpy.max(p_k)` produces a Boolean matrix, True if the value (i.e., streamflow) is the max value.
-    # `np.where(p_k == numpy.max(p_k))` produces the indices (i.e., months) where the max value is reached.
-    peak_month = numpy.where(p_k == numpy.max(p_k))[0]
+    seasonality_index = numpy.max(p_k, axis=0)
     # If more than one month has peak streamflow, simply define the peak month as the first one of the peak months.
     # Month 0 is January, Month 1 is February, and so on.
-    peak_month = peak_month[0]
+    peak_month = numpy.argmax(p_k, axis=0)
     return seasonality_index, peak_month
 
 
+def get_grid_series(array, x, y):
+    """
+    The (points, time) series of the (x, y) grid cells of a (lon, lat, time)
+    array, as float32 with masked values as nan.
+    """
+    series = numpy.ma.getdata(array)[x, y, :].astype(numpy.float32)
+    mask = numpy.ma.getmask(array)
+    if mask is not numpy.ma.nomask:
+        series[mask[x, y, :]] = numpy.nan
+    return series
+
+
+def get_monthly_matrix(series):
+    """
+    Reshape the monthly series of each gauge, (gauges, 12n), into a
+    (12, n, gauges) matrix, so the first row is
+    [January of year 1, January of year 2,...] for each gauge.
+    """
+    num_gauges = series.shape[0]
+    return numpy.transpose(numpy.reshape(series, (num_gauges, -1, 12)), (2, 1, 0))
+
+
 def run_diag(parameter):
     # Assume `model` will always be a `nc` file.
     # Assume `obs` will always be a `mat` file.
@@ -127,20 +160,26 @@ def run_diag(parameter):
     if parameter.print_statements:
         logger.info("gauges.shape={}".format(gauges.shape))
 
+    # Resolution of MOSART output
+    resolution = 0.5
+    # Search radius (number of grids around the center point)
+    radius = 1
+    bins = numpy.floor(gauges[:, 7:9].astype(numpy.float64) / resolution)
+    # Move the ref lat lon to grid center
+    lat_lon = (bins + 0.5) * resolution
+    if parameter.print_statements:
+        logger.info("lat_lon.shape={}".format(lat_lon.shape))
+    # The grid cells of the gauges, only the streamflow at these is read.
+    grid_lon, grid_lat = get_grid_indices(lat_lon[:, 1], lat_lon[:, 0], resolution)
+
     variables = parameter.variables
     for var in variables:
-        ref_array = setup_ref(parameter, var, using_ref_mat_file)
-        area_upstream, test_array = setup_test(parameter, var, using_test_mat_file)
-
-        # Resolution of MOSART output
-        resolution = 0.5
-        # Search radius (number of grids around the center point)
-        radius = 1
-        bins = numpy.floor(gauges[:, 7:9].astype(numpy.float64) / resolution)
-        # Move the ref lat lon to grid center
-        lat_lon = (bins + 0.5) * resolution
-        if parameter.print_statements:
-            logger.info("lat_lon.shape={}".format(lat_lon.shape))
+        ref_array, ref_months = setup_ref(
+            parameter, var, using_ref_mat_file, gauges, grid_lon, grid_lat
+        )
+        area_upstream, test_array = setup_test(
+            parameter, var, using_test_mat_file, grid_lon, grid_lat
+        )
 
         # Define the export matrix
         export = generate_export(
@@ -152,6 +191,7 @@ def run_diag(parameter):
             resolution,
             using_ref_mat_file,
             ref_array,
+            ref_months,
             test_array,
         )
 
@@ -215,18 +255,17 @@ def run_diag(parameter):
     return parameter
 
 
-def setup_ref(parameter, var, using_ref_mat_file):
+def setup_ref(parameter, var, using_ref_mat_file, gauges, grid_lon, grid_lat):
+    """
+    The gauges x time ref streamflow, and the month of each time for GSIM.
+    """
+    ref_months = None
     if not using_ref_mat_file:
         ref_data = utils.dataset.Dataset(parameter, ref=True)
         parameter.ref_name_yrs = utils.general.get_name_and_yrs(parameter, ref_data)
-        ref_data_ts = ref_data.get_timeseries_variable(var)
-        var_array = ref_data_ts(cdutil.region.domain(latitude=(-90.0, 90, "ccb")))
-        if parameter.print_statements:
-            logger.info("ref var original dimensions={}".format(var_array.shape))
-        var_transposed = numpy.transpose(var_array, (2, 1, 0))
-        if parameter.print_statements:
-            logger.info("ref var transposed dimensions={}".format(var_transposed.shape))
-        ref_array = var_transposed.astype(numpy.float64)
+        # Only the streamflow at the grid cells of the gauges is read,
+        # as a gauges x time array.
+        ref_array = ref_data.get_timeseries_points(var, grid_lat, grid_lon)
     else:
         # Load the observed streamflow dataset (GSIM)
         # the data has been reorganized to a 1380 * 30961 matrix. 1380 is the month
@@ -246,40 +285,98 @@ def setup_ref(parameter, var, using_ref_mat_file):
         parameter.ref_name_yrs = "{} ({}-{})".format(
             ref_name, parameter.ref_start_yr, parameter.ref_end_yr
         )
-        ref_mat = scipy.io.loadmat(ref_mat_file)
-        ref_array = ref_mat["GSIM"].astype(numpy.float64)
+        gsim_flow, gsim_info = load_gsim(ref_mat_file)
+        # Only the rows of the gauges are read from the memory-mapped matrix.
+        origin_id = gauges[:, 1].astype(numpy.int64)
+        ref_array = gsim_flow[origin_id - 1].astype(numpy.float64)
+        ref_months = numpy.array(gsim_info["months"])
     if parameter.print_statements:
-        # GSIM: 1380 x 30961
-        # wrmflow: 720 x 360 x 360
+        # GSIM: 25765 x 1380
+        # wrmflow: 25765 x 360
         logger.info("ref_array.shape={}".format(ref_array.shape))
 
-    return ref_array
-
-
-def setup_test(parameter, var, using_test_mat_file):
+    return ref_array, ref_months
+
+
+def load_gsim(mat_file):
+    """
+    Load the GSIM streamflow of a .mat file as an (origin_id, time) matrix,
+    with the streamflow of the gauge with origin_id k in row k - 1, and
+    a dict with the years and months of the times.
+
+    The .mat file is converted once to a .npy file, with a JSON sidecar for
+    the years and months, in the cache_dir of utils.disk_cache. Later runs
+    memory-map the .npy file, so only the rows of the gauges that are used
+    are read. The matrix is loaded in memory if there's no cache_dir or the
+    cache can't be written.
+    """
+    npy_file = utils.disk_cache.get_path("gsim", mat_file, ".npy")
+    json_file = utils.disk_cache.get_path("gsim", mat_file, ".json")
+
+    mat_stat = os.stat(mat_file)
+    if npy_file is not None and json_file is not None:
+        try:
+            with open(json_file) as f:
+                info = json.load(f)
+            if (
+                info["version"] == GSIM_CACHE_VERSION
+                and info["mat_mtime"] == mat_stat.st_mtime
+                and info["mat_size"] == mat_stat.st_size
+            ):
+                return numpy.load(npy_file, mmap_mode="r"), info
+        except (OSError, ValueError, KeyError):
+            pass
+
+    # The data has been reorganized to a time x (2 + gauges) matrix.
+    # Column 0 -- year
+    # Column 1 -- month
+    # Column origin_id + 1 -- the streamflow of the gauge with the corresponding origin_id
+    gsim = scipy.io.loadmat(mat_file)["GSIM"]
+    flow = numpy.ascontiguousarray(gsim[:, 2:].T, dtype=numpy.float64)
+    info = {
+        "version": GSIM_CACHE_VERSION,
+        "mat_mtime": mat_stat.st_mtime,
+        "mat_size": mat_stat.st_size,
+        "origin_ids": list(range(1, flow.shape[0] + 1)),
+        "years": gsim[:, 0].astype(int).tolist(),
+        "months": gsim[:, 1].astype(int).tolist(),
+    }
+
+    if npy_file is None or json_file is None:
+        return flow, info
+
+    def write_info(path):
+        with open(path, "w") as f:
+            json.dump(info, f)
+
+    # The sidecar is written last, so the .npy file is complete when it's
+    # valid.
+    if not utils.disk_cache.save(npy_file, lambda path: numpy.save(path, flow)):
+        return flow, info
+    if not utils.disk_cache.save(json_file, write_info):
+        return flow, info
+
+    return numpy.load(npy_file, mmap_mode="r"), info
+
+
+def setup_test(parameter, var, using_test_mat_file, grid_lon, grid_lat):
     # Load E3SM simulated streamflow dataset
     if not using_test_mat_file:
         # `Dataset` will take the time slice from test_start_yr to test_end_yr
         test_data = utils.dataset.Dataset(parameter, test=True)
         parameter.test_name_yrs = utils.general.get_name_and_yrs(parameter, test_data)
-        test_data_ts = test_data.get_timeseries_variable(var)
-        var_array = test_data_ts(cdutil.region.domain(latitude=(-90.0, 90, "ccb")))
-        if parameter.print_statements:
-            logger.info("test var original dimensions={}".format(var_array.shape))
-        var_transposed = numpy.transpose(var_array, (2, 1, 0))
-        if parameter.print_statements:
-            logger.info(
-                "test var transposed dimensions={}".format(var_transposed.shape)
-            )
-        test_array = var_transposed.astype(numpy.float64)
+        # Only the streamflow at the grid cells of the gauges is read,
+        # as a gauges x time array.
+        test_array = test_data.get_timeseries_points(var, grid_lat, grid_lon)
         areatotal2 = test_data.get_static_variable("areatotal2", var)
         area_upstream = numpy.transpose(areatotal2, (1, 0)).astype(numpy.float64)
         if parameter.print_statements:
             logger.info("area_upstream dimensions={}".format(area_upstream.shape))
     else:
-        area_upstream, test_array = debugging_case_setup_test(parameter)
+        area_upstream, test_grid = debugging_case_setup_test(parameter)
+        test_array = get_grid_series(test_grid, grid_lon, grid_lat)
     if parameter.print_statements:
-        # For edison: 720x360x600
+        # For edison: 25765x600
         logger.info("test_array.shape={}".format(test_array.shape))
     if type(area_upstream) == cdms2.tvariable.TransientVariable:
         area_upstream = area_upstream.getValue()
@@ -377,154 +474,133 @@ def generate_export(
     resolution,
     using_ref_mat_file,
     ref_array,
+    ref_months,
     test_array,
 ):
     # Annual mean of test, annual mean of ref, error for area, lat, lon
     export = numpy.zeros((lat_lon.shape[0], 9))
     if parameter.print_statements:
         logger.info("export.shape={}".format(export.shape))
-    for i in range(lat_lon.shape[0]):
-        if parameter.print_statements and (i % 1000 == 0):
-            logger.info("On gauge #{}".format(i))
-        if parameter.max_num_gauges and i >= parameter.max_num_gauges:
-            break
-        lat_ref = lat_lon[i, 1]
-        lon_ref = lat_lon[i, 0]
-        # Estimated drainage area (km^2) from ref
-        area_ref = gauges[i, 13].astype(numpy.float64)
+    num_gauges = lat_lon.shape[0]
+    if parameter.max_num_gauges:
+        num_gauges = min(num_gauges, parameter.max_num_gauges)
+
+    # The gauges are processed in chunks, which bounds the memory used for
+    # the monthly series of the gauges of long records.
+    for start in range(0, num_gauges, GAUGE_CHUNK_SIZE):
+        end = min(start + GAUGE_CHUNK_SIZE, num_gauges)
+        if parameter.print_statements:
+            logger.info("On gauges #{}-{}".format(start, end - 1))
+        export[start:end] = generate_export_of_gauges(
+            lat_lon[start:end],
+            area_upstream,
+            gauges[start:end],
+            radius,
+            resolution,
+            using_ref_mat_file,
+            ref_array[start:end],
+            ref_months,
+            test_array[start:end],
+        )
+    return export
 
-        if area_upstream is not None:
-            drainage_area_error, lat_lon_ref = get_drainage_area_error(
-                radius,
-                resolution,
-                lon_ref,
-                lat_ref,
-                area_upstream,
-                area_ref,
-            )
-        else:
-            # Use the center location
-            lat_lon_ref = [lat_ref, lon_ref]
-        if using_ref_mat_file:
-            origin_id = gauges[i, 1].astype(numpy.int64)
-            # Column 0 -- year
-            # Column 1 -- month
-            # Column origin_id + 1 -- the ref streamflow from gauge with the corresponding origin_id
-            extracted = ref_array[:, [0, 1, origin_id + 1]]
-            monthly_mean = numpy.zeros((12, 1)) + numpy.nan
-            # For GSIM, shape is (1380,)
-            month_array = extracted[:, 1]
-            for month in range(12):
-                # Add 1 to month to account for the months being 1-indexed
-                month_array_boolean = month_array == month + 1
-                s = numpy.sum(month_array_boolean)
-                if s > 0:
-                    # `extracted[:,1]`: for all x, examine `extracted[x,1]`
-                    # `extracted[:,1] == m`: Boolean array where 0 means the item in position [x,1] is NOT m,
-                    # and 1 means it is m
-                    # Example:
-                    # a = [[1,2,3,4],
-                    #      [5,6,7,8],
-                    #      [1,2,3,4]]
-                    # a[:,1]: [[2],
-                    #          [6],
-                    #          [2]]
-                    # a[:,1] == 2: [[1], # False is 0, True is 1
-                    #               [0],
-                    #               [1]]
-                    # a[a[:,1] == 2, 2]: [[3],
-                    #                     [3]]
-                    monthly_mean[month] = numpy.nanmean(
-                        extracted[month_array_boolean, 2]
-                    )
-            # This is ref annual mean streamflow
-            annual_mean_ref = numpy.mean(monthly_mean)
-        if using_ref_mat_file and numpy.isnan(annual_mean_ref):
-            # All elements of row i will be nan
-            export[i, :] = numpy.nan
-        else:
-            if using_ref_mat_file:
-                # Reshape extracted[:,2] into a 12 x ? matrix; -1 means to
-                # calculate the size of the missing dimension.
-                # Note that `numpy.reshape(extracted[:, 2], (12,-1))` will not work.
-                # We do need to go from (12n x 1) to (12 x n).
-                # `reshape` alone would make the first row [January of year 1, February of year 1,...]
-                # (i.e., 12 sequential rows with n entries)
-                # We actually want the first row to be [January of year 1, January of year 2,...]
-                # (i.e., n sequential columns with 12 entries)
-                # So, we use `reshape` to slice into n segments of length 12 and then we `transpose`.
-                mmat = numpy.transpose(numpy.reshape(extracted[:, 2], (-1, 12)))
-                mmat_id = numpy.sum(mmat, axis=0).transpose()
-                if numpy.sum(~numpy.isnan(mmat_id), axis=0) > 0:
-                    # There's at least one year of record
-                    monthly = mmat[:, ~numpy.isnan(mmat_id)]
-                else:
-                    monthly = monthly_mean
-                seasonality_index_ref, peak_month_ref = get_seasonality(monthly)
-            else:
-                ref_lon = int(
-                    1 + (lat_lon_ref[1] - (-180 + resolution / 2)) / resolution
-                )
-                ref_lat = int(
-                    1 + (lat_lon_ref[0] - (-90 + resolution / 2)) / resolution
+
+def generate_export_of_gauges(
+    lat_lon,
+    area_upstream,
+    gauges,
+    radius,
+    resolution,
+    using_ref_mat_file,
+    ref_array,
+    ref_months,
+    test_array,
+):
+    """
+    The rows of the export matrix of the given gauges, all computed at once.
+    test_array and ref_array are the gauges x time streamflow of the gauges,
+    ref_months is the month of each time of GSIM.
+    """
+    export = numpy.zeros((lat_lon.shape[0], 9))
+    lat_ref = lat_lon[:, 1]
+    lon_ref = lat_lon[:, 0]
+    # Estimated drainage area (km^2) from ref
+    area_ref = gauges[:, 13].astype(numpy.float64)
+
+    if area_upstream is not None:
+        drainage_area_error = get_drainage_area_error(
+            radius,
+            resolution,
+            lon_ref,
+            lat_ref,
+            area_upstream,
+            area_ref,
+        )
+    # The seasonality of a grid in the ocean, where the streamflow is nan.
+    seasonality_index_ocean, peak_month_ocean = get_seasonality(numpy.ones((12, 1)))
+
+    if using_ref_mat_file:
+        # For GSIM, shape is (1380, gauges)
+        extracted = ref_array.T
+        month_array = ref_months
+        monthly_mean = numpy.zeros((12, lat_lon.shape[0])) + numpy.nan
+        for month in range(12):
+            # Add 1 to month to account for the months being 1-indexed
+            month_array_boolean = month_array == month + 1
+            if numpy.sum(month_array_boolean) > 0:
+                monthly_mean[month] = numpy.nanmean(
+                    extracted[month_array_boolean], axis=0
                 )
-                ref = numpy.squeeze(ref_array[ref_lon - 1, ref_lat - 1, :])
-                # Note that `numpy.reshape(ref, (12,-1))` will not work.
-                # We do need to go from (12n x 1) to (12 x n).
-                # `reshape` alone would make the first row [January of year 1, February of year 1,...]
-                # (i.e., 12 sequential rows with n entries)
-                # We actually want the first row to be [January of year 1, January of year 2,...]
-                # (i.e., n sequential columns with 12 entries)
-                # So, we use `reshape` to slice into n segments of length 12 and then we `transpose`.
-                mmat = numpy.transpose(numpy.reshape(ref, (-1, 12)))
-                monthly_mean_ref = numpy.nanmean(mmat, axis=1)
-                annual_mean_ref = numpy.mean(monthly_mean_ref)
-                if numpy.isnan(annual_mean_ref) == 1:
-                    # The identified grid is in the ocean
-                    monthly = numpy.ones((12, 1))
-                else:
-                    monthly = mmat
-
-                if type(monthly) == cdms2.tvariable.TransientVariable:
-                    monthly = monthly.getValue()
-
-                seasonality_index_ref, peak_month_ref = get_seasonality(monthly)
-
-            test_lon = int(1 + (lat_lon_ref[1] - (-180 + resolution / 2)) / resolution)
-            test_lat = int(1 + (lat_lon_ref[0] - (-90 + resolution / 2)) / resolution)
-            # For edison: 600x1
-            test = numpy.squeeze(test_array[test_lon - 1, test_lat - 1, :])
-            # For edison: 12x50
-            # Note that `numpy.reshape(test, (12,-1))` will not work.
-            # We do need to go from (12n x 1) to (12 x n).
-            # `reshape` alone would make the first row [January of year 1, February of year 1,...]
-            # (i.e., 12 sequential rows with n entries)
-            # We actually want the first row to be [January of year 1, January of year 2,...]
-            # (i.e., n sequential columns with 12 entries)
-            # So, we use `reshape` to slice into n segments of length 12 and then we `transpose`.
-            mmat = numpy.transpose(numpy.reshape(test, (-1, 12)))
-            monthly_mean_test = numpy.nanmean(mmat, axis=1)
-            annual_mean_test = numpy.mean(monthly_mean_test)
-            if numpy.isnan(annual_mean_test) == 1:
-                # The identified grid is in the ocean
-                monthly = numpy.ones((12, 1))
-            else:
-                monthly = mmat
-
-            if type(monthly) == cdms2.tvariable.TransientVariable:
-                monthly = monthly.getValue()
-
-            seasonality_index_test, peak_month_test = get_seasonality(monthly)
-
-            export[i, 0] = annual_mean_ref
-            export[i, 1] = annual_mean_test
-            if area_upstream is not None:
-                export[i, 2] = (
-                    drainage_area_error * 100
-                )  # From fraction to percentage of the drainage area bias
-            export[i, 3] = seasonality_index_ref  # Seasonality index of ref
-            export[i, 4] = peak_month_ref  # Max flow month of ref
-            export[i, 5] = seasonality_index_test  # Seasonality index of test
-            export[i, 6] = peak_month_test  # Max flow month of test
-            export[i, 7:9] = lat_lon_ref  # latlon of ref
+        # This is ref annual mean streamflow
+        annual_mean_ref = numpy.mean(monthly_mean, axis=0)
+
+        mmat = get_monthly_matrix(extracted.T)
+        # The years with a record for every month, nan years don't contribute
+        # to the seasonality.
+        mmat_id = numpy.sum(mmat, axis=0)
+        num_years = numpy.sum(~numpy.isnan(mmat_id), axis=0)
+        seasonality_index_ref, peak_month_ref = get_seasonality(
+            mmat, numpy.maximum(num_years, 1)
+        )
+        # Without any year of record, use the monthly means.
+        no_record = num_years == 0
+        if numpy.any(no_record):
+            index, peak = get_seasonality(monthly_mean[:, numpy.newaxis, no_record])
+            seasonality_index_ref[no_record] = index
+            peak_month_ref[no_record] = peak
+    else:
+        mmat = get_monthly_matrix(ref_array.astype(numpy.float64))
+        monthly_mean_ref = numpy.nanmean(mmat, axis=1)
+        annual_mean_ref = numpy.mean(monthly_mean_ref, axis=0)
+        seasonality_index_ref, peak_month_ref = get_seasonality(mmat)
+        # The identified grid is in the ocean
+        ocean = numpy.isnan(annual_mean_ref)
+        seasonality_index_ref[ocean] = seasonality_index_ocean
+        peak_month_ref[ocean] = peak_month_ocean
+
+    # For edison: 12 x 50 x gauges
+    mmat = get_monthly_matrix(test_array.astype(numpy.float64))
+    monthly_mean_test = numpy.nanmean(mmat, axis=1)
+    annual_mean_test = numpy.mean(monthly_mean_test, axis=0)
+    seasonality_index_test, peak_month_test = get_seasonality(mmat)
+    # The identified grid is in the ocean
+    ocean = numpy.isnan(annual_mean_test)
+    seasonality_index_test[ocean] = seasonality_index_ocean
+    peak_month_test[ocean] = peak_month_ocean
+
+    export[:, 0] = annual_mean_ref
+    export[:, 1] = annual_mean_test
+    if area_upstream is not None:
+        # From fraction to percentage of the drainage area bias
+        export[:, 2] = drainage_area_error * 100
+    export[:, 3] = seasonality_index_ref  # Seasonality index of ref
+    export[:, 4] = peak_month_ref  # Max flow month of ref
+    export[:, 5] = seasonality_index_test  # Seasonality index of test
+    export[:, 6] = peak_month_test  # Max flow month of test
+    export[:, 7] = lat_ref  # latlon of ref
+    export[:, 8] = lon_ref
+
+    if using_ref_mat_file:
+        # All elements of the rows of gauges without ref data will be nan
+        export[numpy.isnan(annual_mean_ref), :] = numpy.nan
     return export
@@ -1,15 +1,16 @@
 from __future__ import print_function
 
 import collections
+import json
 import os
-from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 import cdms2
 import numpy as np
 from netCDF4 import Dataset as netcdffile
 
 import e3sm_diags
+from e3sm_diags.driver.utils import disk_cache
 from e3sm_diags.plot.cartopy import tc_analysis_plot
 
 if TYPE_CHECKING:
@@ -26,6 +27,10 @@ OBS_START_YR = 1979
 OBS_END_YR = 2018
 OBS_YEARS = np.arange(OBS_START_YR, OBS_END_YR + 1)
 
+# The version of the cached metrics of the obs files, bumped whenever the way
+# they're computed changes.
+OBS_CACHE_VERSION = 1
+
 # (basin name, E bound, W bound, S bound, N bound, observed hurricane number per year)
 BasinInfo = Tuple[str, float, float, float, float, float]
 BASIN_DICT: Dict[str, BasinInfo] = {
@@ -167,10 +172,8 @@ def generate_tc_metrics_from_te_stitch_file(te_stitch_file: str) -> Dict[str, An
     with open(te_stitch_file) as f:
         lines = f.readlines()
 
-    # Calculate number of storms and max length
-    num_storms, max_len = _calc_num_storms_and_max_len(lines)
-    # Parse variables from TE stitch file
-    te_stitch_vars = _get_vars_from_te_stitch(lines, max_len, num_storms)
+    # Parse the tracks of all of the storms from TE stitch file
+    tracks = _get_tracks_from_te_stitch(lines)
 
     # Use E3SM land-sea mask
     mask_path = os.path.join(e3sm_diags.INSTALL_PATH, "acme_ne30_ocean_land_mask.nc")
@@ -179,20 +182,14 @@ def generate_tc_metrics_from_te_stitch_file(te_stitch_file: str) -> Dict[str, An
     # From model data, this dict stores a tuple for each basin.
     # (mean ace, tc_intensity_dist, seasonal_cycle, # storms, # of storms over the ocean)
     result_mod: Dict[str, Any] = {}
-    result_mod["num_years"] = te_stitch_vars["num_years"]
-
-    for basin, basin_info in BASIN_DICT.items():
-        mod_vars = _derive_metrics_per_basin(
-            num_storms,
-            te_stitch_vars,
-            ocnfrac,
-            basin_info,
-        )
+    result_mod["num_years"] = tracks["num_years"]
 
+    metrics_per_basin = _derive_metrics_per_basin(tracks, ocnfrac)
+    for basin, mod_vars in metrics_per_basin.items():
         pdf_mod_intensity = _calc_ts_intensity_dist(mod_vars["mod_wnd"])
         pdf_mod_seasonal_cycle = _calc_seasonal_cycle(mod_vars["mod_mon"])
-        storms_overall_per_yr = mod_vars["mod_num"] / te_stitch_vars["num_years"]
-        storms_over_ocean_per_yr = mod_vars["mod_num_ocn"] / te_stitch_vars["num_years"]
+        storms_overall_per_yr = mod_vars["mod_num"] / tracks["num_years"]
+        storms_over_ocean_per_yr = mod_vars["mod_num_ocn"] / tracks["num_years"]
 
         result_mod[basin] = [
             mod_vars["mod_ace_mean"],
@@ -205,165 +202,164 @@ def generate_tc_metrics_from_te_stitch_file(te_stitch_file: str) -> Dict[str, An
     return result_mod
 
 
-def _calc_num_storms_and_max_len(lines: List[str]) -> Tuple[int, int]:
-    """Calculate number of storms and max length using lines from a TE stitch file.
-
-    :param lines: Lines from TE stitch file
-    :type lines: List[str]
-    :return: Number of storms and max storm length
-    :rtype: Tuple[int, int]
-    """
-    num_storms = 0
-    max_len = 0
+def _get_tracks_from_te_stitch(lines: List[str]) -> Dict[str, Any]:
+    """Extracts the tracks of all of the storms from lines of a TE stitch file.
 
-    for line in lines:
-        if line[0] == "s":
-            num_storms = num_storms + 1
-            num_points = 0
-        else:
-            num_points = num_points + 1
-            max_len = max(max_len, num_points)
-
-    logger.info(f"Number of storms: {num_storms}")
-    logger.info(f"Max length of storms: {max_len}")
-    return num_storms, max_len
-
-
-def _get_vars_from_te_stitch(
-    lines: List[str], max_len: int, num_storms: int
-) -> Dict[str, Any]:
-    """Extracts variables from lines of a TE stitch file.
+    The points of all of the storms are stored one after the other in each
+    variable, the points of storm ``k`` are ``storm_start[k]:storm_start[k + 1]``.
 
     :param lines: Lines from a TE stitch file
     :type lines: List[str]
-    :param max_len: Max length of storms
-    :type max_len: int
-    :param num_storms: Number of storms
-    :type num_storms: int
     :return: Dictionary of variables from TE stitch file
     :rtype: Dict[str, Any]
     """
     keys = ("longmc", "latmc", "vsmc", "yearmc", "monthmc")
-    vars_dict = {k: np.empty((max_len, num_storms)) * np.nan for k in keys}
-
-    index = 0
-    year_start = int(lines[0].split("\t")[2])
-    year_end = year_start
+    # The columns of the keys in the lines of the points of a storm.
+    cols = (2, 3, 5, 6, 7)
 
+    storm_start = []
+    storm_years = []
+    point_lines: List[str] = []
     for line in lines:
-        line_split = line.split("\t")
         if line[0] == "s":
-            index = index + 1
-            year = int(line_split[2])
-            year_end = max(year, year_start)
-            k = 0
+            storm_start.append(len(point_lines))
+            storm_years.append(int(line.split("\t")[2]))
         else:
-            k = k + 1
-            vars_dict["longmc"][k - 1, index - 1] = float(line_split[2])
-            vars_dict["latmc"][k - 1, index - 1] = float(line_split[3])
-            # Convert wind speed from units m/s to knot by multiplying 1.94
-            vars_dict["vsmc"][k - 1, index - 1] = float(line_split[5]) * 1.94
-            vars_dict["yearmc"][k - 1, index - 1] = float(line_split[6])
-            vars_dict["monthmc"][k - 1, index - 1] = float(line_split[7])
-
-    vars_dict["year_start"] = year_start
-    vars_dict["year_end"] = year_end
-    vars_dict["num_years"] = year_end - year_start + 1
+            point_lines.append(line)
+    storm_start.append(len(point_lines))
+
+    if point_lines:
+        points = np.loadtxt(
+            point_lines, delimiter="\t", usecols=cols, ndmin=2, dtype=np.float64
+        )
+    else:
+        points = np.empty((0, len(cols)))
+
+    tracks: Dict[str, Any] = {k: points[:, i] for i, k in enumerate(keys)}
+    # Convert wind speed from units m/s to knot by multiplying 1.94
+    tracks["vsmc"] = tracks["vsmc"] * 1.94
+    tracks["storm_start"] = np.array(storm_start, dtype=int)
+
+    year_start = int(lines[0].split("\t")[2])
+    tracks["year_start"] = year_start
+    tracks["year_end"] = max(storm_years[-1], year_start)
+    tracks["num_years"] = tracks["year_end"] - year_start + 1
     logger.info(
-        f"TE Start Year: {vars_dict['year_start']}, TE End Year: {vars_dict['year_end']}, Total Years: {vars_dict['num_years']}"
+        f"TE Start Year: {tracks['year_start']}, TE End Year: {tracks['year_end']}, Total Years: {tracks['num_years']}"
     )
 
-    return vars_dict
+    return tracks
+
+
+def _nearest_index(coords: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Finds the index of the nearest coordinate to each value.
+
+    Same as ``np.argmin(np.abs(coords - value))`` for each value, including
+    picking the first index on ties.
+
+    :param coords: Monotonic coordinates
+    :type coords: np.ndarray
+    :param values: Values to look up
+    :type values: np.ndarray
+    :return: Index of the nearest coordinate to each value
+    :rtype: np.ndarray
+    """
+    descending = coords[0] > coords[-1]
+    ascending_coords = coords[::-1] if descending else coords
+
+    i = np.clip(np.searchsorted(ascending_coords, values), 1, len(coords) - 1)
+    left_dist = values - ascending_coords[i - 1]
+    right_dist = ascending_coords[i] - values
+
+    if descending:
+        nearest = np.where(right_dist <= left_dist, i, i - 1)
+        return len(coords) - 1 - nearest
+
+    return np.where(left_dist <= right_dist, i - 1, i)
 
 
 def _derive_metrics_per_basin(
-    num_storms: int,
-    vars: Dict[str, Any],
+    tracks: Dict[str, Any],
     ocnfrac: cdms2.dataset.DatasetVariable,
-    basin_info: BasinInfo,
-) -> Dict[str, Any]:
-    """Derives metrics for each basin using TE stitch variables and other information.
-
-    :param num_storms: Number of storms
-    :type num_storms: int
-    :param vars: TE stitch variables
-    :type vars: Dict[str, Any]
+) -> Dict[str, Dict[str, Any]]:
+    """Derives metrics for each basin using TE stitch tracks and other information.
+
+    A storm belongs to a basin if its first point is in it, and is over the
+    ocean if the nearest point of the land-sea mask to its first point is.
+
+    :param tracks: TE stitch tracks
+    :type tracks: Dict[str, Any]
     :param ocnfrac: Ocnfrac CDMS2 dataset variable
     :type ocnfrac: cdms2.dataset.DatasetVariable
-    :param basin_info: Basin information
-    :type basin_info: BasinInfo
-    :return: A dictionary containing mod variables
-    :rtype: Dist[str, Any]
-
-    # TODO: Add tests to cover this function
-    # TODO: Refactor this function to avoid using mod vars and dict separately
+    :return: A dictionary containing mod variables for each basin
+    :rtype: Dict[str, Dict[str, Any]]
     """
-    mod_mon = []
-    mod_wnd = []
-    mod_num = 0
-    mod_num_ocn = 0
-
-    years = np.asarray(np.arange(vars["year_start"], vars["year_end"] + 1))
-    mod_ace = np.zeros((np.size(years)))
-
-    latmc = vars["latmc"]
-    longmc = vars["longmc"]
-    vsmc = vars["vsmc"]
-    monthmc = vars["monthmc"]
-    yearmc = vars["yearmc"]
-
-    for k in range(0, num_storms):
-        if (
-            latmc[0, k] > basin_info[3]
-            and latmc[0, k] < basin_info[4]
-            and longmc[0, k] > basin_info[1]
-            and longmc[0, k] < basin_info[2]
-        ):
-            mod_num = mod_num + 1
-
-        lat = latmc[:, k][~np.isnan(latmc[:, k])]
-        lon = longmc[:, k][~np.isnan(latmc[:, k])]
-        wind = vsmc[:, k][~np.isnan(latmc[:, k])]
-        mon = monthmc[:, k][~np.isnan(latmc[:, k])]
-        yer = yearmc[:, k][~np.isnan(latmc[:, k])]
-
-        # Get the nearest location on land-sea mask to the first point of a TC Track
-        p = np.abs(ocnfrac.getLatitude()[:] - lat[0])
-        loc_y = int(np.argmin(p))
-        p = np.abs(ocnfrac.getLongitude()[:] - lon[0])
-        loc_x = int(np.argmin(p))
-        ocn_frac_0 = ocnfrac[loc_y, loc_x]
-
-        if (
-            ocn_frac_0 > 0
-            and lon[0] > basin_info[1]
-            and lon[0] < basin_info[2]
-            and lat[0] > basin_info[3]
-            and lat[0] < basin_info[4]
-        ):
-
-            mod_num_ocn = mod_num_ocn + 1
-            mod_mon.append(mon[0])
-            mod_wnd.append(np.max(wind))
-
-            wind_new = wind[wind > 35]
-            mod_ace[np.where(years - yer[0] == 0)] = (
-                mod_ace[np.where(years - yer[0] == 0)] + np.sum(wind_new**2) / 1e4
-            )
-
-    mod_vars = {
-        "mod_mon": mod_mon,
-        "mod_wnd": mod_wnd,
-        "mod_num": mod_num,
-        "mod_num_ocn": mod_num_ocn,
-        "mod_ace_mean": np.mean(mod_ace),
-    }
-    return mod_vars
+    storm_start = tracks["storm_start"]
+    # Storms without any points don't have a location.
+    storm_start = storm_start[np.append(np.diff(storm_start) > 0, True)]
+    first = storm_start[:-1]
+
+    lat = tracks["latmc"][first]
+    lon = tracks["longmc"][first]
+    mon = tracks["monthmc"][first]
+    yer = tracks["yearmc"][first]
+
+    # The max wind and the ace of each storm.
+    vsmc = tracks["vsmc"]
+    if first.size:
+        max_wind = np.maximum.reduceat(vsmc, first)
+        ace = np.add.reduceat(np.where(vsmc > 35, vsmc**2, 0), first) / 1e4
+    else:
+        max_wind = ace = np.empty(0)
+
+    # Get the nearest location on land-sea mask to the first point of a TC Track
+    loc_y = _nearest_index(np.asarray(ocnfrac.getLatitude()[:]), lat)
+    loc_x = _nearest_index(np.asarray(ocnfrac.getLongitude()[:]), lon)
+    ocn_frac_0 = np.ma.filled(ocnfrac[:], 0)[loc_y, loc_x]
+
+    # The (E bound, W bound, S bound, N bound) of each basin.
+    bounds = np.array([basin_info[1:5] for basin_info in BASIN_DICT.values()])
+    in_basin = (
+        (lat > bounds[:, 2:3])
+        & (lat < bounds[:, 3:4])
+        & (lon > bounds[:, 0:1])
+        & (lon < bounds[:, 1:2])
+    )
+    over_ocean = in_basin & (ocn_frac_0 > 0)
+
+    # Accumulate the ace of the storms over the ocean of all of the basins
+    # per (basin, year of the first point).
+    num_basins = len(BASIN_DICT)
+    num_years = tracks["year_end"] - tracks["year_start"] + 1
+    year_index = yer - tracks["year_start"]
+    in_years = (year_index >= 0) & (year_index < num_years)
+    basin_index, storm_index = np.nonzero(over_ocean & in_years)
+    mod_ace = np.bincount(
+        basin_index * num_years + year_index[storm_index].astype(int),
+        weights=ace[storm_index],
+        minlength=num_basins * num_years,
+    ).reshape(num_basins, num_years)
+
+    metrics_per_basin = {}
+    for i, basin in enumerate(BASIN_DICT):
+        metrics_per_basin[basin] = {
+            "mod_mon": mon[over_ocean[i]],
+            "mod_wnd": max_wind[over_ocean[i]],
+            "mod_num": int(in_basin[i].sum()),
+            "mod_num_ocn": int(over_ocean[i].sum()),
+            "mod_ace_mean": np.mean(mod_ace[i]),
+        }
+
+    return metrics_per_basin
 
 
 def generate_tc_metrics_from_obs_files(reference_data_path: str) -> Dict[str, Any]:
     """Generates tropical cyclone metrics from observation files.
 
+    The metrics of each basin are cached in the ``cache_dir`` of
+    ``disk_cache``, if it's set, so they're only computed once for each
+    IBTrACS file.
+
     :param reference_data_path: Reference data path
     :type reference_data_path: str
     :return: TC Metrics
@@ -380,23 +376,14 @@ def generate_tc_metrics_from_obs_files(reference_data_path: str) -> Dict[str, An
     result_obs["num_years"] = OBS_YEARS.size
 
     for basin, basin_info in BASIN_DICT.items():
-        nc = netcdffile(
-            os.path.join(reference_data_path, "IBTrACS.{}.v04r00.nc".format(basin))
+        obs_file = os.path.join(
+            reference_data_path, "IBTrACS.{}.v04r00.nc".format(basin)
         )
-
-        # Extract and parse variables from .nc file
-        vsmc = np.squeeze(nc["wmo_wind"][:, :])
-        time = np.squeeze(nc["time"][:, :])
-        monthmc, yearic = _get_monthmc_yearic(time)
-        num_rows = time.shape[0]
-
-        # Calculate mean ace
-        mean_ace = _calc_mean_ace(vsmc, yearic, num_rows)
-
-        # Calculate TS intensity distribution and seasonal cycle
-        mon, wnd = _get_mon_wind(vsmc, monthmc, yearic, num_rows)
-        tc_intensity_dist = _calc_ts_intensity_dist(wnd)
-        pdf_obs_seasonal_cycle = _calc_seasonal_cycle(mon)
+        metrics = _load_obs_metrics(obs_file)
+        if metrics is None:
+            metrics = _calc_obs_metrics(obs_file)
+            _save_obs_metrics(obs_file, metrics)
+        mean_ace, tc_intensity_dist, pdf_obs_seasonal_cycle = metrics
 
         # Number of hurricanes and storms over the ocean (placeholder of 1)
         num_hurricanes_per_yr = basin_info[5]
@@ -414,6 +401,108 @@ def generate_tc_metrics_from_obs_files(reference_data_path: str) -> Dict[str, An
     return result_obs
 
 
+def _calc_obs_metrics(obs_file: str) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Calculates the metrics of the storms in an IBTrACS file.
+
+    :param obs_file: IBTrACS file path
+    :type obs_file: str
+    :return: Mean ace, TC intensity distribution and seasonal cycle
+    :rtype: Tuple[float, np.ndarray, np.ndarray]
+    """
+    nc = netcdffile(obs_file)
+
+    # Extract and parse variables from .nc file
+    vsmc = np.squeeze(nc["wmo_wind"][:, :])
+    time = np.squeeze(nc["time"][:, :])
+    monthmc, yearic = _get_monthmc_yearic(time)
+    num_rows = time.shape[0]
+
+    # Calculate mean ace
+    mean_ace = _calc_mean_ace(vsmc, yearic, num_rows)
+
+    # Calculate TS intensity distribution and seasonal cycle
+    mon, wnd = _get_mon_wind(vsmc, monthmc, yearic, num_rows)
+    tc_intensity_dist = _calc_ts_intensity_dist(wnd)
+    pdf_obs_seasonal_cycle = _calc_seasonal_cycle(mon)
+
+    return mean_ace, tc_intensity_dist, pdf_obs_seasonal_cycle
+
+
+def _get_obs_cache_file(obs_file: str) -> Optional[str]:
+    """Gets the path of the cached metrics of an IBTrACS file.
+
+    The cached metrics are named after the checksum of the contents of the
+    file, so they're recomputed whenever it changes.
+
+    :param obs_file: IBTrACS file path
+    :type obs_file: str
+    :return: Path of the cached metrics, or None if there's no disk cache
+    :rtype: Optional[str]
+    """
+    if disk_cache.cache_dir is None:
+        return None
+
+    checksum = disk_cache.get_checksum(obs_file)
+    return disk_cache.get_checksum_path("tc_obs_metrics", checksum, ".json")
+
+
+def _load_obs_metrics(
+    obs_file: str,
+) -> Optional[Tuple[float, np.ndarray, np.ndarray]]:
+    """Loads the cached metrics of an IBTrACS file.
+
+    :param obs_file: IBTrACS file path
+    :type obs_file: str
+    :return: Mean ace, TC intensity distribution and seasonal cycle, or None
+        if they aren't cached
+    :rtype: Optional[Tuple[float, np.ndarray, np.ndarray]]
+    """
+    try:
+        cache_file = _get_obs_cache_file(obs_file)
+        if cache_file is None:
+            return None
+        with open(cache_file) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get("version") != OBS_CACHE_VERSION:
+        return None
+
+    return (
+        cached["mean_ace"],
+        np.array(cached["tc_intensity_dist"]),
+        np.array(cached["seasonal_cycle"]),
+    )
+
+
+def _save_obs_metrics(obs_file: str, metrics: Tuple[float, np.ndarray, np.ndarray]):
+    """Saves the metrics of an IBTrACS file in the disk cache, if there's one.
+
+    :param obs_file: IBTrACS file path
+    :type obs_file: str
+    :param metrics: Mean ace, TC intensity distribution and seasonal cycle
+    :type metrics: Tuple[float, np.ndarray, np.ndarray]
+    """
+    cache_file = _get_obs_cache_file(obs_file)
+    if cache_file is None:
+        return
+
+    mean_ace, tc_intensity_dist, seasonal_cycle = metrics
+    cached = {
+        "version": OBS_CACHE_VERSION,
+        "mean_ace": float(mean_ace),
+        "tc_intensity_dist": tc_intensity_dist.tolist(),
+        "seasonal_cycle": seasonal_cycle.tolist(),
+    }
+
+    def write(path):
+        with open(path, "w") as f:
+            json.dump(cached, f)
+
+    disk_cache.save(cache_file, write)
+
+
 def _get_monthmc_yearic(time: "MaskedArray") -> Tuple[np.ndarray, np.ndarray]:
     """Extracts the monthmc and yearic by parsing the time variable.
 
@@ -427,15 +516,22 @@ def _get_monthmc_yearic(time: "MaskedArray") -> Tuple[np.ndarray, np.ndarray]:
     monthmc = np.zeros(time.shape)
     yearic = np.zeros(time.shape[0])
 
-    # The units attribute of the time variable
-    days_since = datetime(1858, 11, 17, 0, 0, 0)
+    # The units attribute of the time variable, the days are converted to
+    # microseconds like timedelta does.
+    days_since = np.datetime64("1858-11-17T00:00:00", "us")
+    valid = ~np.ma.getmaskarray(time)
+    microseconds = np.round(np.ma.getdata(time)[valid] * 86400e6).astype(np.int64)
+    day_hurr = days_since + microseconds.astype("timedelta64[us]")
+
+    months = day_hurr.astype("datetime64[M]").astype(np.int64)
+    monthmc[valid] = months % 12 + 1
+    years = np.zeros(time.shape)
+    years[valid] = months // 12 + 1970
 
-    for i in range(0, time.shape[0]):
-        for j in range(0, time.shape[1]):
-            if time[i, j] is not np.ma.masked:
-                day_hurr = days_since + timedelta(time[i, j])
-                monthmc[i, j] = day_hurr.month
-                yearic[i] = day_hurr.year
+    # The year of each storm is the year of its last valid time.
+    rows = np.nonzero(valid.any(axis=1))[0]
+    last = time.shape[1] - 1 - np.argmax(valid[rows, ::-1], axis=1)
+    yearic[rows] = years[rows, last]
 
     return monthmc, yearic
 
@@ -459,13 +555,11 @@ def _get_mon_wind(
     :return: Array of months and max wind speeds
     :rtype: Tuple[List[int], List[int]]
     """
-    mon = []
-    wnd = []
-
-    for i in range(0, num_rows):
-        if OBS_START_YR <= yearic[i] <= OBS_END_YR:
-            mon.append(monthmc[i, 0])
-            wnd.append(np.max(vsmc[i, :]))
+    in_obs_years = (OBS_START_YR <= yearic[:num_rows]) & (
+        yearic[:num_rows] <= OBS_END_YR
+    )
+    mon = list(monthmc[:num_rows][in_obs_years, 0])
+    wnd = list(vsmc[:num_rows][in_obs_years].max(axis=1))
 
     return mon, wnd
 
@@ -483,16 +577,20 @@ def _calc_mean_ace(vsmc: "MaskedArray", yearic: np.ndarray, num_rows: int) -> fl
     :rtype: float
     """
     num_years = OBS_YEARS.size
-    ace = np.zeros(num_years)
 
-    for i in range(0, num_years):
-        for j in range(0, num_rows):
-            if yearic[j] == OBS_YEARS[i]:
-                wind = vsmc[j, :]
-                wind_ts = wind[wind >= 35]
-                ace[i] = ace[i] + np.sum(wind_ts**2) / 1e4
+    # The ace of each storm, from its valid tropical storm wind speeds.
+    wind = np.ma.filled(vsmc[:num_rows], 0).astype(np.float64)
+    storm_ace = np.where(wind >= 35, wind**2, 0).sum(axis=1) / 1e4
 
-    return np.mean(ace)
+    year_index = yearic[:num_rows] - OBS_START_YR
+    in_obs_years = (year_index >= 0) & (year_index < num_years)
+    ace = np.bincount(
+        year_index[in_obs_years].astype(int),
+        weights=storm_ace[in_obs_years],
+        minlength=num_years,
+    )
+
+    return float(np.mean(ace))
 
 
 def _calc_ts_intensity_dist(wind_speeds: List[int]) -> np.ndarray:
@@ -503,24 +601,16 @@ def _calc_ts_intensity_dist(wind_speeds: List[int]) -> np.ndarray:
     :return: Number of storms in each hurricane category (tc intensity distribution)
     :rtype: np.ndarray
     """
-    num_categories = 6
-    dist = np.zeros(num_categories)
-
-    for speed in wind_speeds:
-        if speed <= 34:
-            continue
-        elif speed > 34 and speed <= 63:
-            dist[0] = dist[0] + 1
-        elif speed > 63 and speed <= 82:
-            dist[1] = dist[1] + 1
-        elif speed > 82 and speed <= 95:
-            dist[2] = dist[2] + 1
-        elif speed > 95 and speed <= 112:
-            dist[3] = dist[3] + 1
-        elif speed > 113 and speed <= 136:
-            dist[4] = dist[4] + 1
-        elif speed > 136:
-            dist[5] = dist[5] + 1
+    speeds = np.ma.compressed(
+        np.ma.masked_invalid(np.ma.array(wind_speeds, dtype=np.float64))
+    )
+
+    # The upper bounds of the categories, speeds in (112, 113] aren't in any.
+    upper_bounds = [34, 63, 82, 95, 112, 113, 136]
+    counts = np.bincount(
+        np.digitize(speeds, upper_bounds, right=True), minlength=len(upper_bounds) + 1
+    )
+    dist = counts[[1, 2, 3, 4, 6, 7]].astype(np.float64)
 
     return dist
 
@@ -533,9 +623,8 @@ def _calc_seasonal_cycle(mon: List[int]) -> np.ndarray:
     :return: Seasonal cycle
     :rtype: np.ndarray
     """
-    seasonal_cycle = np.zeros(12)
-    for i in range(0, len(mon)):
-        k = int(mon[i])
-        seasonal_cycle[k - 1] = seasonal_cycle[k - 1] + 1
+    months = np.asarray(mon).astype(int)
+    # Months of 0 are counted as December, like a negative index.
+    seasonal_cycle = np.bincount((months - 1) % 12, minlength=12).astype(np.float64)
 
     return seasonal_cycle / np.sum(seasonal_cycle)
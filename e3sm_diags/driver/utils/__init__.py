@@ -1 +1,12 @@
-from . import dataset, diurnal_cycle, general
+from . import (
+    calendar_time,
+    catalog,
+    dataset,
+    disk_cache,
+    diurnal_cycle,
+    general,
+    mask,
+    regrid,
+    variable_cache,
+    vertical,
+)
@@ -0,0 +1,136 @@
+"""
+Decoding of time axes into arrays of years, months, days and hours.
+
+``getTime().asComponentTime()`` creates a ``cdtime`` object per time step,
+which is slow for subdaily timeseries of many years, when only the month or
+the hour of each time step is needed. Here the values of the time axis are
+converted with integer arithmetic on whole arrays, for relative units
+("days since 1850-01-01", ...) in the noleap, 360_day and gregorian
+calendars. The other calendars and units are converted with
+``asComponentTime()``.
+"""
+import collections
+import re
+
+import numpy as np
+
+# The components of the time steps, an array of each.
+DecodedTime = collections.namedtuple(
+    "DecodedTime", ["year", "month", "day", "hour", "minute", "second"]
+)
+
+# The calendars decoded here, by their name in the calendar attribute.
+CALENDARS = {
+    "noleap": "noleap",
+    "365_day": "noleap",
+    "all_leap": "all_leap",
+    "366_day": "all_leap",
+    "360_day": "360_day",
+    "gregorian": "gregorian",
+    "standard": "gregorian",
+    "proleptic_gregorian": "proleptic_gregorian",
+}
+
+# The number of milliseconds in each unit of relative time.
+UNITS_MS = {
+    "second": 1000,
+    "minute": 60 * 1000,
+    "hour": 3600 * 1000,
+    "day": 86400 * 1000,
+}
+
+DAY_MS = UNITS_MS["day"]
+
+_UNITS_RE = re.compile(
+    r"^\s*(\w+?)s?\s+since\s+(-?\d+)-(\d+)-(\d+)"
+    r"(?:[\sT]+(\d+):(\d+)(?::(\d+(?:\.\d*)?))?)?"
+)
+
+# The first days of the months, in the noleap and all_leap calendars.
+_MONTH_STARTS = {
+    "noleap": np.cumsum([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]),
+    "all_leap": np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]),
+}
+
+
+def decode_time(time_axis):
+    """
+    Return the DecodedTime of the values of the cdms2 time axis time_axis,
+    like its ``asComponentTime()``.
+    """
+    values = np.asarray(time_axis[:], dtype=np.float64)
+    calendar = CALENDARS.get(getattr(time_axis, "calendar", "gregorian").lower())
+    match = _UNITS_RE.match(getattr(time_axis, "units", ""))
+    if calendar is None or match is None or match.group(1) not in UNITS_MS:
+        return _decode_component_time(time_axis)
+
+    unit, year, month, day, hour, minute, second = match.groups()
+    origin = (int(year), int(month), int(day))
+    origin_seconds = int(hour or 0) * 3600 + int(minute or 0) * 60
+    origin_ms = int(round((origin_seconds + float(second or 0)) * 1000))
+    # Rounded to milliseconds, so a time step of 1/24 day is exactly an hour.
+    ms = np.round(values * UNITS_MS[unit]).astype(np.int64) + origin_ms
+
+    days, ms_of_day = np.divmod(ms, DAY_MS)
+    years: np.ndarray
+    months: np.ndarray
+    month_days: np.ndarray
+    if calendar == "360_day":
+        days = days + (origin[0] * 12 + origin[1] - 1) * 30 + origin[2] - 1
+        years, day_of_year = np.divmod(days, 360)
+        months = day_of_year // 30 + 1
+        month_days = day_of_year % 30 + 1
+    elif calendar in _MONTH_STARTS:
+        starts = _MONTH_STARTS[calendar]
+        days = days + origin[0] * starts[-1] + starts[origin[1] - 1] + origin[2] - 1
+        years, day_of_year = np.divmod(days, starts[-1])
+        months = np.searchsorted(starts, day_of_year, side="right")
+        month_days = day_of_year - starts[months - 1] + 1
+    else:
+        # The mixed Julian/Gregorian calendar is only the Gregorian calendar
+        # from 1582-10-15, the days since an earlier origin go through the
+        # Julian calendar.
+        if origin[0] < 1 or (calendar == "gregorian" and origin < (1582, 10, 15)):
+            return _decode_component_time(time_axis)
+        origin_date = np.datetime64("{:04d}-{:02d}-{:02d}".format(*origin), "D")
+        dates = origin_date + days.astype("timedelta64[D]")
+        if calendar == "gregorian" and (dates < np.datetime64("1582-10-15")).any():
+            return _decode_component_time(time_axis)
+        years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+        months = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+        month_days = (dates - dates.astype("datetime64[M]")).astype(np.int64) + 1
+
+    hours, ms_of_hour = np.divmod(ms_of_day, UNITS_MS["hour"])
+    minutes, ms_of_minute = np.divmod(ms_of_hour, UNITS_MS["minute"])
+
+    return DecodedTime(
+        years.astype(int),
+        months.astype(int),
+        month_days.astype(int),
+        hours.astype(int),
+        minutes.astype(int),
+        ms_of_minute / 1000.0,
+    )
+
+
+def format_time(decoded, i):
+    """The time step i of decoded, formatted like a cdtime component time."""
+    return "{}-{}-{} {}:{}:{}".format(
+        decoded.year[i],
+        decoded.month[i],
+        decoded.day[i],
+        decoded.hour[i],
+        decoded.minute[i],
+        float(decoded.second[i]),
+    )
+
+
+def _decode_component_time(time_axis):
+    """The DecodedTime of time_axis, with ``asComponentTime()``."""
+    times = time_axis.asComponentTime()
+    return DecodedTime(
+        *(
+            np.array([getattr(t, c) for t in times], dtype=dtype)
+            for c, dtype in zip(DecodedTime._fields, (int,) * 5 + (float,))
+        )
+    )
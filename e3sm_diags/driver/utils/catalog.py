@@ -0,0 +1,156 @@
+"""
+A catalog of the climo and timeseries files in a data path.
+
+Each data path is listed once and indexed by the naming conventions
+``Dataset`` uses to look up files, so finding the file for a variable or a
+season doesn't glob and regex-scan the directory on every call. The catalog
+is kept in memory for the whole process and saved as JSON in the
+``cache_dir`` of ``disk_cache`` when it's set, so later runs don't have to
+rebuild it. Nothing is written into the data path.
+A catalog is rebuilt whenever the modification time of its directory
+changes, i.e. when files are added, removed or renamed.
+"""
+import json
+import os
+from typing import Dict, List, Optional
+
+from . import disk_cache
+
+CATALOG_VERSION = 1
+
+# Everything between '{var}_' and '.{ext}' in a timeseries file is
+# always 13 characters, ex: PRECT_198001_201412.nc.
+TS_DATE_LEN = 13
+
+# The catalogs of this process, keyed by the absolute data path.
+_catalogs: Dict[str, "FileCatalog"] = {}
+
+
+def get_catalog(path: str) -> "FileCatalog":
+    """Returns the catalog for path, rebuilding it if it's out of date."""
+    path = os.path.abspath(path)
+    catalog = _catalogs.get(path)
+
+    if catalog is None or catalog.is_stale():
+        catalog = FileCatalog(path)
+        _catalogs[path] = catalog
+
+    return catalog
+
+
+def _get_mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class FileCatalog:
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = _get_mtime(path)
+        # All of the entries in path, sorted.
+        self.files: List[str] = []
+        # The extension of the first file matched by '*.*', which is the only
+        # format timeseries files are looked up with.
+        self.file_fmt = ""
+        # {var}_{13 characters}.{file_fmt} files, keyed by {var}.
+        self.timeseries: Dict[str, List[str]] = {}
+
+        if self.mtime is None:
+            return
+
+        if not self._load():
+            self._build()
+            self._save()
+
+    def is_stale(self) -> bool:
+        return _get_mtime(self.path) != self.mtime
+
+    def find_timeseries(self, key: str) -> List[str]:
+        """
+        Return the paths of the timeseries files for key, which is the
+        part of the file name before the dates, usually the variable.
+        """
+        return [os.path.join(self.path, f) for f in self.timeseries.get(key, [])]
+
+    def find_climo(self, data_name: str, season: str) -> str:
+        """
+        Locate climatology file name based on data_name and season.
+        """
+        for filename in self.files:
+            if filename.startswith(data_name + "_" + season):
+                return os.path.join(self.path, filename)
+        # The below is only ran on model data, because a shorter name is passed into this software. Won't work when use month name such as '01' as season.
+        if season in ["ANN", "DJF", "MAM", "JJA", "SON"]:
+            for filename in self.files:
+                if filename.startswith(data_name) and season in filename:
+                    return os.path.join(self.path, filename)
+        # No file found.
+        return ""
+
+    def _build(self):
+        self.files = sorted(os.listdir(self.path))
+
+        # Both .nc and .xml files are supported, the format is the one
+        # of the first file that would be matched by glob('*.*').
+        globbed = [f for f in self.files if not f.startswith(".") and "." in f]
+        if globbed:
+            self.file_fmt = globbed[0].split(".")[-1]
+
+        self.timeseries = {}
+        suffix_len = TS_DATE_LEN + len(self.file_fmt) + 1
+        for filename in globbed:
+            if not filename.endswith("." + self.file_fmt):
+                continue
+
+            stem = filename[: -len(self.file_fmt) - 1]
+            if len(stem) <= TS_DATE_LEN + 1 or stem[-TS_DATE_LEN - 1] != "_":
+                continue
+
+            key = filename[: -suffix_len - 1]
+            self.timeseries.setdefault(key, []).append(filename)
+
+    def _load(self) -> bool:
+        """Load the saved catalog, return False if it's missing or outdated."""
+        fnm = disk_cache.get_path("catalogs", self.path, ".json")
+        if fnm is None:
+            return False
+        try:
+            with open(fnm) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if (
+            saved.get("version") != CATALOG_VERSION
+            or saved.get("path") != self.path
+            or saved.get("mtime") != self.mtime
+        ):
+            return False
+
+        self.files = saved["files"]
+        self.file_fmt = saved["file_fmt"]
+        self.timeseries = saved["timeseries"]
+        return True
+
+    def _save(self):
+        """Save the catalog in the disk cache, if there's one."""
+        fnm = disk_cache.get_path("catalogs", self.path, ".json")
+        if fnm is None:
+            return
+
+        saved = {
+            "version": CATALOG_VERSION,
+            "path": self.path,
+            "mtime": self.mtime,
+            "files": self.files,
+            "file_fmt": self.file_fmt,
+            "timeseries": self.timeseries,
+        }
+
+        def write(path):
+            with open(path, "w") as f:
+                json.dump(saved, f)
+
+        disk_cache.save(fnm, write)
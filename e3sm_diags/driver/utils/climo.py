@@ -2,103 +2,223 @@ import cdms2
 import numpy as np
 import numpy.ma as ma
 
+from . import calendar_time
+
+# The months (1 if included) averaged for each season.
+SEASON_IDX = {
+    "01": [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+    "02": [0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+    "03": [0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+    "04": [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0],
+    "05": [0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0],
+    "06": [0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0],
+    "07": [0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+    "08": [0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0],
+    "09": [0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0],
+    "10": [0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
+    "11": [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0],
+    "12": [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+    "DJF": [1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+    "MAM": [0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0],
+    "JJA": [0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0],
+    "SON": [0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 0],
+    "ANN": [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+}
+
+# Seasons that are made of the climatologies of several other seasons.
+CYCLES = {
+    "ANNUALCYCLE": [
+        "01",
+        "02",
+        "03",
+        "04",
+        "05",
+        "06",
+        "07",
+        "08",
+        "09",
+        "10",
+        "11",
+        "12",
+    ],
+    "SEASONALCYCLE": ["DJF", "MAM", "JJA", "SON"],
+}
+
+# The size of the float64 temporaries of the weighted sums of each block of
+# grid points, so they don't grow with the time chunks.
+BLOCK_BYTES = 64 * 1024**2
+
+
+def get_num_sum_bytes(seasons, num_points):
+    """
+    Return the size of the sums a ClimoBundle of the seasons keeps for
+    num_points grid points, until its climatologies are computed.
+    """
+    return (
+        2 * len(_expand_seasons(seasons)) * num_points * np.dtype(np.float64).itemsize
+    )
+
+
+def _expand_seasons(seasons):
+    """
+    Return the seasons, with the cycles replaced by the seasons they're made
+    of, without duplicates.
+    """
+    expanded = []
+    for season in seasons:
+        for s in CYCLES.get(season, [season]):
+            if s not in expanded:
+                expanded.append(s)
+    return expanded
+
 
 def climo(var, season):
     """
     Compute the climatology for var for the given season.
     The returned variable must be 2 dimensional.
     """
-    season_idx = {
-        "01": [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        "02": [0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        "03": [0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        "04": [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0],
-        "05": [0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0],
-        "06": [0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0],
-        "07": [0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-        "08": [0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0],
-        "09": [0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0],
-        "10": [0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
-        "11": [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0],
-        "12": [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        "DJF": [1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-        "MAM": [0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0],
-        "JJA": [0, 0, 0, 0, 0, 1, 1, 1, 0, 0, 0, 0],
-        "SON": [0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 0],
-        "ANN": [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-    }
-
-    # Redefine time to be in the middle of the time interval
-    var_time = var.getTime()
-    if var_time is None:
-        # Climo cannot be ran on this variable.
-        return var
-
-    tbounds = var_time.getBounds()
-    var_time[:] = 0.5 * (tbounds[:, 0] + tbounds[:, 1])
-    var_time_absolute = var_time.asComponentTime()
-
-    # Compute time length
-    dt = tbounds[:, 1] - tbounds[:, 0]
-
-    # Convert to masked array
-    v = var.asma()
-
-    # Compute climatology
-    if season == "ANNUALCYCLE":
-        cycle = [
-            "01",
-            "02",
-            "03",
-            "04",
-            "05",
-            "06",
-            "07",
-            "08",
-            "09",
-            "10",
-            "11",
-            "12",
-        ]
-    elif season == "SEASONALCYCLE":
-        cycle = ["DJF", "MAM", "JJA", "SON"]
-    else:
-        cycle = [season]
-
-    ncycle = len(cycle)
-    climo = ma.zeros([ncycle] + list(np.shape(v))[1:])
-    for n in range(ncycle):
-        idx = np.array(
-            [
-                season_idx[cycle[n]][var_time_absolute[i].month - 1]
-                for i in range(len(var_time_absolute))
-            ],
-            dtype=np.int,
-        ).nonzero()
-        climo[n] = ma.average(v[idx], axis=0, weights=dt[idx])
-
-    trans_var = cdms2.createVariable(climo)(squeeze=1)
-    # Losing the grid after a squeeze is normal, we need to set it again.
-    trans_var.setGrid(var.getGrid())
-    # Set the correct axis as well.
-    if var.getLongitude() and var.getLatitude():
-        trans_var.setAxis(0, var.getAxis(1))
-        trans_var.setAxis(1, var.getAxis(2))
-        if var.getLevel():
-            # If it's a 3D variable, set the last axis.
-            trans_var.setAxis(2, var.getAxis(3))
-
-    # Copy any missing attributes from var to trans_var.
-    # The below doesn't work, since MaskedArrays apparently
-    # can't be set as attributes from another object.
-    # for attr in dir(var):
-    #     if not attr.startswith('__'):
-    #         old_attr = getattr(var, attr)
-    #         setattr(trans_var, attr, old_attr)
-
-    trans_var.attributes = var.attributes
-    trans_var.units = var.units
-    trans_var.id = var.id
-    trans_var.long_name = var.long_name
-
-    return trans_var
+    return ClimoBundle(var, [season]).get(season)
+
+
+class ClimoBundle:
+    """
+    The climatologies of var for several seasons.
+
+    The months of the time axis are decoded once and the climatologies of all
+    of the seasons are computed together in a single weighted reduction over
+    the time axis, so the timeseries is only traversed once no matter how
+    many seasons are requested afterwards with get().
+
+    A long timeseries can also be passed in consecutive time chunks, with the
+    first one to the constructor and the others to add(). Only the weighted
+    sums for each season are accumulated, so the full timeseries is never
+    held in memory. The sums are computed for a block of grid points at a
+    time, so the only copies of a chunk are at most BLOCK_BYTES.
+
+    Only the climatologies and the metadata of var are kept, not the
+    timeseries itself.
+    """
+
+    def __init__(self, var, seasons):
+        # The climatology of each season, as a masked array without time.
+        self.climos = {}
+
+        if var.getTime() is None:
+            # Climo cannot be ran on this variable.
+            self.var = var
+            return
+
+        self.var = None
+        self.grid = var.getGrid()
+        self.axes = var.getAxisList()
+        self.is_lat_lon = bool(var.getLongitude() and var.getLatitude())
+        self.has_level = bool(var.getLevel())
+        self.attributes = var.attributes
+        self.units = var.units
+        self.id = var.id
+        self.long_name = var.long_name
+        self.shape = var.shape[1:]
+
+        self.seasons = _expand_seasons(seasons)
+        self.season_months = np.array([SEASON_IDX[s] for s in self.seasons])
+
+        # The sums of the weighted data and of the weights of each season,
+        # (season, space), see get_num_sum_bytes().
+        self.weighted_sum = np.zeros((len(self.seasons), int(np.prod(self.shape))))
+        self.sum_of_weights = np.zeros_like(self.weighted_sum)
+
+        self.add(var)
+
+    def add(self, var):
+        """
+        Add the next time chunk of the timeseries to the climatologies.
+        """
+        if self.var is not None:
+            return
+        if self.climos:
+            raise RuntimeError("Cannot add to climatologies that were already used.")
+
+        # Redefine time to be in the middle of the time interval
+        var_time = var.getTime()
+        tbounds = var_time.getBounds()
+        var_time[:] = 0.5 * (tbounds[:, 0] + tbounds[:, 1])
+        months = calendar_time.decode_time(var_time).month
+
+        # Compute time length
+        dt = tbounds[:, 1] - tbounds[:, 0]
+
+        # The weight of each time step for each season, the time length
+        # for the time steps in the season and 0 otherwise.
+        weights = self.season_months[:, months - 1] * dt[np.newaxis, :]
+
+        # Convert to masked array
+        v = var.asma()
+        data = ma.getdata(v).reshape(v.shape[0], -1)
+        mask = ma.getmaskarray(v).reshape(v.shape[0], -1)
+
+        # Equivalent to ma.average(v[idx], axis=0, weights=dt[idx]) for each
+        # season, the masked values are excluded from both sums.
+        block_size = max(BLOCK_BYTES // (weights.itemsize * data.shape[0]), 1)
+        for start in range(0, data.shape[1], block_size):
+            block = slice(start, start + block_size)
+            valid = ~mask[:, block]
+            self.weighted_sum[:, block] += np.dot(
+                weights, np.where(valid, data[:, block], 0)
+            )
+            self.sum_of_weights[:, block] += np.dot(weights, valid)
+
+    def _compute_climos(self):
+        no_data = self.sum_of_weights == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            climos = ma.masked_where(no_data, self.weighted_sum / self.sum_of_weights)
+
+        for i, s in enumerate(self.seasons):
+            self.climos[s] = climos[i].reshape(self.shape)
+
+        # The sums aren't needed anymore.
+        del self.weighted_sum, self.sum_of_weights
+
+    def has_season(self, season):
+        if self.var is not None:
+            return True
+
+        return all(s in self.seasons for s in CYCLES.get(season, [season]))
+
+    def get(self, season):
+        """
+        Return the climatology of the variable for the given season.
+        The returned variable must be 2 dimensional.
+        """
+        if self.var is not None:
+            return self.var
+        if not self.climos:
+            self._compute_climos()
+
+        cycle = CYCLES.get(season, [season])
+        climo = ma.stack([self.climos[s] for s in cycle])
+
+        trans_var = cdms2.createVariable(climo)(squeeze=1)
+        # Losing the grid after a squeeze is normal, we need to set it again.
+        trans_var.setGrid(self.grid)
+        # Set the correct axis as well.
+        if self.is_lat_lon:
+            trans_var.setAxis(0, self.axes[1])
+            trans_var.setAxis(1, self.axes[2])
+            if self.has_level:
+                # If it's a 3D variable, set the last axis.
+                trans_var.setAxis(2, self.axes[3])
+
+        # Copy any missing attributes from var to trans_var.
+        # The below doesn't work, since MaskedArrays apparently
+        # can't be set as attributes from another object.
+        # for attr in dir(var):
+        #     if not attr.startswith('__'):
+        #         old_attr = getattr(var, attr)
+        #         setattr(trans_var, attr, old_attr)
+
+        trans_var.attributes = self.attributes
+        trans_var.units = self.units
+        trans_var.id = self.id
+        trans_var.long_name = self.long_name
+
+        return trans_var
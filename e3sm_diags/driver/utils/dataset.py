@@ -4,16 +4,21 @@ This data can either be climatology files or timeseries files.
 Derived variables are also supported.
 """
 import collections
-import glob
+import concurrent.futures
 import os
-import re
+from typing import Any, Tuple
 
 import cdms2
+import netCDF4
+import numpy
 
 import e3sm_diags.derivations.acme
 from e3sm_diags.driver import utils
 
-from . import climo
+from . import catalog, climo, regrid, variable_cache
+
+# The number of climo files of an annual cycle read at the same time.
+CLIMO_READ_THREADS = 4
 
 
 class Dataset:
@@ -30,6 +35,11 @@ class Dataset:
         self.test = test
         self.derived_vars = derived_vars
         self.climo_fcn = climo_fcn
+        # The climatologies computed from timeseries files, so all of the
+        # seasons of a variable are computed from a single read. For each
+        # variable, the bundles of each read with the seasons they were
+        # computed for that weren't requested yet.
+        self._climo_bundles = {}
 
         if self.ref is False and self.test is False:
             msg = "Both ref and test cannot be False. One must be True."
@@ -116,6 +126,48 @@ class Dataset:
                 variable = utils.general.adjust_time_from_time_bounds(variable)
         return variables[0] if len(variables) == 1 else variables
 
+    def get_timeseries_points(self, var, lat_index, lon_index):
+        """
+        Get the timeseries of var at the (lat_index, lon_index) grid cells only,
+        as a (points, time) float32 array with the missing values as nan.
+        Only the grid cells of the points are read from the timeseries file,
+        instead of the whole grid, see _get_points_from_file().
+        """
+        if not self.is_timeseries():
+            msg = "You can only use this function with timeseries data."
+            raise RuntimeError(msg)
+
+        if self.ref:
+            data_path = self.parameters.reference_data_path
+        elif self.test:
+            data_path = self.parameters.test_data_path
+        else:
+            msg = "Error when determining what kind (ref or test)of variable to get."
+            raise RuntimeError(msg)
+
+        self.var = var
+        self.extra_vars = []
+        if var in self.derived_vars or self.get_map_file():
+            # Derived variables need the whole fields of the variables
+            # they're derived from, and native grid variables are remapped
+            # as a whole.
+            v = self.get_timeseries_variable(var)
+            values = numpy.ma.filled(v.astype(numpy.float32), numpy.nan)
+            return values[:, lat_index, lon_index].T
+
+        # Or if the timeseries file for the var exists, get that.
+        elif self._get_timeseries_file_path(var, data_path):
+            return self._get_var_from_timeseries_file(
+                var, data_path, points=(lat_index, lon_index)
+            )
+
+        # Otherwise, there's an error.
+        else:
+            msg = "Variable '{}' doesn't have a file in the".format(var)
+            msg += " directory {}, nor was".format(data_path)
+            msg += " it defined in the derived variables dictionary."
+            raise RuntimeError(msg)
+
     def get_climo_variable(self, var, season, extra_vars=[], *args, **kwargs):
         """
         For a given season, get the variable and any extra variables and run
@@ -130,6 +182,126 @@ class Dataset:
         if not season:
             raise RuntimeError("Season is invalid.")
 
+        # The variables are cached for the whole process, so the other sets
+        # don't read and derive them again.
+        key = self._get_variable_cache_key(season, args, kwargs)
+        variables = variable_cache.get(key)
+        if variables is None:
+            variables = self._get_climo_variables(season, *args, **kwargs)
+            variables = variable_cache.add(key, variables)
+
+        # Needed so we can do:
+        #   v1 = Dataset.get_variable('v1', season)
+        # and also:
+        #   v1, v2, v3 = Dataset.get_variable('v1', season, extra_vars=['v2', 'v3'])
+        return variables[0] if len(variables) == 1 else variables
+
+    def get_annual_cycle(self, var, *args, **kwargs):
+        """
+        Get the annual cycle of the variable, the climatologies of the 12
+        months as a (time, ...) variable with the months 1 to 12 as time.
+
+        From climo files, the files of the 12 months are read concurrently,
+        see _get_months_from_climo(). From timeseries files, the timeseries
+        is read once and the climatologies of the 12 months are computed in
+        a single pass, see _get_months_from_timeseries().
+        The months are copied into a preallocated array, which is only
+        made a variable once.
+        """
+        self.var = var
+        self.extra_vars = []
+        if not self.var:
+            raise RuntimeError("Variable is invalid.")
+
+        # Only the months that aren't in the variable cache are read.
+        months = climo.CYCLES["ANNUALCYCLE"]
+        keys = [self._get_variable_cache_key(m, args, kwargs) for m in months]
+        month_vars = {}
+        for month, key in zip(months, keys):
+            variables = variable_cache.get(key)
+            if variables is not None:
+                month_vars[month] = variables[0]
+
+        missing = [m for m in months if m not in month_vars]
+        if missing and self.is_climo():
+            new_vars = self._get_months_from_climo(missing, *args, **kwargs)
+        elif missing and self.climo_fcn is climo.climo:
+            new_vars = self._get_months_from_timeseries(missing, *args, **kwargs)
+        else:
+            new_vars = {
+                m: self._get_climo_variables(m, *args, **kwargs) for m in missing
+            }
+        for month, key in zip(months, keys):
+            if month in new_vars:
+                # The months are only read, so they aren't copied.
+                variable_cache.add(key, new_vars[month])
+                month_vars[month] = new_vars[month][0]
+
+        first_var = month_vars[months[0]]
+        data = numpy.ma.zeros((len(months),) + first_var.shape)
+        for index, month in enumerate(months):
+            data[index] = month_vars[month]
+
+        time = cdms2.createAxis(range(1, len(months) + 1))
+        time.id = "time"
+        time.designateTime()
+        axes = [time] + first_var.getAxisList()
+
+        var_ann_cycle = cdms2.createVariable(data, axes=axes, id=first_var.id)
+        var_ann_cycle.long_name = first_var.long_name
+        var_ann_cycle.units = first_var.units
+
+        return var_ann_cycle
+
+    def _get_months_from_climo(self, months, *args, **kwargs):
+        """
+        Get the variable (self.var) for each of the months from the climo
+        files, as a dict of the lists of variables of each month.
+
+        The file names are resolved first, then the files are read by
+        CLIMO_READ_THREADS threads, since each one is mostly waiting on
+        the disk.
+        """
+        if self.ref:
+            filenames = [self.get_ref_filename_climo(m) for m in months]
+        else:
+            filenames = [self.get_test_filename_climo(m) for m in months]
+
+        with concurrent.futures.ThreadPoolExecutor(CLIMO_READ_THREADS) as executor:
+            futures = [
+                executor.submit(self._get_climo_var, filename, *args, **kwargs)
+                for filename in filenames
+            ]
+            return {m: future.result() for m, future in zip(months, futures)}
+
+    def _get_months_from_timeseries(self, months, *args, **kwargs):
+        """
+        Get the variable (self.var) for each of the months from the timeseries
+        files, as a dict of the lists of variables of each month.
+
+        The climatologies of all of the months are computed in a single
+        ClimoBundle, so the timeseries is only read once.
+        """
+        if self.ref:
+            data_path = self.parameters.reference_data_path
+        else:
+            data_path = self.parameters.test_data_path
+
+        if getattr(self.parameters, "climo_chunk_mb", None):
+            bundles = self._get_climo_bundles_in_chunks(
+                data_path, months, *args, **kwargs
+            )
+        else:
+            timeseries_vars = self._get_timeseries_var(data_path, *args, **kwargs)
+            bundles = [climo.ClimoBundle(v, months) for v in timeseries_vars]
+
+        return {m: [b.get(m) for b in bundles] for m in months}
+
+    def _get_climo_variables(self, season, *args, **kwargs):
+        """
+        Get the variable (self.var) and any extra variables for the season,
+        as a list, without the variable cache.
+        """
         # We need to make two decisions:
         # 1) Are the files being used reference or test data?
         #    - This is done with self.ref and self.test.
@@ -138,16 +310,16 @@ class Dataset:
         if self.ref and self.is_timeseries():
             # Get the reference variable from timeseries files.
             data_path = self.parameters.reference_data_path
-            timeseries_vars = self._get_timeseries_var(data_path, *args, **kwargs)
-            # Run climo on the variables.
-            variables = [self.climo_fcn(v, season) for v in timeseries_vars]
+            variables = self._get_climo_from_timeseries(
+                data_path, season, *args, **kwargs
+            )
 
         elif self.test and self.is_timeseries():
             # Get the test variable from timeseries files.
             data_path = self.parameters.test_data_path
-            timeseries_vars = self._get_timeseries_var(data_path, *args, **kwargs)
-            # Run climo on the variables.
-            variables = [self.climo_fcn(v, season) for v in timeseries_vars]
+            variables = self._get_climo_from_timeseries(
+                data_path, season, *args, **kwargs
+            )
 
         elif self.ref:
             # Get the reference variable from climo files.
@@ -165,11 +337,188 @@ class Dataset:
             msg += "(climo or timeseries files)."
             raise RuntimeError(msg)
 
-        # Needed so we can do:
-        #   v1 = Dataset.get_variable('v1', season)
-        # and also:
-        #   v1, v2, v3 = Dataset.get_variable('v1', season, extra_vars=['v2', 'v3'])
-        return variables[0] if len(variables) == 1 else variables
+        return variables
+
+    def get_source_key(self, season):
+        """
+        Where the variables for the season are read from: the climo file, or
+        the timeseries data path and years (and the site for the ARM sets),
+        and the map file they're remapped with.
+        """
+        if self.is_timeseries():
+            if self.ref:
+                data_path = self.parameters.reference_data_path
+            else:
+                data_path = self.parameters.test_data_path
+            start_yr, end_yr, _ = self.get_start_and_end_years()
+            source: Tuple[Any, ...] = (
+                data_path,
+                getattr(self.parameters, "ref_name", ""),
+                start_yr,
+                end_yr,
+            )
+            if self.parameters.sets[0] in ["arm_diags"]:
+                # The timeseries of each ARM site are in different files.
+                source += (tuple(getattr(self.parameters, "regions", [])),)
+        elif self.ref:
+            source = (self.get_ref_filename_climo(season),)
+        elif self.test:
+            source = (self.get_test_filename_climo(season),)
+        else:
+            source = ()
+
+        if self.get_map_file():
+            source += (os.path.abspath(self.get_map_file()),)
+
+        return source
+
+    def _get_variable_cache_key(self, season, args, kwargs):
+        """
+        The key of the variables for the season in the variable cache, made of
+        where they're read from, the variables, the season and the derivation.
+        """
+        source = self.get_source_key(season)
+        derivation = tuple(
+            (v, tuple(self.derived_vars[v].items()))
+            for v in [self.var] + list(self.extra_vars)
+            if v in self.derived_vars
+        )
+
+        return (
+            source,
+            self.var,
+            tuple(self.extra_vars),
+            season,
+            args,
+            tuple(sorted(kwargs.items())),
+            derivation,
+            self.climo_fcn,
+        )
+
+    def _get_climo_from_timeseries(self, data_path, season, *args, **kwargs):
+        """
+        Get the variable (self.var) and any extra variables from the timeseries
+        files in data_path and run the climatology on them.
+
+        With the default climo function, the climatologies for all of the
+        seasons in the parameters are computed in a single pass the first time
+        the variables are requested, and reused for the other seasons. They're
+        dropped once all of these seasons were requested. A season that's not
+        in the parameters is computed on its own, with the rest of the annual
+        cycle if it's a month.
+        """
+        if self.climo_fcn is not climo.climo:
+            timeseries_vars = self._get_timeseries_var(data_path, *args, **kwargs)
+            # Run climo on the variables.
+            return [self.climo_fcn(v, season) for v in timeseries_vars]
+
+        key = (
+            data_path,
+            self.var,
+            tuple(self.extra_vars),
+            args,
+            tuple(sorted(kwargs.items())),
+        )
+        entries = self._climo_bundles.setdefault(key, [])
+        for bundles, pending in entries:
+            if all(b.has_season(season) for b in bundles):
+                break
+        else:
+            if entries:
+                # A season that's not in the parameters was requested, so
+                # only it is computed, the other seasons are still pending.
+                seasons = [season]
+            else:
+                seasons = [
+                    s
+                    for s in getattr(self.parameters, "seasons", [])
+                    if s in climo.SEASON_IDX or s in climo.CYCLES
+                ]
+                seasons.append(season)
+            if season in climo.CYCLES["ANNUALCYCLE"]:
+                # A month is most likely the first of an annual cycle,
+                # so the other months are computed in the same pass.
+                seasons.extend(climo.CYCLES["ANNUALCYCLE"])
+            if getattr(self.parameters, "climo_chunk_mb", None):
+                bundles = self._get_climo_bundles_in_chunks(
+                    data_path, seasons, *args, **kwargs
+                )
+            else:
+                timeseries_vars = self._get_timeseries_var(data_path, *args, **kwargs)
+                bundles = [climo.ClimoBundle(v, seasons) for v in timeseries_vars]
+            pending = set(seasons)
+            entries.append((bundles, pending))
+
+        variables = [b.get(season) for b in bundles]
+        # Only the climatologies of the variables still in use are kept.
+        pending.discard(season)
+        if not pending:
+            entries.remove((bundles, pending))
+        if not entries:
+            del self._climo_bundles[key]
+
+        return variables
+
+    def _get_climo_bundles_in_chunks(self, data_path, seasons, *args, **kwargs):
+        """
+        Compute the climatologies of the variables from the timeseries files in
+        data_path, reading them a few years at a time.
+
+        The number of years read at a time is set so that each variable read,
+        along with the sums of its climatologies, is at most
+        parameters.climo_chunk_mb megabytes.
+        """
+        start_yr, end_yr, _ = self.get_start_and_end_years()
+        start_yr, end_yr = int(start_yr), int(end_yr)
+        num_yrs_per_chunk = self._get_num_yrs_per_chunk(data_path, seasons)
+
+        bundles = None
+        for chunk_start_yr in range(start_yr, end_yr + 1, num_yrs_per_chunk):
+            chunk_end_yr = min(chunk_start_yr + num_yrs_per_chunk - 1, end_yr)
+            chunk_kwargs = dict(kwargs, yrs=(chunk_start_yr, chunk_end_yr))
+            timeseries_vars = self._get_timeseries_var(data_path, *args, **chunk_kwargs)
+            if bundles is None:
+                bundles = [climo.ClimoBundle(v, seasons) for v in timeseries_vars]
+            else:
+                for bundle, v in zip(bundles, timeseries_vars):
+                    bundle.add(v)
+
+        return bundles
+
+    def _get_num_yrs_per_chunk(self, data_path, seasons):
+        """
+        Return the number of years of a timeseries that fit in
+        parameters.climo_chunk_mb, based on the file of self.var, or the
+        first original variable if it's a derived variable. A year takes the
+        size of its values and of their mask, which is read along with them.
+        The float64 sums of the climatologies of the seasons are kept for the
+        whole read, so their size is taken out of the budget first.
+        """
+        if self.var in self.derived_vars:
+            vars_to_func_dict = self._get_first_valid_vars_timeseries(
+                self.derived_vars[self.var], data_path
+            )
+            var = list(vars_to_func_dict.keys())[0][0]
+        else:
+            var = self.var
+
+        start_yr, end_yr, _ = self.get_start_and_end_years()
+        fnm = self._get_timeseries_file_path(var, data_path)
+        if not fnm:
+            # Read all of the years, which raises the proper error.
+            return int(end_yr) - int(start_yr) + 1
+        var_start_year, var_end_year = self._get_yrs_from_timeseries_file_name(fnm)
+
+        fin = cdms2.open(fnm)
+        file_var = fin[var]
+        num_values = numpy.prod(file_var.shape)
+        num_bytes = num_values * (numpy.dtype(file_var.dtype).itemsize + 1)
+        num_sum_bytes = climo.get_num_sum_bytes(seasons, numpy.prod(file_var.shape[1:]))
+        fin.close()
+
+        num_bytes_per_yr = num_bytes / (var_end_year - var_start_year + 1)
+        num_bytes_per_chunk = self.parameters.climo_chunk_mb * 1024**2 - num_sum_bytes
+        return max(int(num_bytes_per_chunk // num_bytes_per_yr), 1)
 
     def get_static_variable(self, static_var, primary_var):
         if self.ref:
@@ -180,10 +529,30 @@ class Dataset:
             data_path = self.parameters.test_data_path
         file_path = self._get_timeseries_file_path(primary_var, data_path)
         fin = cdms2.open(file_path)
-        result = fin(static_var)
+        result = self._remap(fin(static_var))
         fin.close()
         return result
 
+    def get_map_file(self):
+        """
+        The SCRIP/ESMF map file the data on a native grid is remapped with,
+        or "" if the data is on a lat/lon grid.
+        """
+        if self.ref:
+            return getattr(self.parameters, "ref_map_file", "")
+        return getattr(self.parameters, "test_map_file", "")
+
+    def _remap(self, var):
+        """
+        Remap var from the native grid with the map file of the data, if any.
+        Only the variables read for the requested variables and seasons are
+        remapped, right after they're read.
+        """
+        map_file = self.get_map_file()
+        if not map_file:
+            return var
+        return regrid.remap(var, map_file)
+
     def is_timeseries(self):
         """
         Return True if this dataset is for timeseries data.
@@ -311,17 +680,7 @@ class Dataset:
         """
         Locate climatology file name based on data_name and season.
         """
-        dir_files = sorted(os.listdir(path_name))
-        for filename in dir_files:
-            if filename.startswith(data_name + "_" + season):
-                return os.path.join(path_name, filename)
-        # The below is only ran on model data, because a shorter name is passed into this software. Won't work when use month name such as '01' as season.
-        for filename in dir_files:
-            if season in ["ANN", "DJF", "MAM", "JJA", "SON"]:
-                if filename.startswith(data_name) and season in filename:
-                    return os.path.join(path_name, filename)
-        # No file found.
-        return ""
+        return catalog.get_catalog(path_name).find_climo(data_name, season)
 
     def _get_climo_var(self, filename, extra_vars_only=False):
         """
@@ -365,7 +724,7 @@ class Dataset:
 
                 # Or if the var is in the file, just get that.
                 elif var in data_file.variables:
-                    derived_var = data_file(var)(squeeze=1)
+                    derived_var = self._remap(data_file(var)(squeeze=1))
 
                 # Otherwise, there's an error.
                 else:
@@ -422,7 +781,7 @@ class Dataset:
         # and only set of vars from the dictionary.
         vars_to_get = list(vars_to_func_dict.keys())[0]
 
-        variables = [data_file(var)(squeeze=1) for var in vars_to_get]
+        variables = [self._remap(data_file(var)(squeeze=1)) for var in vars_to_get]
 
         return variables
 
@@ -434,12 +793,14 @@ class Dataset:
         for k in vars_to_func_dict:
             return vars_to_func_dict[k]
 
-    def _get_timeseries_var(self, data_path, extra_vars_only=False):
+    def _get_timeseries_var(self, data_path, extra_vars_only=False, yrs=None):
         """
         For a given season and timeseries input data,
         get the variable (self.var).
 
         If self.extra_vars is also defined, get them as well.
+        If yrs is defined, only the (start_yr, end_yr) years are read instead
+        of the user-defined ones.
         """
         # Can't iterate through self.var and self.extra_vars as we do in _get_climo_var()
         # b/c the extra_vars must be taken from the same timeseries file as self.var.
@@ -464,7 +825,7 @@ class Dataset:
                 # Open the files of the variables and get the cdms2.TransientVariables.
                 # Ex: [PRECC, PRECL], where both are TransientVariables.
                 variables = self._get_original_vars_timeseries(
-                    vars_to_func_dict, data_path
+                    vars_to_func_dict, data_path, yrs
                 )
 
                 # Get the corresponding function.
@@ -483,7 +844,7 @@ class Dataset:
             first_orig_var = list(vars_to_func_dict.keys())[0][0]
             for extra_var in self.extra_vars:
                 v = self._get_var_from_timeseries_file(
-                    first_orig_var, data_path, var_to_get=extra_var
+                    first_orig_var, data_path, var_to_get=extra_var, yrs=yrs
                 )
                 return_variables.append(v)
 
@@ -492,13 +853,13 @@ class Dataset:
             # We do want the self.var.
             if not extra_vars_only:
                 # Find {var}_{start_yr}01_{end_yr}12.nc in data_path and get var from it.
-                v = self._get_var_from_timeseries_file(self.var, data_path)
+                v = self._get_var_from_timeseries_file(self.var, data_path, yrs=yrs)
                 return_variables.append(v)
 
             # Also get any extra vars.
             for extra_var in self.extra_vars:
                 v = self._get_var_from_timeseries_file(
-                    self.var, data_path, var_to_get=extra_var
+                    self.var, data_path, var_to_get=extra_var, yrs=yrs
                 )
                 return_variables.append(v)
 
@@ -560,26 +921,14 @@ class Dataset:
         (with different start_yr or end_yr), return ''.
         This is equivalent to returning False.
         """
-        # Get all of the nc file paths in data_path.
-
-        # path = os.path.join(data_path, '*.nc')
-        path = os.path.join(data_path, "*.*")
-        files = sorted(glob.glob(path))
-
-        # Both .nc and .xml files are supported
-        file_fmt = ""
-        if len(files) > 0:
-            file_fmt = files[0].split(".")[-1]
-
-        # Everything between '{var}_' and '.nc' in a
-        # time-series file is always 13 characters.
+        # The files in data_path are looked up in its catalog, which is
+        # only built once per process.
         if self.parameters.sets[0] in ["arm_diags"]:
             site = getattr(self.parameters, "regions", "")
-            re_str = var + "_" + site[0] + r"_.{13}." + file_fmt
+            key = var + "_" + site[0]
         else:
-            re_str = var + r"_.{13}." + file_fmt
-        re_str = os.path.join(data_path, re_str)
-        matches = [f for f in files if re.search(re_str, f)]
+            key = var
+        matches = catalog.get_catalog(data_path).find_timeseries(key)
 
         if len(matches) == 1:
             return matches[0]
@@ -593,19 +942,8 @@ class Dataset:
         # If nothing was found, try looking for the file with
         # the ref_name prepended to it.
         ref_name = getattr(self.parameters, "ref_name", "")
-        # path = os.path.join(data_path, ref_name, '*.nc')
-        path = os.path.join(data_path, ref_name, "*.*")
-        files = sorted(glob.glob(path))
-        # Both .nc and .xml files are supported
-        file_fmt = ""
-        if len(files) > 0:
-            file_fmt = files[0].split(".")[-1]
-
-        # Everything between '{var}_' and '.nc' in a
-        # time-series file is always 13 characters.
-        re_str = var + r"_.{13}." + file_fmt
-        re_str = os.path.join(data_path, ref_name, re_str)
-        matches = [f for f in files if re.search(re_str, f)]
+        ref_name_path = os.path.join(data_path, ref_name)
+        matches = catalog.get_catalog(ref_name_path).find_timeseries(var)
         # Again, there should only be one file per var in this new location.
         if len(matches) == 1:
             return matches[0]
@@ -618,7 +956,7 @@ class Dataset:
         else:
             return ""
 
-    def _get_original_vars_timeseries(self, vars_to_func_dict, data_path):
+    def _get_original_vars_timeseries(self, vars_to_func_dict, data_path, yrs=None):
         """
         Given a dictionary in the form {(vars): func}, get the vars
         from files in data_path as cdms2.TransientVariables.
@@ -632,15 +970,21 @@ class Dataset:
 
         variables = []
         for var in vars_to_get:
-            v = self._get_var_from_timeseries_file(var, data_path)
+            v = self._get_var_from_timeseries_file(var, data_path, yrs=yrs)
             variables.append(v)
 
         return variables
 
-    def _get_var_from_timeseries_file(self, var, data_path, var_to_get=""):
+    def _get_var_from_timeseries_file(
+        self, var, data_path, var_to_get="", yrs=None, points=None
+    ):
         """
         Get the actual var from the timeseries file for var.
         If var_to_get is defined, get that from the file instead of var.
+        If yrs is defined, get the (start_yr, end_yr) years instead of the
+        user-defined ones.
+        If points, (lat_index, lon_index), is defined, only get the values of
+        var at these grid cells, see _get_points_from_file().
 
         This function is only called after it's checked that a file
         for this var exists in data_path.
@@ -651,6 +995,8 @@ class Dataset:
             end_year,
             sub_monthly,
         ) = self.get_start_and_end_years()
+        if yrs:
+            start_year, end_year = yrs
         if sub_monthly:
             start_time = "{}-01-01".format(start_year)
             end_time = "{}-01-01".format(str(int(end_year) + 1))
@@ -667,8 +1013,7 @@ class Dataset:
         # get available start and end years from file name: {var}_{start_yr}01_{end_yr}12.nc
         start_year = int(start_year)
         end_year = int(end_year)
-        var_start_year = int(fnm.split("/")[-1].split("_")[-2][:4])
-        var_end_year = int(fnm.split("/")[-1].split("_")[-1][:4])
+        var_start_year, var_end_year = self._get_yrs_from_timeseries_file_name(fnm)
 
         if start_year < var_start_year:
             msg = "Invalid year range specified for test/reference time series data: start_year={}<{}=var_start_yr".format(
@@ -686,6 +1031,67 @@ class Dataset:
             #    return var_time
             # For xml files using above with statement won't work because the Dataset object returned doesn't have attribute __enter__ for content management.
             fin = cdms2.open(fnm)
-            var_time = fin(var, time=(start_time, end_time, slice_flag))(squeeze=1)
+            if points is None:
+                var_time = fin(var, time=(start_time, end_time, slice_flag))(squeeze=1)
+                var_time = self._remap(var_time)
+            else:
+                var_time = self._get_points_from_file(
+                    fin, fnm, var, (start_time, end_time, slice_flag), *points
+                )
             fin.close()
             return var_time
+
+    def _get_points_from_file(self, fin, fnm, var, time, lat_index, lon_index):
+        """
+        Get the (points, time) values of the (time, lat, lon) var in the file
+        fnm, opened as fin, at the (lat_index, lon_index) grid cells, as
+        float32 with missing values as nan.
+        The file is read one latitude row at a time, so the whole grid is
+        never in memory. Only the cells of the points are read from netCDF
+        files, with the orthogonal indexing of netCDF4, and the cells between
+        the first and last points of each row from the other files, ex: the
+        .xml aggregations.
+        """
+        nc = None
+        if fnm.endswith(".nc"):
+            interval = fin[var].getTime().mapIntervalExt(time)
+            times = slice(*interval) if interval else slice(0, 0)
+            nc = netCDF4.Dataset(fnm)
+
+        values = None
+        try:
+            for lat in numpy.unique(lat_index):
+                in_row = lat_index == lat
+                lons, point_lons = numpy.unique(lon_index[in_row], return_inverse=True)
+                if nc is not None:
+                    row = nc.variables[var][times, int(lat), lons]
+                else:
+                    lon_slice = slice(lons[0], lons[-1] + 1)
+                    row = fin(
+                        var,
+                        time=time,
+                        latitude=slice(lat, lat + 1),
+                        longitude=lon_slice,
+                    )
+                    row = row[:, 0, lons - lons[0]]
+                row = numpy.ma.filled(row.astype(numpy.float32), numpy.nan)
+                if values is None:
+                    values = numpy.empty((len(lat_index), row.shape[0]), numpy.float32)
+
+                values[in_row] = row[:, point_lons].T
+        finally:
+            if nc is not None:
+                nc.close()
+
+        if values is None:
+            values = numpy.empty((0, 0), numpy.float32)
+        return values
+
+    def _get_yrs_from_timeseries_file_name(self, fnm):
+        """
+        Get the start and end years from a file name in the form:
+            {var}_{start_yr}01_{end_yr}12.nc
+        """
+        var_start_year = int(fnm.split("/")[-1].split("_")[-2][:4])
+        var_end_year = int(fnm.split("/")[-1].split("_")[-1][:4])
+        return var_start_year, var_end_year
@@ -0,0 +1,130 @@
+"""
+Files cached on disk across runs.
+
+What's computed from the input data and is expensive to recompute, ex: the
+catalogs of the files in the data paths, is saved in ``cache_dir`` when it's
+set, so later runs can reuse it. Nothing is ever written into the data paths,
+which are often shared or read-only.
+
+The files computed from the contents of an input file, rather than from its
+path, are named after its checksum, so identical copies of the input share
+them.
+"""
+import hashlib
+import json
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+from e3sm_diags.logger import custom_logger
+
+logger = custom_logger(__name__)
+
+# The directory the files are cached in, nothing is cached on disk if None.
+cache_dir: Optional[str] = None
+
+# The sha256 of the files of this process, by absolute path, with the stamp of
+# the file they were computed for.
+_checksums: Dict[str, Tuple[List[int], str]] = {}
+
+
+def set_cache_dir(path: Optional[str]):
+    """Cache the files in path, or nothing on disk if path is None."""
+    global cache_dir
+    cache_dir = path
+
+
+def get_path(kind: str, source: str, ext: str) -> Optional[str]:
+    """
+    Return the path of the cached file of the given kind, ex: "catalogs",
+    computed from the file or directory source, or None if there's no
+    cache_dir.
+    """
+    if not cache_dir:
+        return None
+
+    name = hashlib.sha1(os.path.abspath(source).encode()).hexdigest()
+    return os.path.join(cache_dir, kind, name + ext)
+
+
+def get_checksum_path(kind: str, checksum: str, ext: str) -> Optional[str]:
+    """
+    Return the path of the cached file of the given kind computed from the
+    contents of a file with the given checksum, or None if there's no
+    cache_dir.
+    """
+    if not cache_dir:
+        return None
+
+    return os.path.join(cache_dir, kind, checksum + ext)
+
+
+def get_checksum(fnm: str) -> str:
+    """
+    Return the sha256 of the contents of the file fnm.
+
+    The checksum is only computed once per file: it's kept in memory, and in
+    cache_dir if it's set, with the inode, size, modification and change
+    times of the file, and only computed again if any of them changed. The
+    change time can't be set, so a file replaced with one of the same size
+    and modification time, ex: with ``cp -p``, is checksummed again.
+    """
+    path = os.path.abspath(fnm)
+    st = os.stat(path)
+    stamp = [st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns]
+
+    stamp_file = get_path("checksums", path, ".json")
+    cached = _checksums.get(path)
+    if cached is None and stamp_file is not None:
+        try:
+            with open(stamp_file) as f:
+                cached_stamp, cached_checksum = json.load(f)
+            cached = (cached_stamp, cached_checksum)
+        except (OSError, ValueError):
+            pass
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as data:
+        for block in iter(lambda: data.read(2**20), b""):
+            h.update(block)
+    checksum = h.hexdigest()
+
+    _checksums[path] = (stamp, checksum)
+    if stamp_file is not None:
+
+        def write(tmp_fnm):
+            with open(tmp_fnm, "w") as f:
+                json.dump([stamp, checksum], f)
+
+        save(stamp_file, write)
+
+    return checksum
+
+
+def save(fnm: str, write: Callable[[str], None]) -> bool:
+    """
+    Save the file fnm with write(path), which writes it to path.
+
+    The file is written to a temporary file in the same directory, which is
+    then renamed to fnm. The rename is atomic, so parallel runs never read a
+    partially written file. Return False if the file couldn't be saved, ex:
+    if the directory isn't writable.
+    """
+    root, ext = os.path.splitext(fnm)
+    tmp_fnm = "{}.{}{}".format(root, os.getpid(), ext)
+    try:
+        os.makedirs(os.path.dirname(fnm), exist_ok=True)
+        write(tmp_fnm)
+        os.replace(tmp_fnm, fnm)
+        return True
+    except OSError:
+        logger.debug("Could not save {}".format(fnm), exc_info=True)
+        return False
+    finally:
+        # The temporary file is only left if the file couldn't be saved.
+        if os.path.exists(tmp_fnm):
+            try:
+                os.remove(tmp_fnm)
+            except OSError:
+                pass
@@ -4,6 +4,8 @@ import numpy.ma as ma
 
 from e3sm_diags.logger import custom_logger
 
+from . import calendar_time
+
 logger = custom_logger(__name__)
 
 
@@ -45,12 +47,16 @@ def composite_diurnal_cycle(var, season, fft=True):
 
     #    tbounds = var_time.getBounds()
     #    var_time[:] = 0.5*(tbounds[:,0]+tbounds[:,1]) #time bounds for h1-h4 are problematic
-    var_time_absolute = var_time.asComponentTime()
+    var_time_absolute = calendar_time.decode_time(var_time)
     time_freq = int(
-        24 / (var_time_absolute[1].hour - var_time_absolute[0].hour)
+        24 / (var_time_absolute.hour[1] - var_time_absolute.hour[0])
     )  # This only valid for time interval >= 1hour
-    start_time = var_time_absolute[0].hour
-    logger.info(f"start_time {var_time_absolute[0]} {var_time_absolute[0].hour}")
+    start_time = var_time_absolute.hour[0]
+    logger.info(
+        "start_time {} {}".format(
+            calendar_time.format_time(var_time_absolute, 0), start_time
+        )
+    )
     logger.info("var_time_freq={}".format(time_freq))
 
     # Convert to masked array
@@ -82,13 +88,7 @@ def composite_diurnal_cycle(var, season, fft=True):
     var_diurnal = ma.zeros([ncycle] + [time_freq] + list(numpy.shape(v))[1:])
     for n in range(ncycle):
         # Get time index for each month/season.
-        idx = numpy.array(
-            [
-                season_idx[cycle[n]][var_time_absolute[i].month - 1]
-                for i in range(len(var_time_absolute))
-            ],
-            dtype=numpy.int,
-        ).nonzero()
+        idx = numpy.array(season_idx[cycle[n]])[var_time_absolute.month - 1].nonzero()
         var_diurnal[n,] = ma.average(  # noqa
             numpy.reshape(
                 v[idx],
@@ -1,18 +1,19 @@
 from __future__ import print_function
 
-import copy
 import errno
 import os
 from pathlib import Path
+from typing import Any, Dict, List, Tuple
 
 import cdms2
-import cdutil
-import genutil
-import MV2
+import numpy
 
+from e3sm_diags.derivations.acme import mask_by, masked_view  # noqa: F401
 from e3sm_diags.derivations.default_regions import points_specs, regions_specs
 from e3sm_diags.logger import custom_logger
 
+from . import mask, regrid, vertical
+
 logger = custom_logger(__name__)
 
 
@@ -110,11 +111,22 @@ def convert_to_pressure_levels(mv, plevs, dataset, var, season):
     mv_plv = mv.getLevel()
     # var(time,lev,lon,lat) convert from hybrid level to pressure
     if mv_plv.long_name.lower().find("hybrid") != -1:
-        extra_vars = ["hyam", "hybm", "PS"]
-        hyam, hybm, ps = dataset.get_extra_variables_only(
-            var, season, extra_vars=extra_vars
+        # The pressure and the interpolation weights are the same for all of
+        # the variables of the season on this grid, so they're cached.
+        mv = mv(squeeze=1)
+        key = (dataset.get_source_key(season), season, vertical.get_grid_key(mv))
+
+        def get_pressure():
+            extra_vars = ["hyam", "hybm", "PS"]
+            hyam, hybm, ps = dataset.get_extra_variables_only(
+                var, season, extra_vars=extra_vars
+            )
+            return hybrid_to_pressure(hyam, hybm, ps)
+
+        cached = vertical.get_cached_pressure(key, get_pressure)
+        mv_p = vertical.log_linear_interpolation(
+            mv, cached.pressure, plevs, units="mb", weights_cache=cached.weights
         )
-        mv_p = hybrid_to_plevs(mv, hyam, hybm, ps, plevs)
 
     # levels are pressure levels
     elif (
@@ -129,18 +141,18 @@ def convert_to_pressure_levels(mv, plevs, dataset, var, season):
     return mv_p
 
 
-def hybrid_to_plevs(var, hyam, hybm, ps, plev):
-    """Convert from hybrid pressure coordinate to desired pressure level(s)."""
+def hybrid_to_pressure(hyam, hybm, ps):
+    """Return the pressure in mb on the hybrid levels, with ps in Pa."""
     p0 = 1000.0  # mb
     ps = ps / 100.0  # convert unit from 'Pa' to mb
-    levels_orig = cdutil.vertical.reconstructPressureFromHybrid(ps, hyam, hybm, p0)
-    levels_orig.units = "mb"
-    # Make sure z is positive down
-    if var.getLevel()[0] > var.getLevel()[-1]:
-        var = var(lev=slice(-1, None, -1))
-        levels_orig = levels_orig(lev=slice(-1, None, -1))
-    var_p = cdutil.vertical.logLinearInterpolation(
-        var(squeeze=1), levels_orig(squeeze=1), plev
+    return vertical.hybrid_to_pressure(hyam, hybm, ps(squeeze=1), p0)
+
+
+def hybrid_to_plevs(var, hyam, hybm, ps, plev):
+    """Convert from hybrid pressure coordinate to desired pressure level(s)."""
+    levels_orig = hybrid_to_pressure(hyam, hybm, ps)
+    var_p = vertical.log_linear_interpolation(
+        var(squeeze=1), levels_orig, plev, units="mb"
     )
 
     return var_p
@@ -150,23 +162,12 @@ def pressure_to_plevs(var, plev):
     """Convert from pressure coordinate to desired pressure level(s)."""
     # Construct pressure level for interpolation
     var_plv = var.getLevel()
+    levels_orig = var_plv[:]
     if var_plv.units == "Pa":
-        var_plv[:] = var_plv[:] / 100.0  # convert Pa to mb
-    levels_orig = MV2.array(var_plv[:])
-    levels_orig.setAxis(0, var_plv)
-    # grow 1d levels_orig to mv dimention
-    var, levels_orig = genutil.grower(var, levels_orig)
-    # levels_orig.info()
-    # logLinearInterpolation only takes positive down plevel:
-    # "I :      interpolation field (usually Pressure or depth)
-    # from TOP (level 0) to BOTTOM (last level), i.e P value
-    # going up with each level"
-    if var.getLevel()[0] > var.getLevel()[-1]:
-        var = var(lev=slice(-1, None, -1))
-        levels_orig = levels_orig(lev=slice(-1, None, -1))
-    var_p = cdutil.vertical.logLinearInterpolation(
-        var(squeeze=1), levels_orig(squeeze=1), plev
-    )
+        levels_orig = levels_orig / 100.0  # convert Pa to mb
+    # The 1D levels are used for every column, without growing them
+    # to the shape of var.
+    var_p = vertical.log_linear_interpolation(var(squeeze=1), levels_orig, plev)
 
     return var_p
 
@@ -175,7 +176,7 @@ def select_region_lat_lon(region, var, parameter):
     """Select desired regions from transient variables (no mask)."""
     try:
         # if region.find('global') == -1:
-        domain = regions_specs[region]["domain"]  # type: ignore
+        domain = regions_specs[region]["domain"]
     except Exception:
         pass
 
@@ -189,26 +190,19 @@ def select_region(region, var, land_frac, ocean_frac, parameter):
     """Select desired regions from transient variables."""
     domain = None
     # if region != 'global':
-    if region.find("land") != -1 or region.find("ocean") != -1:
-        if region.find("land") != -1:
-            land_ocean_frac = land_frac
-        elif region.find("ocean") != -1:
-            land_ocean_frac = ocean_frac
-        region_value = regions_specs[region]["value"]  # type: ignore
-
-        land_ocean_frac = land_ocean_frac.regrid(
-            var.getGrid(),
-            regridTool=parameter.regrid_tool,
-            regridMethod=parameter.regrid_method,
-        )
-
-        var_domain = mask_by(var, land_ocean_frac, low_limit=region_value)
+    # The land/ocean mask of the region on the grid of var, which is only
+    # computed once per grid.
+    region_mask = mask.get_region_mask(
+        region, var.getGrid(), land_frac, ocean_frac, parameter
+    )
+    if region_mask is not None:
+        var_domain = masked_view(var, region_mask)
     else:
         var_domain = var
 
     try:
         # if region.find('global') == -1:
-        domain = regions_specs[region]["domain"]  # type: ignore
+        domain = regions_specs[region]["domain"]
     except Exception:
         pass
 
@@ -238,7 +232,19 @@ def select_point(region, var):
 
 
 def regrid_to_lower_res(mv1, mv2, regrid_tool, regrid_method):
-    """Regrid transient variable toward lower resolution of two variables."""
+    """
+    Regrid transient variable toward lower resolution of two variables.
+
+    The variables that aren't regridded are copied, since the regions of
+    select_region() share their data with the whole variable, so the returned
+    variables can be modified in place.
+    """
+
+    # Nothing to regrid if both are on the same grid, which is common for
+    # model_vs_model runs.
+    if regrid.grids_equal(mv1.getGrid(), mv2.getGrid()):
+        regrid.stats["skipped"] += 1
+        return mv1.clone(), mv2.clone()
 
     axes1 = mv1.getAxisList()
     axes2 = mv2.getAxisList()
@@ -247,45 +253,89 @@ def regrid_to_lower_res(mv1, mv2, regrid_tool, regrid_method):
     # resolution. For the difference plot, regrid toward lower resolution
     if len(axes1[1]) <= len(axes2[1]):
         mv_grid = mv1.getGrid()
-        mv1_reg = mv1
-        mv2_reg = mv2.regrid(
-            mv_grid, regridTool=regrid_tool, regridMethod=regrid_method
-        )
+        mv1_reg = mv1.clone()
+        mv2_reg = regrid.regrid(mv2, mv_grid, regrid_tool, regrid_method)
         mv2_reg.units = mv2.units
 
     else:
         mv_grid = mv2.getGrid()
-        mv2_reg = mv2
-        mv1_reg = mv1.regrid(
-            mv_grid, regridTool=regrid_tool, regridMethod=regrid_method
-        )
+        mv2_reg = mv2.clone()
+        mv1_reg = regrid.regrid(mv1, mv_grid, regrid_tool, regrid_method)
         mv1_reg.units = mv1.units
 
     return mv1_reg, mv2_reg
 
 
-def mask_by(input_var, maskvar, low_limit=None, high_limit=None):
-    """masks a variable var to be missing except where maskvar>=low_limit and maskvar<=high_limit.
-    None means to omit the constrint, i.e. low_limit = -infinity or high_limit = infinity.
-    var is changed and returned; we don't make a new variable.
-    var and maskvar: dimensioned the same variables.
-    low_limit and high_limit: scalars.
+def regrid_to_lower_res_batch(mv1s, mv2s, regrid_tool, regrid_method):
     """
-    var = copy.deepcopy(input_var)
-    if low_limit is None and high_limit is None:
-        return var
-    if low_limit is None and high_limit is not None:
-        maskvarmask = maskvar > high_limit
-    elif low_limit is not None and high_limit is None:
-        maskvarmask = maskvar < low_limit
-    else:
-        maskvarmask = (maskvar < low_limit) | (maskvar > high_limit)
-    if var.mask is False:
-        newmask = maskvarmask
+    Regrid each pair of transient variables of mv1s and mv2s toward the lower
+    resolution of the two, with the variables regridded to the same grid
+    regridded together by ``regrid.regrid_batch()``.
+
+    The resolution is the number of longitudes, as in regrid_to_lower_res()
+    for 2D variables, so a batch of the plevs of a 3D variable is regridded
+    like each of its plevs. The variables that aren't regridded are copied,
+    as in regrid_to_lower_res().
+    """
+    mv1s_reg = list(mv1s)
+    mv2s_reg = list(mv2s)
+    # The destination grid of each batch and the variables regridded to it,
+    # as (list of variables, index) pairs.
+    batches: Dict[Any, Tuple[Any, List[Tuple[List[Any], int]]]] = {}
+    for i, (mv1, mv2) in enumerate(zip(mv1s, mv2s)):
+        grid1 = mv1.getGrid()
+        grid2 = mv2.getGrid()
+        if regrid.grids_equal(grid1, grid2):
+            regrid.stats["skipped"] += 1
+            continue
+
+        if len(mv1.getLongitude()) <= len(mv2.getLongitude()):
+            mv_grid, target = grid1, (mv2s_reg, i)
+        else:
+            mv_grid, target = grid2, (mv1s_reg, i)
+        # The grids without a hash are never batched.
+        key = regrid.get_grid_key(mv_grid) or ("variable", i)
+        batches.setdefault(key, (mv_grid, []))[1].append(target)
+
+    for mv_grid, targets in batches.values():
+        variables = [mvs[i] for mvs, i in targets]
+        variables_reg = regrid.regrid_batch(
+            variables, mv_grid, regrid_tool, regrid_method
+        )
+        for (mvs, i), mv, mv_reg in zip(targets, variables, variables_reg):
+            mv_reg.units = mv.units
+            mvs[i] = mv_reg
+
+    for mvs_reg, mvs in [(mv1s_reg, mv1s), (mv2s_reg, mv2s)]:
+        for i, (mv_reg, mv) in enumerate(zip(mvs_reg, mvs)):
+            if mv_reg is mv:
+                mvs_reg[i] = mv.clone()
+
+    return mv1s_reg, mv2s_reg
+
+
+def regrid_zonal_means_to_lower_res(mv1, mv2, regrid_method):
+    """
+    Regrid the zonal means mv1 and mv2, with latitude as their last axis,
+    toward the lower resolution in latitude of the two.
+    """
+    lat1 = mv1.getLatitude()
+    lat2 = mv2.getLatitude()
+    if len(lat1) == len(lat2) and numpy.allclose(
+        lat1[:], lat2[:], rtol=0, atol=regrid.GRID_ATOL
+    ):
+        return mv1, mv2
+
+    if len(lat1) <= len(lat2):
+        mv1_reg = mv1
+        mv2_reg = regrid.regrid_zonal_mean(mv2, lat1, regrid_method)
+        mv2_reg.units = mv2.units
     else:
-        newmask = var.mask | maskvarmask
-    var.mask = newmask
-    return var
+        mv2_reg = mv2
+        mv1_reg = regrid.regrid_zonal_mean(mv1, lat2, regrid_method)
+        mv1_reg.units = mv1.units
+
+    return mv1_reg, mv2_reg
 
 
 def save_transient_variables_to_netcdf(set_num, variables_dict, label, parameter):
@@ -0,0 +1,201 @@
+"""
+The land/ocean fractions and the land/ocean masks of the regions.
+
+The climo sets get LANDFRAC and OCNFRAC for every season, and selecting a
+land or ocean region regrids the fraction onto the grid of the variable,
+which is the same for every variable and season on that grid. Here the
+default fractions are only read once, and the regridded fraction and the
+boolean mask of a region are computed once per fraction, target grid and
+threshold, so selecting a land or ocean region is a lookup.
+
+The fractions from ``get_land_ocean_fracs()`` are keyed by where they're
+read from, the other fractions by a hash of their values, which is only
+computed once per fraction. At most MAX_CACHED_MB megabytes of regridded
+fractions and of masks are cached, the least recently used are dropped first.
+"""
+import collections
+import hashlib
+import os
+import weakref
+from typing import Any, Dict, Tuple
+
+import cdms2
+import numpy as np
+
+import e3sm_diags
+from e3sm_diags.derivations.default_regions import regions_specs
+
+from . import regrid
+
+# The land/ocean fractions used when the test data doesn't have any.
+DEFAULT_MASK_FILE = os.path.join(
+    e3sm_diags.INSTALL_PATH, "acme_ne30_ocean_land_mask.nc"
+)
+
+# The megabytes of regridded fractions, and of masks, that are cached.
+MAX_CACHED_MB = 64
+
+# The (LANDFRAC, OCNFRAC) of DEFAULT_MASK_FILE, read on first use.
+_default_fracs = None
+
+# The keys of the fractions, by their id, with a weak reference to the
+# fraction so the key is dropped with it.
+_frac_keys: Dict[int, Tuple[Any, Any]] = {}
+
+# The fractions regridded to a grid, keyed by
+# (fraction key, grid hash, regrid tool, regrid method), from the least to
+# the most recently used.
+_regridded_fracs: "collections.OrderedDict[Tuple[Any, ...], Any]" = (
+    collections.OrderedDict()
+)
+
+# The masks of the regions, True where the fraction is below the threshold
+# of the region, keyed by the key of the regridded fraction and the threshold.
+_masks: "collections.OrderedDict[Tuple[Any, ...], np.ndarray]" = (
+    collections.OrderedDict()
+)
+
+
+def get_default_fracs():
+    """Return the (LANDFRAC, OCNFRAC) of DEFAULT_MASK_FILE."""
+    global _default_fracs
+    if _default_fracs is None:
+        with cdms2.open(DEFAULT_MASK_FILE) as f:
+            _default_fracs = (f("LANDFRAC"), f("OCNFRAC"))
+        for frac in _default_fracs:
+            _set_frac_key(frac, (DEFAULT_MASK_FILE, frac.id))
+
+    return _default_fracs
+
+
+def get_land_ocean_fracs(dataset, season):
+    """
+    Return the LANDFRAC and OCNFRAC of dataset for season, or the default
+    ones if it doesn't have them.
+    """
+    try:
+        land_frac = dataset.get_climo_variable("LANDFRAC", season)
+        ocean_frac = dataset.get_climo_variable("OCNFRAC", season)
+    except Exception:
+        return get_default_fracs()
+
+    source = dataset.get_source_key(season) + (season,)
+    _set_frac_key(land_frac, source + ("LANDFRAC",))
+    _set_frac_key(ocean_frac, source + ("OCNFRAC",))
+
+    return land_frac, ocean_frac
+
+
+def get_region_mask(region, grid, land_frac, ocean_frac, parameter):
+    """
+    Return the mask of a land or ocean region on grid, True where the land or
+    ocean fraction is below the threshold of the region, or None for the
+    other regions.
+    """
+    if region.find("land") != -1:
+        frac = land_frac
+    elif region.find("ocean") != -1:
+        frac = ocean_frac
+    else:
+        return None
+    region_value = regions_specs[region]["value"]
+
+    key = _get_frac_key(frac, grid, parameter)
+    if key is None:
+        # Only the fractions on rectilinear grids with bounds are cached.
+        frac = regrid.regrid(frac, grid, parameter.regrid_tool, parameter.regrid_method)
+        return np.asarray(np.ma.getdata(frac < region_value))
+
+    mask = _get_cached(_masks, key + (region_value,))
+    if mask is None:
+        frac = get_regridded_frac(key, frac, grid, parameter)
+        mask = np.asarray(np.ma.getdata(frac < region_value))
+        _add_cached(_masks, key + (region_value,), mask)
+
+    return mask
+
+
+def get_regridded_frac(key, frac, grid, parameter):
+    """Return the fraction frac regridded to grid, cached by key."""
+    frac_reg = _get_cached(_regridded_fracs, key)
+    if frac_reg is None:
+        frac_reg = regrid.regrid(
+            frac, grid, parameter.regrid_tool, parameter.regrid_method
+        )
+        _add_cached(_regridded_fracs, key, frac_reg)
+
+    return frac_reg
+
+
+def _get_frac_key(frac, grid, parameter):
+    """
+    The key of frac regridded to grid, made of the key of frac and the hash of
+    grid, or None if either grid has no bounds.
+    """
+    for g in [frac.getGrid(), grid]:
+        if not isinstance(g, cdms2.grid.AbstractRectGrid):
+            return None
+        if g.getLatitude().getBounds() is None:
+            return None
+        if g.getLongitude().getBounds() is None:
+            return None
+
+    return (
+        _get_key_of_frac(frac),
+        regrid._grid_hash(grid),
+        parameter.regrid_tool,
+        parameter.regrid_method,
+    )
+
+
+def _get_key_of_frac(frac):
+    """
+    The key of frac set by _set_frac_key(), or the hash of its values, mask
+    and grid, which is then set as its key.
+    """
+    ref_and_key = _frac_keys.get(id(frac))
+    if ref_and_key is not None and ref_and_key[0]() is frac:
+        return ref_and_key[1]
+
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(np.ma.getdata(frac)).tobytes())
+    h.update(np.ascontiguousarray(np.ma.getmaskarray(frac)).tobytes())
+    h.update(regrid._grid_hash(frac.getGrid()).encode())
+    key = h.hexdigest()
+    _set_frac_key(frac, key)
+
+    return key
+
+
+def _set_frac_key(frac, key):
+    """Set the key of frac, for as long as frac exists."""
+    frac_id = id(frac)
+    ref = weakref.ref(frac, lambda _: _frac_keys.pop(frac_id, None))
+    _frac_keys[frac_id] = (ref, key)
+
+
+def _get_cached(cache, key):
+    """Return the value cached for key, or None."""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+
+    return value
+
+
+def _add_cached(cache, key, value):
+    """Cache value, dropping the least recently used values over MAX_CACHED_MB."""
+    cache[key] = value
+    num_bytes = sum(_get_num_bytes(v) for v in cache.values())
+    while len(cache) > 1 and num_bytes > MAX_CACHED_MB * 1024**2:
+        _, dropped = cache.popitem(last=False)
+        num_bytes -= _get_num_bytes(dropped)
+
+
+def _get_num_bytes(value):
+    num_bytes = np.ma.getdata(value).nbytes
+    mask = np.ma.getmask(value)
+    if mask is not np.ma.nomask:
+        num_bytes += mask.nbytes
+
+    return num_bytes
@@ -0,0 +1,609 @@
+"""
+Regridding with cached weights.
+
+Regridding a variable with ESMF computes the weights between its grid and
+the destination grid on every call, even though a run only ever regrids
+between a handful of distinct grids (the model grid and each of the obs
+grids). Here the conservative weights are computed once per pair of grids
+and kept as a sparse matrix, so regridding any other variable, season or
+level between the same grids is a sparse matrix product. With
+``regrid_batch()``, the variables on the same grid, ex: all of the plevs and
+regions of a variable, are regridded together with a single product.
+
+The weights are cached in memory for the whole process, keyed by the hashes
+of the source and destination grids and by the regrid tool and method. They
+are also saved in ``weights_dir`` when it's set, so later runs can reuse them.
+
+Only conservative regridding with ESMF between rectilinear lat/lon grids
+uses the cached weights, every other case is regridded with
+``TransientVariable.regrid()`` as before. Variables that are already on the
+destination grid, which is common in model_vs_model runs, aren't regridded
+at all.
+
+Variables on unstructured native grids, ex: ne30pg2, are remapped to a
+lat/lon grid with the weights of an offline SCRIP/ESMF map file by remap().
+The map file is only read once per process.
+"""
+import collections
+import hashlib
+import os
+from typing import Dict, Optional, Tuple
+
+import cdms2
+import numpy as np
+import numpy.ma as ma
+import scipy.sparse
+
+from e3sm_diags.logger import custom_logger
+
+from . import disk_cache
+
+logger = custom_logger(__name__)
+
+# The directory the weights are saved in, they're only kept in memory if None.
+weights_dir: Optional[str] = None
+
+# The weights of this process, keyed by
+# (source grid hash, destination grid hash, regrid tool, regrid method).
+_weights: Dict[Tuple[str, str, str, str], scipy.sparse.csr_matrix] = {}
+
+# The absolute tolerance, in degrees, for the coordinates and bounds of two
+# grids to be the same.
+GRID_ATOL = 1e-5
+
+# The number of times regrid() was called and skipped because the variable
+# was already on the destination grid, logged by log_stats().
+stats = {"regridded": 0, "skipped": 0}
+
+# The megabytes of the 2D fields of a batch, in float64, regridded with a
+# single sparse matrix product.
+BATCH_MB = 256
+
+# The values of regridMethod for conservative regridding accepted by cdms2.
+CONSERVATIVE_METHODS = ["conserve", "conservative", "conservative2"]
+
+# The weights of a map file as a (destination cells, source columns) sparse
+# matrix, and its destination lat/lon grid.
+MapFile = collections.namedtuple("MapFile", ["weights", "grid"])
+
+# The map files read by this process, keyed by their absolute path.
+_map_files: Dict[str, MapFile] = {}
+
+
+def set_weights_dir(path: Optional[str]):
+    """Save and look up the regridding weights in path, or only in memory if None."""
+    global weights_dir
+    weights_dir = path
+
+
+def regrid(var, grid, regrid_tool, regrid_method):
+    """
+    Regrid the transient variable var to grid, like
+    ``var.regrid(grid, regridTool=regrid_tool, regridMethod=regrid_method)``.
+    """
+    src_grid = var.getGrid()
+    if grids_equal(src_grid, grid):
+        stats["skipped"] += 1
+        return var
+
+    stats["regridded"] += 1
+    if not _has_cached_weights_support(var, src_grid, grid, regrid_tool, regrid_method):
+        return var.regrid(grid, regridTool=regrid_tool, regridMethod=regrid_method)
+
+    weights = get_weights(src_grid, grid, regrid_tool, regrid_method)
+    return _apply_weights([var], grid, weights)[0]
+
+
+def regrid_batch(variables, grid, regrid_tool, regrid_method):
+    """
+    Regrid each of the transient variables to grid, like regrid().
+
+    The variables on the same source grid, ex: all of the plevs of a variable
+    and its land and ocean regions, are stacked along a leading batch
+    dimension and regridded together with a single sparse matrix product.
+    The variables without cached weights support are regridded one 2D field
+    at a time with ``TransientVariable.regrid()``.
+    """
+    results = [None] * len(variables)
+    # The indices of the variables regridded with each grid's weights.
+    batches: Dict[str, list] = {}
+    for i, var in enumerate(variables):
+        src_grid = var.getGrid()
+        if grids_equal(src_grid, grid):
+            stats["skipped"] += 1
+            results[i] = var
+            continue
+
+        stats["regridded"] += 1
+        if _has_cached_weights_support(var, src_grid, grid, regrid_tool, regrid_method):
+            batches.setdefault(_grid_hash(src_grid), []).append(i)
+        else:
+            results[i] = _regrid_2d_fields(var, grid, regrid_tool, regrid_method)
+
+    for indices in batches.values():
+        batch = [variables[i] for i in indices]
+        weights = get_weights(batch[0].getGrid(), grid, regrid_tool, regrid_method)
+        for i, var_reg in zip(indices, _apply_weights(batch, grid, weights)):
+            results[i] = var_reg
+
+    return results
+
+
+def _apply_weights(variables, grid, weights):
+    """
+    Regrid the variables, all on the source grid of weights, to grid with
+    products of weights and their stacked 2D fields. The fields of all of the
+    variables are stacked BATCH_MB megabytes (in float64) at a time, so a
+    large batch is never converted to float64 all at once.
+    """
+    lat = grid.getLatitude()
+    lon = grid.getLongitude()
+    num_cells = max(weights.shape)
+    fields_per_block = max(int(BATCH_MB * 1024**2 // (8 * num_cells)), 1)
+
+    # The (fields, cells) data and mask of each variable, and its result.
+    data = []
+    masks = []
+    results = []
+    no_data = []
+    for var in variables:
+        v = var.asma()
+        num_fields = int(np.prod(v.shape[:-2], dtype=int))
+        data.append(ma.getdata(v).reshape(num_fields, -1))
+        mask = ma.getmask(v)
+        if mask is ma.nomask:
+            # A read-only view of False, without allocating a mask.
+            masks.append(np.broadcast_to(False, data[-1].shape))
+        else:
+            masks.append(mask.reshape(num_fields, -1))
+        results.append(np.empty((num_fields, weights.shape[0]), dtype=var.dtype))
+        no_data.append(np.empty((num_fields, weights.shape[0]), dtype=bool))
+
+    # The (variable, field) of each field, one variable after the other.
+    fields = [(i, j) for i in range(len(variables)) for j in range(len(data[i]))]
+    for start in range(0, len(fields), fields_per_block):
+        block = fields[start : start + fields_per_block]
+        block_data = np.stack([data[i][j] for i, j in block], axis=1)
+        block_valid = np.stack([~masks[i][j] for i, j in block], axis=1)
+        block_result, block_no_data = _weighted_average(
+            weights, block_data, block_valid
+        )
+        for k, (i, j) in enumerate(block):
+            results[i][j] = block_result[:, k]
+            no_data[i][j] = block_no_data[:, k]
+
+    variables_reg = []
+    for var, result, var_no_data in zip(variables, results, no_data):
+        shape = var.shape[:-2] + (len(lat), len(lon))
+        var_reg = cdms2.createVariable(
+            ma.masked_where(var_no_data.reshape(shape), result.reshape(shape)),
+            axes=var.getAxisList()[:-2] + [lat, lon],
+            grid=grid,
+            id=var.id,
+            attributes=var.attributes,
+        )
+        variables_reg.append(var_reg)
+
+    return variables_reg
+
+
+def _weighted_average(weights, data, valid):
+    """
+    Return the weighted averages of the (source cells, fields) data, and
+    where they have no data, as (destination cells, fields) arrays.
+    """
+    # The weights are normalized by the area of the destination cells.
+    # Masked source cells are left out of both the weighted sum and the
+    # destination fraction it's divided by, which is what ESMF does with
+    # a source mask.
+    weighted_sum = weights.dot(np.where(valid, data, 0).astype(np.float64))
+    frac = weights.dot(valid.astype(np.float64))
+    no_data = frac <= 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.where(no_data, 0, weighted_sum / frac)
+
+    return result, no_data
+
+
+def remap(var, map_file):
+    """
+    Remap the transient variable var, with the columns of the source grid of
+    the SCRIP/ESMF map file map_file as its last axis, to the destination
+    lat/lon grid of the map file. Variables that aren't on the source grid,
+    ex: hyam, are returned as is.
+    """
+    weights, grid = get_map_file(map_file)
+    if var.ndim == 0 or var.shape[-1] != weights.shape[1]:
+        return var
+    last_axis = var.getAxis(var.ndim - 1)
+    if last_axis.isLatitude() or last_axis.isLongitude():
+        return var
+
+    v = var.asma()
+    data = ma.getdata(v).reshape(-1, v.shape[-1]).T
+    valid = ~ma.getmaskarray(v).reshape(-1, v.shape[-1]).T
+    result, no_data = _weighted_average(weights, data, valid)
+
+    lat = grid.getLatitude()
+    lon = grid.getLongitude()
+    shape = v.shape[:-1] + (len(lat), len(lon))
+    result = ma.masked_where(no_data.T.reshape(shape), result.T.reshape(shape))
+
+    return cdms2.createVariable(
+        result.astype(var.dtype),
+        axes=var.getAxisList()[:-1] + [lat, lon],
+        grid=grid,
+        id=var.id,
+        attributes=var.attributes,
+    )
+
+
+def get_map_file(map_file):
+    """Return the MapFile of the SCRIP/ESMF map file map_file."""
+    path = os.path.abspath(map_file)
+    mapping = _map_files.get(path)
+    if mapping is None:
+        mapping = _read_map_file(path)
+        _map_files[path] = mapping
+
+    return mapping
+
+
+def _read_map_file(path):
+    """
+    Read the sparse weights S, row and col (1-based) of the map file at path,
+    and its destination grid, which must be a 2D lat/lon grid.
+    """
+    if not os.path.exists(path):
+        raise IOError("File not found: {}".format(path))
+
+    with cdms2.open(path) as f:
+        dst_grid_dims = np.asarray(f("dst_grid_dims")[:], dtype=int)
+        if len(dst_grid_dims) != 2:
+            msg = "The map file {} doesn't map to a lat/lon grid.".format(path)
+            raise RuntimeError(msg)
+        # The dimensions are in Fortran order, (lon, lat).
+        nlon, nlat = dst_grid_dims
+
+        n_a = f["xc_a"].shape[0]
+        n_b = f["xc_b"].shape[0]
+        weights = scipy.sparse.csr_matrix(
+            (
+                np.asarray(f("S")[:], dtype=np.float64),
+                (
+                    np.asarray(f("row")[:], dtype=np.int64) - 1,
+                    np.asarray(f("col")[:], dtype=np.int64) - 1,
+                ),
+            ),
+            shape=(n_b, n_a),
+        )
+
+        lat = np.asarray(f("yc_b")[:], dtype=np.float64).reshape(nlat, nlon)[:, 0]
+        lon = np.asarray(f("xc_b")[:], dtype=np.float64).reshape(nlat, nlon)[0, :]
+        lat_bnds = lon_bnds = None
+        if "yv_b" in f.variables and "xv_b" in f.variables:
+            yv = np.asarray(f("yv_b")[:], dtype=np.float64).reshape(nlat, nlon, -1)
+            xv = np.asarray(f("xv_b")[:], dtype=np.float64).reshape(nlat, nlon, -1)
+            lat_bnds = np.stack([yv[:, 0].min(axis=1), yv[:, 0].max(axis=1)], axis=1)
+            # The corners are taken within 180 degrees of the centers, for
+            # the cells across the date line or the prime meridian.
+            xv = lon[:, np.newaxis] + (xv[0] - lon[:, np.newaxis] + 180) % 360 - 180
+            lon_bnds = np.stack([xv.min(axis=1), xv.max(axis=1)], axis=1)
+
+    lat_axis = cdms2.createAxis(lat, bounds=lat_bnds, id="lat")
+    lat_axis.designateLatitude()
+    lat_axis.units = "degrees_north"
+    lon_axis = cdms2.createAxis(lon, bounds=lon_bnds, id="lon")
+    lon_axis.designateLongitude()
+    lon_axis.units = "degrees_east"
+
+    return MapFile(weights, cdms2.createRectGrid(lat_axis, lon_axis))
+
+
+def _regrid_2d_fields(var, grid, regrid_tool, regrid_method):
+    """Regrid var to grid with ``TransientVariable.regrid()``, a 2D field at a time."""
+    if var.ndim <= 2:
+        return var.regrid(grid, regridTool=regrid_tool, regridMethod=regrid_method)
+
+    fields = [
+        var[index].regrid(grid, regridTool=regrid_tool, regridMethod=regrid_method)
+        for index in np.ndindex(var.shape[:-2])
+    ]
+    shape = var.shape[:-2] + fields[0].shape
+    result = ma.stack([f.asma() for f in fields]).reshape(shape)
+
+    return cdms2.createVariable(
+        result,
+        axes=var.getAxisList()[:-2] + fields[0].getAxisList(),
+        grid=fields[0].getGrid(),
+        id=var.id,
+        attributes=var.attributes,
+    )
+
+
+def regrid_zonal_mean(var, lat, regrid_method):
+    """
+    Regrid the zonal mean var, with latitude as its last axis, to the
+    latitude axis lat.
+
+    With a conservative regrid_method, the values are averaged with the
+    overlaps of the latitude bands in sin(lat) as weights. For the zonal means
+    of variables on global rectilinear grids, that's the zonal mean of the
+    variables regridded conservatively in 2D. Otherwise, the values are
+    interpolated linearly in latitude.
+    """
+    if not var.getOrder().endswith("y"):
+        msg = "The zonal mean {} doesn't have latitude as its last axis.".format(var.id)
+        raise RuntimeError(msg)
+
+    v = var.asma()
+    nlat = v.shape[-1]
+    data = ma.getdata(v).reshape(-1, nlat).astype(np.float64)
+    valid = ~ma.getmaskarray(v).reshape(-1, nlat)
+
+    if regrid_method.lower() in CONSERVATIVE_METHODS:
+        weights = _get_lat_weights(var.getLatitude(), lat)
+        weighted_sum = np.dot(np.where(valid, data, 0), weights.T)
+        frac = np.dot(valid.astype(np.float64), weights.T)
+        no_data = frac <= 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = np.where(no_data, 0, weighted_sum / frac)
+    else:
+        result, no_data = _interp_lat(data, valid, var.getLatitude()[:], lat[:])
+
+    shape = v.shape[:-1] + (len(lat),)
+    result = ma.masked_where(no_data.reshape(shape), result.reshape(shape))
+
+    return cdms2.createVariable(
+        result.astype(var.dtype),
+        axes=var.getAxisList()[:-1] + [lat],
+        id=var.id,
+        attributes=var.attributes,
+    )
+
+
+def grids_equal(grid1, grid2):
+    """
+    Return True if the two grids are rectilinear grids with the same
+    coordinates and cell bounds, within GRID_ATOL.
+    """
+    if grid1 is None or grid2 is None:
+        return False
+    if grid1 is grid2:
+        return True
+    for grid in [grid1, grid2]:
+        if not isinstance(grid, cdms2.grid.AbstractRectGrid):
+            return False
+    if grid1.shape != grid2.shape:
+        return False
+
+    for axis1, axis2 in [
+        (grid1.getLatitude(), grid2.getLatitude()),
+        (grid1.getLongitude(), grid2.getLongitude()),
+    ]:
+        if not np.allclose(axis1[:], axis2[:], rtol=0, atol=GRID_ATOL):
+            return False
+
+        bnds1 = axis1.getBounds()
+        bnds2 = axis2.getBounds()
+        if (bnds1 is None) != (bnds2 is None):
+            return False
+        if bnds1 is not None and not np.allclose(bnds1, bnds2, rtol=0, atol=GRID_ATOL):
+            return False
+
+    return True
+
+
+def log_stats():
+    """Log how many of the regridded variables were already on the destination grid."""
+    total = stats["regridded"] + stats["skipped"]
+    if total:
+        logger.info(
+            "Regridding skipped for {} of {} variables already on the destination grid.".format(
+                stats["skipped"], total
+            )
+        )
+
+    stats["regridded"] = 0
+    stats["skipped"] = 0
+
+
+def get_weights(src_grid, dst_grid, regrid_tool, regrid_method):
+    """
+    Return the weights from src_grid to dst_grid as a sparse matrix of shape
+    (destination cells, source cells), with the cells of each grid in C order.
+    """
+    key = (_grid_hash(src_grid), _grid_hash(dst_grid), regrid_tool, regrid_method)
+    weights = _weights.get(key)
+    if weights is not None:
+        return weights
+
+    fnm = None
+    if weights_dir:
+        fnm = os.path.join(weights_dir, "{2}_{3}_{0}_{1}.npz".format(*key))
+        if os.path.exists(fnm):
+            weights = scipy.sparse.load_npz(fnm).tocsr()
+
+    if weights is None:
+        logger.debug(
+            "Computing the {} {} regridding weights from a {} to a {} grid".format(
+                regrid_tool, regrid_method, src_grid.shape, dst_grid.shape
+            )
+        )
+        weights = _compute_esmf_conservative_weights(src_grid, dst_grid)
+        if fnm:
+            disk_cache.save(fnm, lambda path: scipy.sparse.save_npz(path, weights))
+
+    _weights[key] = weights
+    return weights
+
+
+def _has_cached_weights_support(var, src_grid, dst_grid, regrid_tool, regrid_method):
+    if regrid_tool.lower() != "esmf":
+        return False
+    if regrid_method.lower() not in CONSERVATIVE_METHODS:
+        return False
+    if not var.getOrder().endswith("yx"):
+        return False
+
+    for grid in [src_grid, dst_grid]:
+        if not isinstance(grid, cdms2.grid.AbstractRectGrid):
+            return False
+        if grid.getLatitude().getBounds() is None:
+            return False
+        if grid.getLongitude().getBounds() is None:
+            return False
+
+    return True
+
+
+def get_grid_key(grid):
+    """The hash of grid if it's a rectilinear grid with bounds, or None."""
+    if not isinstance(grid, cdms2.grid.AbstractRectGrid):
+        return None
+    if grid.getLatitude().getBounds() is None:
+        return None
+    if grid.getLongitude().getBounds() is None:
+        return None
+
+    return _grid_hash(grid)
+
+
+def _grid_hash(grid):
+    """A hash of the coordinates and of the cell bounds of a rectilinear grid."""
+    h = hashlib.sha1()
+    for axis in [grid.getLatitude(), grid.getLongitude()]:
+        h.update(np.ascontiguousarray(axis[:], dtype=np.float64).tobytes())
+        h.update(np.ascontiguousarray(axis.getBounds(), dtype=np.float64).tobytes())
+
+    return h.hexdigest()
+
+
+def _get_lat_weights(src_lat, dst_lat):
+    """
+    The (destination, source) overlaps in sin(lat) of the latitude bands of
+    the axes src_lat and dst_lat, normalized by the destination bands.
+    """
+    sin_bounds = []
+    for axis in [src_lat, dst_lat]:
+        bounds = axis.getBounds()
+        if bounds is None:
+            bounds = _get_lat_bounds(axis[:])
+        sin_bounds.append(np.sin(np.deg2rad(np.sort(bounds, axis=1))))
+    (src_lo, src_hi), (dst_lo, dst_hi) = [b.T for b in sin_bounds]
+
+    overlap = np.minimum(dst_hi[:, np.newaxis], src_hi) - np.maximum(
+        dst_lo[:, np.newaxis], src_lo
+    )
+    overlap = np.maximum(overlap, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weights = overlap / (dst_hi - dst_lo)[:, np.newaxis]
+
+    return np.nan_to_num(weights)
+
+
+def _get_lat_bounds(lat):
+    """The bounds halfway between the latitudes lat, limited to the poles."""
+    lat = np.asarray(lat, dtype=np.float64)
+    edges = np.concatenate(
+        [
+            [1.5 * lat[0] - 0.5 * lat[1]],
+            0.5 * (lat[1:] + lat[:-1]),
+            [1.5 * lat[-1] - 0.5 * lat[-2]],
+        ]
+    )
+    edges = np.clip(edges, -90.0, 90.0)
+
+    return np.stack([edges[:-1], edges[1:]], axis=1)
+
+
+def _interp_lat(data, valid, src_lat, dst_lat):
+    """
+    Interpolate the (rows, latitude) data linearly from src_lat to dst_lat.
+    Return the result and where it has no data: outside of src_lat, or next
+    to a source latitude that isn't valid.
+    """
+    order = np.argsort(src_lat)
+    src_lat = np.asarray(src_lat, dtype=np.float64)[order]
+    data = data[:, order]
+    valid = valid[:, order]
+    dst_lat = np.asarray(dst_lat, dtype=np.float64)
+
+    above = np.searchsorted(src_lat, dst_lat, side="right")
+    above = np.clip(above, 1, len(src_lat) - 1)
+    below = above - 1
+    weight = (dst_lat - src_lat[below]) / (src_lat[above] - src_lat[below])
+    weight = np.clip(weight, 0, 1)
+
+    result = data[:, below] * (1 - weight) + data[:, above] * weight
+    no_data = (
+        (dst_lat < src_lat[0])
+        | (dst_lat > src_lat[-1])
+        | (~valid[:, below] & (weight < 1))
+        | (~valid[:, above] & (weight > 0))
+    )
+
+    return result, no_data
+
+
+def _create_esmf_grid(ESMF, grid):
+    lat = grid.getLatitude()
+    lon = grid.getLongitude()
+    nlat = len(lat)
+    nlon = len(lon)
+
+    # ESMF grids are in Fortran order, so a (lon, lat) grid has the same
+    # cell sequence as the (lat, lon) grid of the variables in C order.
+    esmf_grid = ESMF.Grid(
+        np.array([nlon, nlat]),
+        staggerloc=[ESMF.StaggerLoc.CENTER, ESMF.StaggerLoc.CORNER],
+        coord_sys=ESMF.CoordSys.SPH_DEG,
+    )
+
+    lat_bnds = lat.getBounds()
+    lon_bnds = lon.getBounds()
+    corners = [
+        np.append(lon_bnds[:, 0], lon_bnds[-1, 1]),
+        np.append(lat_bnds[:, 0], lat_bnds[-1, 1]),
+    ]
+    centers = [lon[:], lat[:]]
+
+    for staggerloc, coords in [
+        (ESMF.StaggerLoc.CENTER, centers),
+        (ESMF.StaggerLoc.CORNER, corners),
+    ]:
+        lon_coords, lat_coords = np.meshgrid(coords[0], coords[1], indexing="ij")
+        esmf_grid.get_coords(0, staggerloc=staggerloc)[...] = lon_coords
+        esmf_grid.get_coords(1, staggerloc=staggerloc)[...] = lat_coords
+
+    return esmf_grid
+
+
+def _compute_esmf_conservative_weights(src_grid, dst_grid):
+    try:
+        import ESMF
+    except ImportError:
+        import esmpy as ESMF
+
+    src_field = ESMF.Field(_create_esmf_grid(ESMF, src_grid))
+    dst_field = ESMF.Field(_create_esmf_grid(ESMF, dst_grid))
+
+    regrid_obj = ESMF.Regrid(
+        src_field,
+        dst_field,
+        regrid_method=ESMF.RegridMethod.CONSERVE,
+        unmapped_action=ESMF.UnmappedAction.IGNORE,
+        factors=True,
+    )
+    factor_index_list, factor_list = regrid_obj.get_factors(deep_copy=True)
+    regrid_obj.destroy()
+
+    n_src = src_grid.shape[0] * src_grid.shape[1]
+    n_dst = dst_grid.shape[0] * dst_grid.shape[1]
+    # The indices are 1-based sequence indices of the fields.
+    weights = scipy.sparse.csr_matrix(
+        (factor_list, (factor_index_list[:, 1] - 1, factor_index_list[:, 0] - 1)),
+        shape=(n_dst, n_src),
+    )
+
+    return weights
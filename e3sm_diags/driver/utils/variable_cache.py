@@ -0,0 +1,127 @@
+"""
+A cache of the climo variables of the process.
+
+Each set gets its climo variables from its own ``Dataset``, so a run of all
+of the sets would read and derive the same variable for the same season once
+per set. Here the variables returned by ``Dataset.get_climo_variable()`` are
+kept for the whole process, keyed by where they are read from (the climo file,
+or the timeseries data path and years), the variable and its extra variables,
+the season and the derivation, so each one is only read and derived once.
+
+The cache is opt-in: it's disabled unless ``max_mb`` is set, from the
+``variable_cache_mb`` parameter. It holds at most ``max_mb`` megabytes, the
+least recently used variables are dropped when it's full.
+
+The cache keeps the variables it's given and only returns copies of them, so
+the sets can modify the variables they get. Each variable is copied once per
+use: by add() for the set that read it, and by get() for the others.
+"""
+import collections
+from typing import Any, List, Optional, Tuple
+
+import numpy
+
+from e3sm_diags.logger import custom_logger
+
+logger = custom_logger(__name__)
+
+# The size of the cache in megabytes, nothing is cached if it's 0 or None.
+max_mb: Optional[float] = 0
+
+# The variables of this process, from the least to the most recently used.
+_variables: "collections.OrderedDict[Tuple[Any, ...], List[Any]]" = (
+    collections.OrderedDict()
+)
+_num_bytes = 0
+
+# The number of variables found in and added to the cache.
+stats = {"hits": 0, "misses": 0}
+
+
+def set_max_mb(mb: Optional[float]):
+    """Cache at most mb megabytes of variables, or nothing if mb is 0 or None."""
+    global max_mb
+    max_mb = mb
+    _evict()
+
+
+def get(key):
+    """Return copies of the variables cached for key, or None."""
+    try:
+        variables = _variables.get(key)
+    except TypeError:
+        # Variables derived with unhashable arguments aren't cached.
+        variables = None
+    if variables is None:
+        stats["misses"] += 1
+        return None
+
+    stats["hits"] += 1
+    _variables.move_to_end(key)
+    return [v.clone() for v in variables]
+
+
+def add(key, variables):
+    """
+    Cache the variables for key, if they fit in the cache.
+
+    The variables are then owned by the cache, so copies of them are
+    returned for the caller to use, or the variables themselves if they
+    weren't cached.
+    """
+    global _num_bytes
+    if not max_mb:
+        return variables
+    num_bytes = sum(_get_num_bytes(v) for v in variables)
+    if num_bytes > max_mb * 1024**2:
+        return variables
+    try:
+        hash(key)
+    except TypeError:
+        return variables
+
+    if key in _variables:
+        _num_bytes -= sum(_get_num_bytes(v) for v in _variables.pop(key))
+    _variables[key] = variables
+    _num_bytes += num_bytes
+    _evict()
+
+    return [v.clone() for v in variables]
+
+
+def clear():
+    global _num_bytes
+    _variables.clear()
+    _num_bytes = 0
+
+
+def log_stats():
+    """Log how many of the climo variables were found in the cache."""
+    total = stats["hits"] + stats["misses"]
+    if total:
+        logger.info(
+            "{} of {} climo variables were found in the variable cache.".format(
+                stats["hits"], total
+            )
+        )
+
+    stats["hits"] = 0
+    stats["misses"] = 0
+
+
+def _evict():
+    """Drop the least recently used variables until the cache fits in max_mb."""
+    global _num_bytes
+    max_bytes = (max_mb or 0) * 1024**2
+    while _variables and _num_bytes > max_bytes:
+        _, variables = _variables.popitem(last=False)
+        _num_bytes -= sum(_get_num_bytes(v) for v in variables)
+
+
+def _get_num_bytes(var):
+    num_bytes = var.size * var.dtype.itemsize
+    mask = numpy.ma.getmask(var)
+    if mask is not numpy.ma.nomask:
+        num_bytes += mask.size
+
+    return num_bytes
@@ -0,0 +1,314 @@
+"""
+Log-linear interpolation of variables to pressure levels.
+
+This is the interpolation of ``cdutil.vertical.logLinearInterpolation()``,
+done for all of the target pressure levels at once. The pressure levels
+bracketing each target level are found with a binary search along the
+level axis of each column, instead of comparing every level of the
+variable with every target level. The pressure of the variable can be a
+full field, ex: reconstructed from hybrid levels, or just the 1D level axis,
+which is never grown to the size of the variable.
+
+The columns are interpolated COLUMNS_PER_CHUNK at a time, so only the
+indices and weights of a chunk are held in memory, and the result is in
+float32 like ``logLinearInterpolation()``.
+
+The 3D variables of a season on hybrid levels share the pressure rebuilt from
+hyam, hybm and PS, so the pressure of the (dataset, season, grid) is cached,
+with the indices and weights of each list of target levels it was
+interpolated to. Every 3D variable after the first is then only a gather and
+a multiply-add. At most MAX_CACHED_MB megabytes of pressures and weights are
+cached, the least recently used are dropped first.
+"""
+import collections
+import hashlib
+from typing import Any, Dict, Optional
+
+import cdms2
+import numpy as np
+
+from e3sm_diags.logger import custom_logger
+
+logger = custom_logger(__name__)
+
+# The number of columns interpolated at a time, all of them if None.
+COLUMNS_PER_CHUNK = 65536
+
+# The megabytes of pressures and interpolation weights that are cached.
+MAX_CACHED_MB = 512
+
+# The pressure and the interpolation weights of a (dataset, season, grid),
+# the weights keyed by the target levels and the columns of the chunk.
+CachedPressure = collections.namedtuple("CachedPressure", ["pressure", "weights"])
+
+# The cached pressures, from the least to the most recently used.
+_pressures: "collections.OrderedDict[Any, CachedPressure]" = collections.OrderedDict()
+
+# The number of pressures found in and added to the cache.
+stats = {"hits": 0, "misses": 0}
+
+
+def get_cached_pressure(key, compute_pressure):
+    """
+    Return the CachedPressure of key, with the pressure computed by
+    compute_pressure() if it isn't cached.
+    """
+    cached = _pressures.get(key)
+    if cached is not None:
+        stats["hits"] += 1
+        _pressures.move_to_end(key)
+        # The weights added since the last call are only counted now.
+        _evict()
+        return cached
+
+    stats["misses"] += 1
+    cached = CachedPressure(compute_pressure(), {})
+    _pressures[key] = cached
+    _evict()
+
+    return cached
+
+
+def get_grid_key(var):
+    """The key of the shape and axes of var, for the pressure cache."""
+    h = hashlib.sha1()
+    for axis in var.getAxisList():
+        h.update(axis.id.encode())
+        h.update(np.ascontiguousarray(axis[:], dtype=np.float64).tobytes())
+
+    return (var.shape, h.hexdigest())
+
+
+def clear():
+    _pressures.clear()
+
+
+def log_stats():
+    """Log how many of the 3D variables reused a cached pressure."""
+    total = stats["hits"] + stats["misses"]
+    if total:
+        logger.info(
+            "{} of {} variables on hybrid levels reused a cached pressure.".format(
+                stats["hits"], total
+            )
+        )
+
+    stats["hits"] = 0
+    stats["misses"] = 0
+
+
+def _evict():
+    """
+    Drop the least recently used pressures until the cache fits in
+    MAX_CACHED_MB, always keeping the most recently used one.
+    """
+    num_bytes = sum(_get_num_bytes(cached) for cached in _pressures.values())
+    while len(_pressures) > 1 and num_bytes > MAX_CACHED_MB * 1024**2:
+        _, dropped = _pressures.popitem(last=False)
+        num_bytes -= _get_num_bytes(dropped)
+
+
+def _get_num_bytes(cached):
+    """The bytes of the pressure and of the weights of a CachedPressure."""
+    arrays = [cached.pressure]
+    for weights in cached.weights.values():
+        arrays.extend(weights)
+
+    return sum(np.ma.getdata(a).nbytes for a in arrays)
+
+
+def hybrid_to_pressure(hyam, hybm, ps, p0=1000.0):
+    """
+    Return the pressure on the hybrid levels, as a (lev, ...) array in the
+    units of p0 and ps, like ``cdutil.vertical.reconstructPressureFromHybrid``.
+    """
+    hyam = np.ma.filled(hyam, np.nan).astype(np.float64).reshape(-1)
+    hybm = np.ma.filled(hybm, np.nan).astype(np.float64).reshape(-1)
+    ps = np.ma.filled(ps, np.nan).astype(np.float64)
+    shape = (len(hyam),) + (1,) * ps.ndim
+
+    return hyam.reshape(shape) * p0 + hybm.reshape(shape) * ps[np.newaxis]
+
+
+def log_linear_interpolation(
+    var, pressure, plev, units=None, weights_cache: Optional[Dict[Any, Any]] = None
+):
+    """
+    Interpolate the transient variable var to the pressure levels plev.
+
+    pressure is the pressure on the levels of var, either a 1D array for
+    pressure levels, or an array with the shape of var with the level axis
+    first and the other axes in the order of var. Values outside of the
+    range of pressure of a column are masked, as are values interpolated
+    from masked values.
+
+    If weights_cache is a dict, the weights are looked up in and added to it,
+    so it must only be used with this pressure, ex: CachedPressure.weights.
+    """
+    plev = np.atleast_1d(np.asarray(plev, dtype=np.float64))
+    order = var.getOrder()
+    if "z" not in order:
+        raise RuntimeError("Variable {} has no vertical level.".format(var.id))
+    z = order.index("z")
+
+    # The levels first, for the data and the mask.
+    v = var.asma()
+    data = np.moveaxis(np.ma.getdata(v), z, 0)
+    shape = data.shape
+    if shape[0] < 2:
+        raise RuntimeError("Variable {} has less than 2 levels.".format(var.id))
+    data = data.astype(np.float32, copy=False).reshape(shape[0], -1)
+    mask = np.ma.getmask(v)
+    if mask is not np.ma.nomask:
+        mask = np.moveaxis(mask, z, 0).reshape(shape[0], -1)
+
+    pressure = np.asarray(pressure, dtype=np.float64)
+    if pressure.ndim > 1:
+        if pressure.shape != shape:
+            msg = "The pressure of shape {} doesn't match the shape {} of {}.".format(
+                pressure.shape, shape, var.id
+            )
+            raise RuntimeError(msg)
+        pressure = pressure.reshape(shape[0], -1)
+    # The interpolation needs the pressure increasing along the levels.
+    if _is_decreasing(pressure):
+        data = data[::-1]
+        pressure = pressure[::-1]
+        if mask is not np.ma.nomask:
+            mask = mask[::-1]
+
+    ncol = data.shape[1]
+    chunk = COLUMNS_PER_CHUNK or ncol
+    result = np.empty((len(plev), ncol), dtype=np.float32)
+    result_mask = np.empty((len(plev), ncol), dtype=bool)
+    for start in range(0, ncol, max(chunk, 1)):
+        end = min(start + chunk, ncol)
+        weights_key = (tuple(plev), start, end)
+        weights = None
+        if weights_cache is not None:
+            weights = weights_cache.get(weights_key)
+        if weights is None:
+            p = pressure if pressure.ndim == 1 else pressure[:, start:end]
+            weights = get_weights(p, plev)
+            if weights_cache is not None:
+                weights_cache[weights_key] = weights
+        result[:, start:end], result_mask[:, start:end] = apply_weights(
+            data[:, start:end],
+            mask if mask is np.ma.nomask else mask[:, start:end],
+            weights,
+        )
+
+    result = np.ma.masked_array(
+        result.reshape((len(plev),) + shape[1:]),
+        mask=result_mask.reshape((len(plev),) + shape[1:]),
+    )
+
+    auto_bounds = cdms2.getAutoBounds()
+    cdms2.setAutoBounds("off")
+    lev = cdms2.createAxis(plev, id="plev")
+    cdms2.setAutoBounds(auto_bounds)
+    lev.designateLevel()
+    if units is not None:
+        lev.units = units
+
+    axes = var.getAxisList()
+    axes = [lev] + axes[:z] + axes[z + 1 :]
+    var_p = cdms2.createVariable(result, axes=axes, id=var.id)
+    for att in var.listattributes():
+        setattr(var_p, att, getattr(var, att))
+
+    return var_p(order=order)
+
+
+def get_weights(pressure, plev):
+    """
+    Return the index of the level below (lower pressure) each target level
+    in plev, the weight of the level above it and whether the target level
+    is in the range of pressure, as (plev, columns) arrays.
+
+    pressure is increasing along its first axis, and is either 1D or
+    (levels, columns).
+    """
+    nlev = pressure.shape[0]
+    if pressure.ndim == 1:
+        # The number of levels with a pressure <= each target level.
+        r = np.searchsorted(pressure, plev, side="right")[:, np.newaxis]
+        pressure = pressure[:, np.newaxis]
+    else:
+        # The columns without a pressure on every level are masked.
+        no_pressure = np.isnan(pressure).any(axis=0)
+        if no_pressure.any():
+            pressure = pressure.copy()
+            pressure[:, no_pressure] = np.arange(nlev)[:, np.newaxis]
+        r = _searchsorted_columns(pressure, plev)
+        r[:, no_pressure] = 0
+    ncol = pressure.shape[1]
+
+    # A target level equal to the last pressure is interpolated
+    # between the last two levels.
+    last = np.broadcast_to(pressure[-1], (len(plev), ncol))
+    r = np.where((r == nlev) & (plev[:, np.newaxis] == last), nlev - 1, r)
+    valid = (r >= 1) & (r <= nlev - 1)
+    above = np.clip(r, 1, max(nlev - 1, 1))
+    below = above - 1
+
+    p_below = np.take_along_axis(pressure, below, axis=0)
+    p_above = np.take_along_axis(pressure, above, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.log(plev[:, np.newaxis] / p_below) / np.log(p_above / p_below)
+    weight = np.where(valid, weight, 0).astype(np.float32)
+
+    return below, weight, valid
+
+
+def apply_weights(data, mask, weights):
+    """
+    Return the values interpolated from data, a (levels, columns) array, with
+    the weights of get_weights() and their mask.
+    """
+    below, weight, valid = weights
+    if below.shape[1] != data.shape[1]:
+        below = np.broadcast_to(below, (below.shape[0], data.shape[1]))
+    above = below + 1
+
+    data_below = np.take_along_axis(data, below, axis=0)
+    data_above = np.take_along_axis(data, above, axis=0)
+    # A target level equal to the pressure of a level has that value,
+    # even if the other level is masked.
+    exact = weight == 0
+    result = np.where(
+        exact, data_below, data_below + weight * (data_above - data_below)
+    )
+
+    result_mask = ~valid
+    if mask is not np.ma.nomask:
+        result_mask = result_mask | np.take_along_axis(mask, below, axis=0)
+        result_mask = result_mask | (np.take_along_axis(mask, above, axis=0) & ~exact)
+
+    return result, np.broadcast_to(result_mask, result.shape)
+
+
+def _searchsorted_columns(pressure, plev):
+    """
+    np.searchsorted(pressure[:, i], plev, side="right") for each column i of
+    pressure, as a single binary search over all of the columns. Each column
+    is shifted by a multiple of a span larger than the range of pressure, so
+    the columns are sorted one after the other.
+    """
+    nlev, ncol = pressure.shape
+    lo = np.nanmin(pressure)
+    span = 2 * (np.nanmax(pressure) - lo) + 1
+    offsets = np.arange(ncol) * span
+    shifted = (pressure - lo + offsets).T.ravel()
+    # The targets outside of the range of pressure are moved next to it,
+    # so they stay between the previous and the next columns.
+    targets = np.clip(plev - lo, -0.5, span / 2)[:, np.newaxis] + offsets
+
+    r = np.searchsorted(shifted, targets.ravel(), side="right").reshape(targets.shape)
+    return np.clip(r - np.arange(ncol) * nlev, 0, nlev)
+
+
+def _is_decreasing(pressure):
+    first = np.nanmean(pressure[0])
+    last = np.nanmean(pressure[-1])
+    return first > last
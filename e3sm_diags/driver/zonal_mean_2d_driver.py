@@ -1,13 +1,10 @@
 from __future__ import print_function
 
-import os
-
 import cdms2
 import cdutil
 import MV2
 import numpy
 
-import e3sm_diags
 from e3sm_diags.driver import utils
 from e3sm_diags.logger import custom_logger
 from e3sm_diags.metrics import corr, max_cdms, mean, min_cdms, rmse
@@ -86,16 +83,7 @@ def run_diag(parameter, default_plevs=ZonalMean2dParameter().plevs):
         )
 
         # Get land/ocean fraction for masking.
-        try:
-            land_frac = test_data.get_climo_variable("LANDFRAC", season)
-            ocean_frac = test_data.get_climo_variable("OCNFRAC", season)
-        except Exception:
-            mask_path = os.path.join(
-                e3sm_diags.INSTALL_PATH, "acme_ne30_ocean_land_mask.nc"
-            )
-            with cdms2.open(mask_path) as f:
-                land_frac = f("LANDFRAC")
-                ocean_frac = f("OCNFRAC")
+        land_frac, ocean_frac = utils.mask.get_land_ocean_fracs(test_data, season)
 
         for var in variables:
             logger.info("Variable: {}".format(var))
@@ -171,27 +159,43 @@ def run_diag(parameter, default_plevs=ZonalMean2dParameter().plevs):
                     mv1_p.units = "ppm"
                     mv2_p = mv2_p * 1000.0
                     mv2_p.units = "ppm"
-                # Regrid towards the lower resolution of the two
-                # variables for calculating the difference.
-                mv1_p_reg, mv2_p_reg = utils.general.regrid_to_lower_res(
-                    mv1_p,
-                    mv2_p,
-                    parameter.regrid_tool,
-                    parameter.regrid_method,
-                )
+                if parameter.zonal_mean_first:
+                    # Only the zonal means are regridded, in latitude, which
+                    # is the same as regridding the fields and then averaging
+                    # them for fields without missing values on global grids.
+                    mv1_p = cdutil.averager(mv1_p, axis="x")
+                    mv2_p = cdutil.averager(mv2_p, axis="x")
+
+                    mv1_reg, mv2_reg = utils.general.regrid_zonal_means_to_lower_res(
+                        mv1_p, mv2_p, parameter.regrid_method
+                    )
+                    diff = mv1_reg - mv2_reg
+
+                    # Make sure mv1_reg and mv2_reg have same mask
+                    mv1_reg = mv2_reg + diff
+                    mv2_reg = mv1_reg - diff
+                else:
+                    # Regrid towards the lower resolution of the two
+                    # variables for calculating the difference.
+                    mv1_p_reg, mv2_p_reg = utils.general.regrid_to_lower_res(
+                        mv1_p,
+                        mv2_p,
+                        parameter.regrid_tool,
+                        parameter.regrid_method,
+                    )
 
-                diff_p = mv1_p_reg - mv2_p_reg
-                diff = cdutil.averager(diff_p, axis="x")
+                    diff_p = mv1_p_reg - mv2_p_reg
+                    diff = cdutil.averager(diff_p, axis="x")
 
-                mv1_p = cdutil.averager(mv1_p, axis="x")
-                mv2_p = cdutil.averager(mv2_p, axis="x")
+                    mv1_p = cdutil.averager(mv1_p, axis="x")
+                    mv2_p = cdutil.averager(mv2_p, axis="x")
 
-                # Make sure mv1_p_reg and mv2_p_reg have same mask
-                mv1_p_reg = mv2_p_reg + diff_p
-                mv2_p_reg = mv1_p_reg - diff_p
+                    # Make sure mv1_p_reg and mv2_p_reg have same mask
+                    mv1_p_reg = mv2_p_reg + diff_p
+                    mv2_p_reg = mv1_p_reg - diff_p
 
-                mv1_reg = cdutil.averager(mv1_p_reg, axis="x")
-                mv2_reg = cdutil.averager(mv2_p_reg, axis="x")
+                    mv1_reg = cdutil.averager(mv1_p_reg, axis="x")
+                    mv2_reg = cdutil.averager(mv2_p_reg, axis="x")
 
                 parameter.output_file = "-".join(
                     [ref_name, var, season, parameter.regions[0]]
@@ -164,19 +164,22 @@ def run_diag(parameter):
                     mv2, plev, test_data, var, season
                 )
 
+                # The zonal means of all of the plevs are computed at once,
+                # on the native grids, and only they are regridded.
+                mv1_p_zonal = cdutil.averager(mv1_p, axis="x")
+                mv2_p_zonal = cdutil.averager(mv2_p, axis="x")
+
                 # Select plev.
                 for ilev in range(len(plev)):
-                    mv1 = mv1_p[
+                    mv1_zonal = mv1_p_zonal[
                         ilev,
                     ]
-                    mv2 = mv2_p[
+                    mv2_zonal = mv2_p_zonal[
                         ilev,
                     ]
 
                     for region in regions:
                         logger.info(f"Selected region: {region}")
-                        mv1_zonal = cdutil.averager(mv1, axis="x")
-                        mv2_zonal = cdutil.averager(mv2, axis="x")
 
                         # Regrid towards the lower resolution of the two
                         # variables for calculating the difference.
@@ -223,11 +226,11 @@ def run_diag(parameter):
 
             # For variables without a z-axis.
             elif mv1.getLevel() is None and mv2.getLevel() is None:
+                mv1_zonal = cdutil.averager(mv1, axis="x")
+                mv2_zonal = cdutil.averager(mv2, axis="x")
+
                 for region in regions:
                     logger.info(f"Selected region: {region}")
-                    mv1_zonal = cdutil.averager(mv1, axis="x")
-                    mv2_zonal = cdutil.averager(mv2, axis="x")
-
                     mv1_reg, mv2_reg = regrid_to_lower_res_1d(mv1_zonal, mv2_zonal)
 
                     diff = mv1_reg - mv2_reg
@@ -11,10 +11,13 @@ from typing import Dict, Tuple
 import cdp.cdp_run
 
 import e3sm_diags
+from e3sm_diags.driver.utils import disk_cache, variable_cache
+from e3sm_diags.driver.utils.regrid import set_weights_dir
 from e3sm_diags.logger import custom_logger
 from e3sm_diags.parameter.core_parameter import CoreParameter
 from e3sm_diags.parser import SET_TO_PARSER
 from e3sm_diags.parser.core_parser import CoreParser
+from e3sm_diags.scheduler import log_cache_stats, run_tasks, split_tasks
 from e3sm_diags.viewer.main import create_viewer
 
 logger = custom_logger(__name__)
@@ -261,6 +264,9 @@ def run_diag(parameters):
     For a single set of parameters, run the corresponding diags.
     """
     results = []
+    set_weights_dir(parameters.regrid_weights_dir)
+    disk_cache.set_cache_dir(parameters.cache_dir)
+    variable_cache.set_max_mb(parameters.variable_cache_mb)
     for set_name in parameters.sets:
 
         parameters.current_set = set_name
@@ -308,11 +314,16 @@ def main(parameters=[]):
         save_provenance(parameters[0].results_dir, parser)
 
     if parameters[0].multiprocessing:
-        parameters = cdp.cdp_run.multiprocess(run_diag, parameters, context="fork")
+        # Split the parameters into (set, variable, season, plev, region)
+        # tasks, so a single slow variable doesn't hold up a whole worker.
+        tasks = split_tasks(parameters)
+        expected_parameters = create_parameter_dict([t.parameter for t in tasks])
+        parameters = run_tasks(run_diag, tasks, parameters[0].num_workers)
     elif parameters[0].distributed:
         parameters = cdp.cdp_run.distribute(run_diag, parameters)
     else:
         parameters = cdp.cdp_run.serial(run_diag, parameters)
+        log_cache_stats()
 
     parameters = _collapse_results(parameters)
 
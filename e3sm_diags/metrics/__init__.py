@@ -1,3 +1,7 @@
+import collections
+from typing import Tuple
+
+import cdms2
 import cdutil
 import genutil
 import numpy
@@ -6,6 +10,15 @@ from e3sm_diags.logger import custom_logger
 
 logger = custom_logger(__name__)
 
+# The most megabytes of area weights cached.
+MAX_CACHED_MB = 64
+
+# The area weights of each lat/lon grid, keyed by the bounds of the grid, from
+# the least to the most recently used.
+_area_weights: "collections.OrderedDict[Tuple[bytes, bytes], numpy.ndarray]" = (
+    collections.OrderedDict()
+)
+
 
 def corr(model, obs, axis="xy"):
     corr = -numpy.infty
@@ -48,3 +61,99 @@ def std(variable, axis="xy"):
         logger.error(err)
 
     return std
+
+
+def area_weights(variable):
+    """
+    Return the (lat, lon) area weights of a 2D lat/lon variable, which are
+    the weights ``weights="generate"`` uses, or None if it's on another grid.
+    The weights of each grid are only computed once, at most MAX_CACHED_MB
+    megabytes of weights are cached, the least recently used are dropped first.
+    """
+    grid = variable.getGrid()
+    if not isinstance(grid, cdms2.grid.AbstractRectGrid):
+        return None
+    if variable.getOrder() != "yx":
+        return None
+
+    lat_bnds = grid.getLatitude().getBounds()
+    lon_bnds = grid.getLongitude().getBounds()
+    if lat_bnds is None or lon_bnds is None:
+        return None
+
+    key = (lat_bnds.tobytes(), lon_bnds.tobytes())
+    weights = _area_weights.get(key)
+    if weights is None:
+        lat_weights, lon_weights = grid.getWeights()
+        weights = numpy.outer(lat_weights, lon_weights)
+        _add_area_weights(key, weights)
+    else:
+        _area_weights.move_to_end(key)
+
+    return weights
+
+
+def _add_area_weights(key, weights):
+    """Cache weights, dropping the least recently used over MAX_CACHED_MB."""
+    _area_weights[key] = weights
+    num_bytes = sum(w.nbytes for w in _area_weights.values())
+    while len(_area_weights) > 1 and num_bytes > MAX_CACHED_MB * 1024**2:
+        _, dropped = _area_weights.popitem(last=False)
+        num_bytes -= dropped.nbytes
+
+
+def _weighted_moments(data, valid, weights):
+    """
+    Return the sum of the weights and the weighted mean of the valid values
+    of data, with the weighted deviations from the mean.
+    """
+    w = numpy.where(valid, weights, 0.0)
+    sum_of_weights = w.sum()
+    mean = (w * data).sum() / sum_of_weights
+    return w, sum_of_weights, mean, data - mean
+
+
+def field_metrics(variable, weights, with_std=False):
+    """
+    The min, max, area weighted mean and optionally the area weighted
+    std of a 2D variable, computed together from a single read of its data.
+    Same as ``min_cdms()``, ``max_cdms()``, ``mean()`` and ``std()``, up to
+    the rounding of the float64 sums, for a variable with valid values.
+    """
+    v = variable.asma()
+    valid = ~numpy.ma.getmaskarray(v)
+    data = numpy.ma.getdata(v).astype(numpy.float64)
+
+    w, sum_of_weights, mean, deviations = _weighted_moments(data, valid, weights)
+    values = data[valid]
+    metrics = {
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": float(mean),
+    }
+    if with_std:
+        metrics["std"] = float(numpy.sqrt((w * deviations**2).sum() / sum_of_weights))
+
+    return metrics
+
+
+def rmse_corr(model, obs, weights):
+    """
+    The area weighted rmse and correlation of two 2D variables on the same
+    grid, over the points valid in both. Same as ``rmse()`` and ``corr()``,
+    up to the rounding of the float64 sums, if there are any such points.
+    """
+    m = model.asma()
+    o = obs.asma()
+    valid = ~(numpy.ma.getmaskarray(m) | numpy.ma.getmaskarray(o))
+    m = numpy.ma.getdata(m).astype(numpy.float64)
+    o = numpy.ma.getdata(o).astype(numpy.float64)
+
+    w, sum_of_weights, _, m_dev = _weighted_moments(m, valid, weights)
+    _, _, _, o_dev = _weighted_moments(o, valid, weights)
+    rmse = numpy.sqrt((w * (m - o) ** 2).sum() / sum_of_weights)
+    corr = (w * m_dev * o_dev).sum() / numpy.sqrt(
+        (w * m_dev**2).sum() * (w * o_dev**2).sum()
+    )
+
+    return {"rmse": float(rmse), "corr": float(corr)}
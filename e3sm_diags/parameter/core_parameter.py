@@ -11,6 +11,16 @@ class CoreParameter(cdp.cdp_parameter.CDPParameter):
         # self.test_data_path = ''
         self.ref_timeseries_input = False
         self.test_timeseries_input = False
+        # If set, the climatologies of timeseries files are computed by
+        # reading at most this many megabytes of each variable at a time.
+        self.climo_chunk_mb = None
+        # If set, the climo variables are cached in memory for all of the
+        # sets, up to this many megabytes.
+        self.variable_cache_mb = 0
+        # SCRIP/ESMF map files to remap test and ref data on native grids,
+        # ex: ne30pg2, to lat/lon grids when they're read.
+        self.test_map_file = ""
+        self.ref_map_file = ""
 
         self.sets = [
             "zonal_mean_xy",
@@ -36,6 +46,11 @@ class CoreParameter(cdp.cdp_parameter.CDPParameter):
         self.regions = ["global"]
         self.regrid_tool = "esmf"
         self.regrid_method = "conservative"
+        # The directory the regridding weights are saved in and reused from.
+        self.regrid_weights_dir = None
+        # The directory the file catalogs, TC obs metrics and GSIM matrices of
+        # the data paths are saved in and reused from.
+        self.cache_dir = None
         self.plevs = []
         self.plot_log_plevs = False
         self.plot_plevs = False
@@ -39,6 +39,9 @@ class ZonalMean2dParameter(CoreParameter):
         # ]
         self.plot_log_plevs = False
         self.plot_plevs = False
+        # Zonally average the variables before regridding them, so only
+        # the zonal means are regridded in latitude.
+        self.zonal_mean_first = False
         # Granulating plevs causes duplicate plots in this case.
         # So keep all of the default values except plevs.
         self.granulate.remove("plevs")
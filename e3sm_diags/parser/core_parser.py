@@ -130,6 +130,40 @@ class CoreParser(cdp.cdp_parser.CDPParser):
             required=False,
         )
 
+        self.add_argument(
+            "--climo_chunk_mb",
+            type=float,
+            dest="climo_chunk_mb",
+            help="Compute the climatologies of timeseries files by reading "
+            + "at most this many megabytes of each variable at a time.",
+            required=False,
+        )
+
+        self.add_argument(
+            "--variable_cache_mb",
+            type=float,
+            dest="variable_cache_mb",
+            help="Cache at most this many megabytes of climo variables "
+            + "in memory for all of the sets. Disabled by default.",
+            required=False,
+        )
+
+        self.add_argument(
+            "--test_map_file",
+            dest="test_map_file",
+            help="SCRIP/ESMF map file to remap the test data from its "
+            + "native grid to a lat/lon grid.",
+            required=False,
+        )
+
+        self.add_argument(
+            "--ref_map_file",
+            dest="ref_map_file",
+            help="SCRIP/ESMF map file to remap the reference data from its "
+            + "native grid to a lat/lon grid.",
+            required=False,
+        )
+
         self.add_argument(
             "--test_start_time_slice",
             dest="test_start_time_slice",
@@ -250,6 +284,21 @@ class CoreParser(cdp.cdp_parser.CDPParser):
             required=False,
         )
 
+        self.add_argument(
+            "--regrid_weights_dir",
+            dest="regrid_weights_dir",
+            help="Directory to save and reuse the regridding weights in.",
+            required=False,
+        )
+
+        self.add_argument(
+            "--cache_dir",
+            dest="cache_dir",
+            help="Directory to save and reuse the file catalogs, TC obs metrics "
+            + "and GSIM matrices of the data paths in.",
+            required=False,
+        )
+
         self.add_argument(
             "--case_id",
             dest="case_id",
@@ -41,3 +41,12 @@ class ZonalMean2dParser(CoreParser):
             const=True,
             required=False,
         )
+
+        self.add_argument(
+            "--zonal_mean_first",
+            dest="zonal_mean_first",
+            help="zonally average the variables before regridding them",
+            action="store_const",
+            const=True,
+            required=False,
+        )
@@ -1,4 +1,3 @@
-import math
 import os
 
 import matplotlib
@@ -16,133 +15,35 @@ logger = custom_logger(__name__)
 
 
 def plot_convection_onset_statistics(
-    test_pr, test_prw, ref_pr, ref_prw, parameter, region
+    test_stats, ref_stats, time_intervals, parameter, sitename, cwv_max
 ):
-    # Original code: Kathleen Schiro, python version 22 Dec 2016, University of California Dept. of Atmospheric and Oceanic Sciences
-    # Modifications: Baird Langenbrunner, Yi-Hung Kuo
-    # Modifications: Jill Zhang, Cheng Tao
-    # Scientific supervision: Prof. J David Neelin
-    #
-    # For related publications and research information see
-    # the Neelin group webpage  http://www.atmos.ucla.edu/~csi/ #
-
-    # Define precip threshold
-    precip_threshold = 0.5  # default 0.5 (in mm/hr)
-
-    # Define cwc bounds and bin_width for each site
-    if region == "twpc1":  # twpc1
-        cwv_max = 69
-        cwv_min = 28
-        bin_width = 1.5
-        sitename = "Manus Island"
-    if region == "twpc2":  # twpc2
-        cwv_max = 70
-        cwv_min = 28
-        bin_width = 2.0
-        sitename = "Nauru"
-    if region == "twpc3":  # twpc3
-        cwv_max = 85
-        cwv_min = 28
-        bin_width = 2.0
-        sitename = "Darwin"
-    if region == "sgp":  # sgp
-        cwv_max = 75
-        cwv_min = 20
-        bin_width = 2.0
-        sitename = "SGP"
-
+    """
+    Plot the convection onset statistics of test and ref, computed with
+    arm_diags_driver.get_convection_onset_statistics().
+    """
     fig, axes = plt.subplots(1, 3, figsize=(12, 3))
     fig.subplots_adjust(wspace=0.3)
     title = ""
     for index in range(2):
         if index == 0:
-            precip = test_pr
-            cwv = test_prw
+            stats = test_stats
             data_name = "Test: " + parameter.test_name_yrs
-            time_interval = 3
             line_color = ["black", "grey"]
         else:
-            precip = ref_pr
-            cwv = ref_prw
+            stats = ref_stats
             data_name = "Ref: " + parameter.ref_name
-            time_interval = 1
             line_color = ["blue", "steelblue"]
-        var_time_absolute = cwv.getTime().asComponentTime()
-        time_interval = int(var_time_absolute[1].hour - var_time_absolute[0].hour)
-
-        number_of_bins = int(np.ceil((cwv_max - cwv_min) / bin_width))
-        bin_center = np.arange(
-            (cwv_min + (bin_width / 2)),
-            (cwv_max - (bin_width / 2)) + bin_width,
-            bin_width,
-        )
-        if len(bin_center) != number_of_bins:
-            bin_center = np.arange(
-                (cwv_min + (bin_width / 2)), (cwv_max - (bin_width / 2)), bin_width
-            )
+        time_interval = time_intervals[index]
+
+        bin_center = stats.bin_center
+        number_of_bins = len(bin_center)
+        pr_binned_mean = stats.pr_binned_mean
+        pr_probability = stats.pr_probability
+        freq_cwv = stats.freq_cwv.copy()
+        freq_precipitating_points = stats.freq_precipitating_points.copy()
+        errorbar_precip = stats.errorbar_precip
+        errorbar_precip_binom = stats.errorbar_precip_binom
 
-        # Define variables for binning
-        bin_index = np.zeros([number_of_bins, cwv.size])
-        precip_binned = np.empty([number_of_bins, cwv.size]) * np.nan
-        precip_counts = np.zeros([number_of_bins, cwv.size])
-
-        np.warnings.filterwarnings("ignore")
-        # Bin the data by CWV value as specified above
-        for i in range(0, number_of_bins):
-            tmp1 = np.where(cwv > cwv_min + (i * bin_width))
-            bin_index[i, tmp1] = 1
-            tmp2 = np.where(cwv > cwv_min + (i * bin_width) + bin_width)
-            bin_index[i, tmp2] = 0
-
-        for i in range(0, number_of_bins):
-            tmp1 = np.where(bin_index[i, :] == 1)
-            precip_binned[i, tmp1] = precip[tmp1]
-            tmp2 = np.where(bin_index[i, :] != 1)
-            precip_binned[i, tmp2] = np.nan
-
-        for i in range(0, number_of_bins):
-            tmp1 = np.where(precip_binned[i, :] >= precip_threshold)
-            precip_counts[i, tmp1] = 1
-            for j in range(0, cwv.size):
-                if np.isnan(precip_binned[i, j]):
-                    precip_counts[i, j] = np.nan
-
-        # Create binned arrays
-        hist_cwv = np.empty([number_of_bins, 1]) * np.nan
-        hist_precip_points = np.empty([number_of_bins, 1]) * np.nan
-        pr_binned_mean = np.empty([number_of_bins, 1]) * np.nan
-        pr_binned_std = np.empty([number_of_bins, 1]) * np.nan
-        pr_probability = np.empty([number_of_bins, 1]) * np.nan
-        errorbar_precip_points = np.empty([number_of_bins, 1]) * np.nan
-        errorbar_precip = np.empty([number_of_bins, 1]) * np.nan
-
-        ###
-        errorbar_precip_binom = np.empty([number_of_bins, 2]) * np.nan
-
-        # Fill binned arrays
-        hist_cwv = bin_index.sum(axis=1)
-        hist_cwv[hist_cwv <= 1] = 0
-        hist_precip_points = np.nansum(precip_counts, axis=1)
-        hist_precip_points[hist_precip_points <= 1] = 0
-        pr_binned_mean = np.nanmean(precip_binned, axis=1)
-        pr_binned_std = np.nanstd(precip_binned, axis=1)
-        r = np.empty([1, number_of_bins]) * np.nan
-        r = np.sum(~np.isnan(precip_counts), axis=1)
-        pr_probability = np.nansum(precip_counts, axis=1) / r
-        freq_cwv = (hist_cwv / bin_width) / np.nansum(hist_cwv)
-        freq_precipitating_points = hist_precip_points / bin_width / np.nansum(hist_cwv)
-
-        for i in range(0, number_of_bins):
-            errorbar_precip[i] = pr_binned_std[i] / math.sqrt(hist_cwv[i])
-            errorbar_precip_points[i] = (
-                math.sqrt(hist_precip_points[i])
-                / np.nansum(hist_cwv / bin_width)
-                / bin_width
-            )
-            z = 0.675
-            phat = hist_precip_points[i] / hist_cwv[i]
-            errorbar_precip_binom[i, 0] = z * math.sqrt(phat * (1 - phat) / hist_cwv[i])
-            errorbar_precip_binom[i, 1] = z * math.sqrt(phat * (1 - phat) / hist_cwv[i])
         axes_fontsize = 12  # size of font in all plots
         legend_fontsize = 9
         marker_size = 40  # size of markers in scatter plots
@@ -73,9 +73,9 @@ def plot_panel_seasonality_map(
     ax = fig.add_axes(panel[panel_index], projection=proj)
     region_str = parameter.regions[0]
     region = regions_specs[region_str]
-    if "domain" in region.keys():  # type: ignore
+    if "domain" in region.keys():
         # Get domain to plot
-        domain = region["domain"]  # type: ignore
+        domain = region["domain"]
     else:
         # Assume global domain
         domain = cdutil.region.domain(latitude=(-90.0, 90, "ccb"))
@@ -372,9 +372,9 @@ def plot_panel_annual_map(panel_index, fig, proj, export, bias_array, panel, par
     ax = fig.add_axes(panel[panel_index], projection=proj)
     region_str = parameter.regions[0]
     region = regions_specs[region_str]
-    if "domain" in region.keys():  # type: ignore
+    if "domain" in region.keys():
         # Get domain to plot
-        domain = region["domain"]  # type: ignore
+        domain = region["domain"]
     else:
         # Assume global domain
         domain = cdutil.region.domain(latitude=(-90.0, 90, "ccb"))
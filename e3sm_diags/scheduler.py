@@ -0,0 +1,363 @@
+"""Fine-grained task scheduler for running the diagnostics in parallel.
+
+``cdp.cdp_run.multiprocess`` hands each parameter object to a worker as-is, so
+a parameter spanning several sets, variables, seasons, pressure levels or
+regions is run serially by a single worker. This module splits the parameters
+into the smallest independent units, a single (set, variable, season, plev,
+region), and runs them on a process pool, the most expensive ones first.
+
+The tasks form a two-stage graph. The read → derive stage of a variable and a
+season is shared by all of the tasks that use it: the sets, plevs and regions.
+The regrid → metrics → plot → write stage of each task is run by the driver of
+its set. When the variable cache is enabled (``variable_cache_mb``), the tasks
+of the climo sets sharing a read → derive stage are grouped and each group is
+run by a single worker, so the stage is only run once and the per-process
+caches (variables, land/ocean masks, pressure levels) are reused by the whole
+group. Otherwise, each task is submitted to the pool on its own.
+"""
+import copy
+import functools
+import multiprocessing
+import multiprocessing.util
+import time
+from typing import Any, Callable, List
+
+from e3sm_diags.driver.utils import regrid, variable_cache, vertical
+from e3sm_diags.driver.utils.dataset import Dataset
+from e3sm_diags.logger import custom_logger
+
+logger = custom_logger(__name__)
+
+# The attributes a parameter can be split on, in the order of the task key.
+# Only the attributes listed in a parameter's ``granulate`` are split on,
+# which keeps sets that need all of the values at once (e.g. the regions of
+# ``area_mean_time_series``) in a single task.
+TASK_ATTRS = ["variables", "seasons", "plevs", "regions"]
+
+# Relative cost of a single task for each set, used only to order the tasks.
+# Sets that read timeseries files or loop over the full vertical axis are
+# the slowest ones and are started first.
+SET_TO_COST = {
+    "zonal_mean_xy": 1,
+    "zonal_mean_2d": 4,
+    "zonal_mean_2d_stratosphere": 4,
+    "meridional_mean_2d": 4,
+    "lat_lon": 1,
+    "polar": 1,
+    "cosp_histogram": 1,
+    "area_mean_time_series": 6,
+    "enso_diags": 8,
+    "qbo": 4,
+    "streamflow": 6,
+    "diurnal_cycle": 4,
+    "arm_diags": 4,
+    "tc_analysis": 6,
+    "annual_cycle_zonal_mean": 6,
+}
+
+# The sets whose drivers read their variables with
+# ``Dataset.get_climo_variable(var, season)``, so their read → derive stage
+# can be run once for the whole task group.
+CLIMO_SETS = [
+    "zonal_mean_xy",
+    "zonal_mean_2d",
+    "zonal_mean_2d_stratosphere",
+    "meridional_mean_2d",
+    "lat_lon",
+    "polar",
+    "cosp_histogram",
+]
+
+
+class Task:
+    """A single unit of work: one parameter object for a single set."""
+
+    def __init__(self, parameter: Any):
+        self.parameter = parameter
+        self.set_name = parameter.sets[0]
+        self.cost = estimate_cost(parameter)
+
+    @property
+    def key(self):
+        """The (set, variable, season, plev, region) this task runs."""
+        values = [self.set_name]
+        for attr in TASK_ATTRS:
+            value = getattr(self.parameter, attr, [])
+            values.append(value[0] if len(value) == 1 else None)
+
+        return tuple(values)
+
+    @property
+    def group_key(self):
+        """The variables, seasons and test data read by this task."""
+        parameter = self.parameter
+        return (
+            tuple(getattr(parameter, "variables", [])),
+            tuple(getattr(parameter, "seasons", [])),
+            getattr(parameter, "test_data_path", None),
+            getattr(parameter, "test_timeseries_input", False),
+            getattr(parameter, "test_start_yr", None),
+            getattr(parameter, "test_end_yr", None),
+        )
+
+    def __repr__(self):
+        return "Task(key={}, cost={})".format(self.key, self.cost)
+
+
+class TaskGroup:
+    """The tasks sharing a read → derive stage, run by a single worker."""
+
+    def __init__(self, key: Any):
+        self.key = key
+        self.tasks: List[Task] = []
+
+    @property
+    def cost(self):
+        return sum(task.cost for task in self.tasks)
+
+    def __repr__(self):
+        return "TaskGroup(key={}, tasks={})".format(self.key, len(self.tasks))
+
+
+def estimate_cost(parameter: Any) -> float:
+    """Estimates the relative cost of running ``parameter``.
+
+    Parameters
+    ----------
+    parameter : CoreParameter
+        A parameter object with a single set.
+
+    Returns
+    -------
+    float
+        The estimated cost, only meaningful relative to other tasks.
+    """
+    cost = float(SET_TO_COST.get(parameter.sets[0], 1))
+
+    for attr in TASK_ATTRS:
+        cost *= max(len(getattr(parameter, attr, [])), 1)
+
+    # Timeseries input is climatologized on the fly, which dominates the
+    # runtime of a task.
+    if getattr(parameter, "test_timeseries_input", False):
+        cost *= 2
+    if getattr(parameter, "ref_timeseries_input", False):
+        cost *= 2
+
+    return cost
+
+
+def split_tasks(parameters: List[Any]) -> List[Task]:
+    """Splits the parameters into tasks that can run independently.
+
+    Each parameter is first split on its sets, then on every attribute in
+    both its ``granulate`` and ``TASK_ATTRS`` that still has more than one
+    value.
+
+    Parameters
+    ----------
+    parameters : List[CoreParameter]
+        The parameters to run.
+
+    Returns
+    -------
+    List[Task]
+        The tasks, sorted by decreasing cost.
+    """
+    tasks: List[Task] = []
+
+    for parameter in parameters:
+        for set_name in parameter.sets:
+            param = copy.deepcopy(parameter)
+            param.sets = [set_name]
+            tasks.extend(Task(p) for p in _split_on_attrs(param))
+
+    tasks.sort(key=lambda task: task.cost, reverse=True)
+
+    return tasks
+
+
+def _split_on_attrs(parameter: Any) -> List[Any]:
+    """Splits a parameter on each of its granulated attributes."""
+    params = [parameter]
+    granulate = getattr(parameter, "granulate", [])
+
+    for attr in TASK_ATTRS:
+        if attr not in granulate:
+            continue
+
+        split_params = []
+        for param in params:
+            values = getattr(param, attr, [])
+            if len(values) <= 1:
+                split_params.append(param)
+                continue
+
+            for value in values:
+                p = copy.deepcopy(param)
+                setattr(p, attr, [value])
+                split_params.append(p)
+
+        params = split_params
+
+    return params
+
+
+def group_tasks(tasks: List[Task]) -> List[TaskGroup]:
+    """Groups the tasks reading the same variables, seasons and test data.
+
+    Only the tasks of the climo sets with the variable cache enabled are
+    grouped, as only they share their read → derive stage. Every other task
+    is in a group of its own.
+
+    Parameters
+    ----------
+    tasks : List[Task]
+        The tasks, usually from ``split_tasks()``.
+
+    Returns
+    -------
+    List[TaskGroup]
+        The groups, sorted by decreasing cost. The tasks of a group keep
+        their order in ``tasks``.
+    """
+    groups = {}
+
+    for index, task in enumerate(tasks):
+        if _uses_variable_cache(task):
+            key = task.group_key
+        else:
+            key = ("task", index)
+        if key not in groups:
+            groups[key] = TaskGroup(key)
+        groups[key].tasks.append(task)
+
+    return sorted(groups.values(), key=lambda group: group.cost, reverse=True)
+
+
+def _uses_variable_cache(task: Task) -> bool:
+    """Whether the driver of task gets its variables from the variable cache."""
+    return task.set_name in CLIMO_SETS and bool(
+        getattr(task.parameter, "variable_cache_mb", 0)
+    )
+
+
+def read_variables(group: TaskGroup):
+    """Runs the read → derive stage of the climo sets of a task group.
+
+    The test and reference variables of each season are read and derived
+    once, into the variable cache of the process, where the drivers of the
+    sets of the group get them from. Nothing is read if the variable cache is
+    disabled, the drivers then read their own variables.
+
+    Parameters
+    ----------
+    group : TaskGroup
+        The group of tasks to read the variables of.
+    """
+    done = set()
+
+    for task in group.tasks:
+        parameter = task.parameter
+        if not _uses_variable_cache(task):
+            continue
+        variable_cache.set_max_mb(parameter.variable_cache_mb)
+
+        for dataset_kind in ["test", "ref"]:
+            dataset = Dataset(parameter, **{dataset_kind: True})
+            for season in parameter.seasons:
+                for var in parameter.variables:
+                    try:
+                        source = dataset.get_source_key(season)
+                        key = (dataset_kind, source, var, season)
+                        if key in done:
+                            continue
+                        done.add(key)
+                        dataset.get_climo_variable(var, season)
+                    except Exception:
+                        # The driver of the set fails on the same variable
+                        # and reports the error.
+                        logger.debug(
+                            "Couldn't read {} for {}.".format(var, season),
+                            exc_info=True,
+                        )
+
+
+def _run_group(func: Callable[[Any], Any], group: TaskGroup) -> List[Any]:
+    """Runs the stages of the tasks of group, in the worker process."""
+    start = time.time()
+    read_variables(group)
+    read_time = time.time() - start
+
+    results = [func(task.parameter) for task in group.tasks]
+    # The variables of the group aren't used by the other groups.
+    variable_cache.clear()
+
+    logger.debug(
+        "Ran {} tasks for {} in {:.1f}s, {:.1f}s to read the variables.".format(
+            len(group.tasks), group.key[:2], time.time() - start, read_time
+        )
+    )
+    return results
+
+
+def log_cache_stats():
+    """Log the stats of the caches of the process, once all of its tasks ran."""
+    regrid.log_stats()
+    variable_cache.log_stats()
+    vertical.log_stats()
+
+
+def _init_worker():
+    """Log the stats of the caches of the worker when it exits."""
+    multiprocessing.util.Finalize(None, log_cache_stats, exitpriority=10)
+
+
+def run_tasks(
+    func: Callable[[Any], Any], tasks: List[Task], num_workers: int
+) -> List[Any]:
+    """Runs ``func`` on the parameter of each task on a process pool.
+
+    The tasks are grouped with ``group_tasks()`` and the groups, most of
+    them a single task, are submitted in order one at a time, so a slow task
+    never holds up a batch of fast ones and the workers stay busy until the
+    queue is empty.
+
+    Parameters
+    ----------
+    func : Callable[[CoreParameter], Any]
+        The function to run on each task's parameter, e.g. ``run_diag``.
+    tasks : List[Task]
+        The tasks to run, usually from ``split_tasks()``.
+    num_workers : int
+        The number of worker processes.
+
+    Returns
+    -------
+    List[Any]
+        The results of ``func`` for each task, in order of completion of
+        their groups.
+    """
+    groups = group_tasks(tasks)
+    logger.info(
+        "Running {} tasks in {} groups on {} workers.".format(
+            len(tasks), len(groups), num_workers
+        )
+    )
+
+    results = []
+    ctx = multiprocessing.get_context("fork")
+    pool = ctx.Pool(processes=num_workers, initializer=_init_worker)
+    try:
+        run_group = functools.partial(_run_group, func)
+        for group_results in pool.imap_unordered(run_group, groups, chunksize=1):
+            results.extend(group_results)
+        # The workers exit normally, logging the stats of their caches.
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    return results
@@ -2,12 +2,14 @@ from typing import TYPE_CHECKING
 from unittest import TestCase
 from unittest.mock import Mock
 
+import cdms2
 import numpy as np
 
 from e3sm_diags.derivations.acme import (
     adjust_prs_val_units,
     determine_cloud_level,
     determine_tau,
+    mask_by,
 )
 
 if TYPE_CHECKING:
@@ -139,3 +141,31 @@ class TestDetermineTau(TestCase):
         self.assertEqual(actual_high, expected_high)
         self.assertEqual(actual_low, expected_low)
         self.assertEqual(actual_lim, expected_lim)
+
+
+class TestMaskBy(TestCase):
+    def setUp(self):
+        self.var = cdms2.createVariable(
+            np.ma.masked_array(
+                np.arange(8.0).reshape(2, 2, 2), mask=[[[1, 0], [0, 0]]] * 2
+            ),
+            id="T",
+        )
+        self.var.units = "K"
+        self.frac = np.array([[1.0, 0.2], [0.7, 0.5]])
+
+    def test_masks_below_low_limit_without_changing_var(self):
+        result = mask_by(self.var, self.frac, low_limit=0.65)
+
+        expected_mask = [[[True, True], [False, True]]] * 2
+        np.testing.assert_array_equal(result.mask, expected_mask)
+        np.testing.assert_array_equal(result.data, self.var.data)
+        self.assertEqual(result.units, "K")
+        np.testing.assert_array_equal(
+            self.var.mask, [[[True, False], [False, False]]] * 2
+        )
+
+    def test_data_is_shared_with_var(self):
+        result = mask_by(self.var, self.frac, high_limit=0.5)
+
+        self.assertTrue(np.shares_memory(result.data, self.var.data))
@@ -1,25 +1,37 @@
 from unittest.case import TestCase
-from unittest.mock import Mock
+from unittest.mock import patch
 
 import numpy as np
 from cdms2.axis import TransientAxis
 from cdms2.tvariable import TransientVariable
 
 from e3sm_diags.driver.annual_cycle_zonal_mean_driver import _create_annual_cycle
+from e3sm_diags.driver.utils.dataset import Dataset
+from e3sm_diags.parameter.core_parameter import CoreParameter
 
 
 class TestCreateAnnualCycle(TestCase):
-    def test_returns_annual_cycle_for_a_dataset_variable(self):
-        # Mock a Dataset object and get_climo_variable()
-        dataset_mock = Mock()
-        dataset_mock.get_climo_variable.return_value = TransientVariable(
-            data=np.zeros((2, 2)),
-            attributes={"id": "PRECNT", "long_name": "long_name", "units": "units"},
-            axes=[
-                TransientAxis(np.zeros(2), id="latitude"),
-                TransientAxis(np.zeros(2), id="longitude"),
-            ],
-        )
+    @patch.object(Dataset, "get_test_filename_climo", side_effect=lambda m: m)
+    @patch.object(Dataset, "_get_climo_var")
+    def test_returns_annual_cycle_for_a_dataset_variable(
+        self, get_climo_var, get_test_filename_climo
+    ):
+        # Mock the climo files of a Dataset object
+        dataset_mock = Dataset(CoreParameter(), test=True)
+        get_climo_var.return_value = [
+            TransientVariable(
+                data=np.zeros((2, 2)),
+                attributes={
+                    "id": "PRECNT",
+                    "long_name": "long_name",
+                    "units": "units",
+                },
+                axes=[
+                    TransientAxis(np.zeros(2), id="latitude"),
+                    TransientAxis(np.zeros(2), id="longitude"),
+                ],
+            )
+        ]
 
         # Generate expected and result
         expected = TransientVariable(
@@ -36,6 +48,11 @@ class TestCreateAnnualCycle(TestCase):
             ],
         )
         result = _create_annual_cycle(dataset_mock, variable="PRECNT")
+        # The climo file of each month is read once.
+        self.assertEqual(
+            sorted(c.args[0] for c in get_climo_var.call_args_list),
+            ["01", "02", "03", "04", "05", "06", "07", "08", "09", "10", "11", "12"],
+        )
 
         # Check data are equal
         np.array_equal(result.data, expected.data)
@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+import cdms2
+import cdutil
+import numpy as np
+import numpy.ma as ma
+
+from e3sm_diags.driver.area_mean_time_series_driver import get_region_means
+from e3sm_diags.driver.utils.general import select_region
+from e3sm_diags.parameter.core_parameter import CoreParameter
+
+
+class TestGetRegionMeans(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        data = rng.random((4, 18, 36))
+        mask = rng.random((4, 18, 36)) < 0.1
+
+        time = cdms2.createAxis(np.arange(4.0) * 30 + 15, id="time")
+        time.designateTime()
+        time.units = "days since 2000-01-01"
+        lat = cdms2.createUniformLatitudeAxis(-85.0, 18, 10.0)
+        lon = cdms2.createUniformLongitudeAxis(5.0, 36, 10.0)
+
+        self.var = cdms2.createVariable(
+            ma.masked_array(data, mask=mask), axes=[time, lat, lon], id="TS"
+        )
+        self.var.units = "K"
+        self.parameter = CoreParameter()
+
+    def test_means_match_averager_over_each_region(self):
+        regions = ["global", "TROPICS", "NHEX", "NAO"]
+
+        result = get_region_means(self.var, regions, None, None, self.parameter)
+
+        self.assertEqual(result.shape, (4, 4))
+        for i, region in enumerate(regions):
+            var_domain = select_region(region, self.var, None, None, self.parameter)
+            expected = cdutil.averager(var_domain, axis="xy")
+            np.testing.assert_allclose(result[i], expected, rtol=1e-10)
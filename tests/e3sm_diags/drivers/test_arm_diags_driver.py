@@ -0,0 +1,30 @@
+from unittest import TestCase
+
+import numpy as np
+
+from e3sm_diags.driver.arm_diags_driver import get_convection_onset_statistics
+
+
+class TestGetConvectionOnsetStatistics(TestCase):
+    def setUp(self):
+        # Two bins, (20, 22] and (22, 24].
+        self.cwv = np.array([21.0, 21.5, 22.0, 23.0, 23.5, 30.0, np.nan, 20.0])
+        self.precip = np.array([0.2, 1.0, 2.0, 0.6, np.nan, 5.0, 5.0, 5.0])
+
+    def test_time_steps_are_binned_by_cwv(self):
+        stats = get_convection_onset_statistics(self.precip, self.cwv, 20, 24, 2.0)
+
+        np.testing.assert_array_equal(stats.bin_center, [21.0, 23.0])
+        np.testing.assert_array_equal(stats.hist_cwv, [3, 2])
+        np.testing.assert_allclose(stats.pr_binned_mean, [3.2 / 3, 0.6])
+        np.testing.assert_allclose(
+            stats.pr_binned_std, [np.std([0.2, 1.0, 2.0]), 0.0], atol=1e-15
+        )
+        np.testing.assert_allclose(stats.pr_probability, [2 / 3, 1.0])
+
+    def test_bins_with_a_single_time_step_are_emptied(self):
+        stats = get_convection_onset_statistics(self.precip, self.cwv, 20, 24, 2.0)
+
+        # The second bin has a single precipitating time step.
+        np.testing.assert_array_equal(stats.hist_precip_points, [2, 0])
+        np.testing.assert_allclose(stats.freq_cwv, [3 / 2 / 5, 2 / 2 / 5])
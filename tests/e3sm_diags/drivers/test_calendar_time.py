@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+import cdms2
+import numpy as np
+
+from e3sm_diags.driver.utils import calendar_time
+
+
+def _create_time_axis(values, units, calendar):
+    time = cdms2.createAxis(np.asarray(values, dtype=float), id="time")
+    time.designateTime()
+    time.units = units
+    time.calendar = calendar
+    return time
+
+
+class TestDecodeTime(TestCase):
+    def assert_matches_component_time(self, time):
+        decoded = calendar_time.decode_time(time)
+        expected = time.asComponentTime()
+        for field in ["year", "month", "day", "hour", "minute"]:
+            np.testing.assert_array_equal(
+                getattr(decoded, field), [getattr(t, field) for t in expected]
+            )
+        np.testing.assert_allclose(
+            decoded.second, [t.second for t in expected], atol=1e-3
+        )
+
+    def test_noleap_3hourly_matches_component_time(self):
+        time = _create_time_axis(
+            np.arange(0, 3 * 365, 0.125), "days since 1850-01-01 00:00:00", "noleap"
+        )
+        self.assert_matches_component_time(time)
+
+    def test_gregorian_hourly_matches_component_time(self):
+        time = _create_time_axis(
+            np.arange(0, 2 * 366 * 24), "hours since 1999-12-31 12:00:00", "gregorian"
+        )
+        self.assert_matches_component_time(time)
+
+    def test_gregorian_since_a_julian_origin_matches_component_time(self):
+        # The days since an origin before 1582-10-15 go through the Julian
+        # calendar, so the dates after it are shifted by the Julian leap days.
+        for calendar in ["gregorian", "standard"]:
+            time = _create_time_axis(
+                np.arange(0, 2000 * 365.25, 10.5), "days since 0001-01-01", calendar
+            )
+            self.assert_matches_component_time(time)
+
+            time = _create_time_axis(
+                np.arange(0, 3 * 366), "days since 1582-10-04", calendar
+            )
+            self.assert_matches_component_time(time)
+
+    def test_360_day_matches_component_time(self):
+        time = _create_time_axis(
+            np.arange(0, 720, 0.5), "days since 2000-01-01", "360_day"
+        )
+        self.assert_matches_component_time(time)
+
+    def test_hourly_time_steps_in_days_are_whole_hours(self):
+        time = _create_time_axis(
+            np.arange(24) / 24.0, "days since 2000-01-01", "noleap"
+        )
+
+        decoded = calendar_time.decode_time(time)
+
+        np.testing.assert_array_equal(decoded.hour, np.arange(24))
+        self.assertEqual(calendar_time.format_time(decoded, -1), "2000-1-1 23:0:0.0")
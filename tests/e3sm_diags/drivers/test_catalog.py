@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from e3sm_diags.driver.utils import catalog, disk_cache
+
+
+class TestFileCatalog(TestCase):
+    def setUp(self):
+        self.data_path = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        for fnm in [
+            "PRECT_198001_201412.nc",
+            "PRECTMX_198001_201412.nc",
+            "TS_SGP_199001_199912.nc",
+            "model_ANN_000101_001012_climo.nc",
+        ]:
+            open(os.path.join(self.data_path, fnm), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_path)
+        shutil.rmtree(self.cache_dir)
+        catalog._catalogs.clear()
+        disk_cache.set_cache_dir(None)
+
+    def test_finds_timeseries_files_by_variable(self):
+        result = catalog.get_catalog(self.data_path)
+
+        self.assertEqual(
+            result.find_timeseries("PRECT"),
+            [os.path.join(self.data_path, "PRECT_198001_201412.nc")],
+        )
+        self.assertEqual(
+            result.find_timeseries("TS_SGP"),
+            [os.path.join(self.data_path, "TS_SGP_199001_199912.nc")],
+        )
+        self.assertEqual(result.find_timeseries("TS"), [])
+
+    def test_finds_climo_file_by_season(self):
+        result = catalog.get_catalog(self.data_path)
+
+        self.assertEqual(
+            result.find_climo("model", "ANN"),
+            os.path.join(self.data_path, "model_ANN_000101_001012_climo.nc"),
+        )
+        self.assertEqual(result.find_climo("model", "DJF"), "")
+
+    def test_saved_catalog_is_reused_and_invalidated(self):
+        disk_cache.set_cache_dir(self.cache_dir)
+        files = sorted(os.listdir(self.data_path))
+        catalog.get_catalog(self.data_path)
+        catalog._catalogs.clear()
+
+        # The catalog is saved in the cache directory, not in the data path.
+        self.assertEqual(sorted(os.listdir(self.data_path)), files)
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, "catalogs"))), 1)
+
+        # The catalog is loaded from disk and is still up to date.
+        result = catalog.get_catalog(self.data_path)
+        self.assertFalse(result.is_stale())
+        self.assertIn("PRECTMX", result.timeseries)
+
+        # Adding a file to the directory rebuilds the catalog.
+        os.utime(self.data_path, (0, 0))
+        open(os.path.join(self.data_path, "U_198001_201412.nc"), "w").close()
+        result = catalog.get_catalog(self.data_path)
+        self.assertIn("U", result.timeseries)
+
+    def test_catalog_is_not_saved_without_a_cache_dir(self):
+        files = sorted(os.listdir(self.data_path))
+        catalog.get_catalog(self.data_path)
+
+        self.assertEqual(sorted(os.listdir(self.data_path)), files)
+        self.assertEqual(os.listdir(self.cache_dir), [])
@@ -0,0 +1,127 @@
+from unittest import TestCase, mock
+
+import cdms2
+import numpy as np
+import numpy.ma as ma
+
+from e3sm_diags.driver.utils import climo as climo_module
+from e3sm_diags.driver.utils.climo import SEASON_IDX, ClimoBundle, climo
+
+# The length of each month in a noleap year.
+DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+def _create_monthly_variable(num_years, data, mask):
+    bounds_end = np.cumsum(np.tile(DAYS_IN_MONTH, num_years)).astype(float)
+    bounds_start = np.concatenate([[0.0], bounds_end[:-1]])
+    bounds = np.stack([bounds_start, bounds_end], axis=1)
+
+    time = cdms2.createAxis(bounds[:, 1], bounds=bounds, id="time")
+    time.designateTime()
+    time.units = "days since 2000-01-01"
+    time.calendar = "noleap"
+    lat = cdms2.createAxis(np.array([-45.0, 45.0]), id="lat")
+    lat.designateLatitude()
+    lon = cdms2.createAxis(np.array([0.0, 120.0, 240.0]), id="lon")
+    lon.designateLongitude()
+
+    var = cdms2.createVariable(
+        ma.masked_array(data, mask=mask), axes=[time, lat, lon], id="TS"
+    )
+    var.units = "K"
+    var.long_name = "Surface temperature"
+
+    return var, bounds
+
+
+class TestClimoBundle(TestCase):
+    def setUp(self):
+        num_years = 3
+        rng = np.random.default_rng(0)
+        self.data = rng.random((12 * num_years, 2, 3))
+        self.mask = rng.random((12 * num_years, 2, 3)) < 0.2
+        # A point with no data at all.
+        self.mask[:, 0, 0] = True
+        self.var, bounds = _create_monthly_variable(num_years, self.data, self.mask)
+
+        self.dt = bounds[:, 1] - bounds[:, 0]
+        self.months = np.tile(np.arange(1, 13), num_years)
+
+    def _expected(self, season):
+        v: ma.MaskedArray = ma.masked_array(self.data, mask=self.mask)
+        idx = np.array(
+            [SEASON_IDX[season][m - 1] for m in self.months], dtype=int
+        ).nonzero()
+        return ma.average(v[idx], axis=0, weights=self.dt[idx])
+
+    def test_all_seasons_match_separate_weighted_averages(self):
+        seasons = ["ANN", "DJF", "MAM", "JJA", "SON", "01", "07"]
+        bundle = ClimoBundle(self.var, seasons)
+
+        for season in seasons:
+            result = bundle.get(season)
+            expected = self._expected(season)
+
+            self.assertEqual(result.shape, (2, 3))
+            np.testing.assert_array_equal(result.mask, ma.getmaskarray(expected))
+            np.testing.assert_allclose(result.filled(0), expected.filled(0), rtol=1e-12)
+            self.assertEqual(result.id, "TS")
+            self.assertEqual(result.units, "K")
+
+    def test_annual_cycle_has_a_climatology_per_month(self):
+        result = ClimoBundle(self.var, ["ANNUALCYCLE"]).get("ANNUALCYCLE")
+
+        self.assertEqual(result.shape, (12, 2, 3))
+        np.testing.assert_allclose(
+            result[6].filled(0), self._expected("07").filled(0), rtol=1e-12
+        )
+
+    def test_has_season_only_for_computed_seasons(self):
+        bundle = ClimoBundle(self.var, ["ANN", "SEASONALCYCLE"])
+
+        self.assertTrue(bundle.has_season("ANN"))
+        self.assertTrue(bundle.has_season("DJF"))
+        self.assertFalse(bundle.has_season("01"))
+
+    def test_climo_matches_bundle(self):
+        result = climo(self.var, "JJA")
+        expected = ClimoBundle(self.var, ["JJA"]).get("JJA")
+
+        np.testing.assert_array_equal(result.filled(0), expected.filled(0))
+
+    def test_num_sum_bytes_counts_each_season_once(self):
+        self.assertEqual(climo_module.get_num_sum_bytes(["ANN"], 6), 2 * 6 * 8)
+        self.assertEqual(
+            climo_module.get_num_sum_bytes(["ANNUALCYCLE", "01", "DJF"], 6),
+            2 * 13 * 6 * 8,
+        )
+
+    def test_climatologies_from_blocks_of_grid_points_match_single_block(self):
+        seasons = ["ANN", "DJF", "JJA"]
+        expected = ClimoBundle(self.var, seasons)
+
+        # Two grid points per block.
+        with mock.patch.object(climo_module, "BLOCK_BYTES", 2 * 8 * self.var.shape[0]):
+            result = ClimoBundle(self.var, seasons)
+
+        for season in seasons:
+            np.testing.assert_allclose(
+                result.get(season).filled(0),
+                expected.get(season).filled(0),
+                rtol=1e-12,
+            )
+
+    def test_climatologies_from_time_chunks_match_single_pass(self):
+        seasons = ["ANN", "DJF", "JJA"]
+        expected = ClimoBundle(self.var, seasons)
+
+        result = ClimoBundle(self.var[0:10], seasons)
+        result.add(self.var[10:24])
+        result.add(self.var[24:])
+
+        for season in seasons:
+            np.testing.assert_allclose(
+                result.get(season).filled(0),
+                expected.get(season).filled(0),
+                rtol=1e-12,
+            )
@@ -0,0 +1,301 @@
+from typing import List, Tuple
+from unittest import TestCase, mock
+
+import cdms2
+import numpy as np
+import numpy.ma as ma
+
+from e3sm_diags.driver.utils import climo
+from e3sm_diags.driver.utils.dataset import Dataset
+from e3sm_diags.parameter.core_parameter import CoreParameter
+
+# The length of each month in a noleap year.
+DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+def _create_monthly_variable(start_yr, num_years, seed=0):
+    """A monthly (time, lat, lon) timeseries, from January of start_yr."""
+    bounds_end = np.cumsum(np.tile(DAYS_IN_MONTH, num_years)).astype(float)
+    bounds_start = np.concatenate([[0.0], bounds_end[:-1]])
+    bounds = np.stack([bounds_start, bounds_end], axis=1)
+
+    time = cdms2.createAxis(bounds[:, 1], bounds=bounds, id="time")
+    time.designateTime()
+    time.units = "days since {}-01-01".format(start_yr)
+    time.calendar = "noleap"
+    lat = cdms2.createAxis(np.array([-45.0, 45.0]), id="lat")
+    lat.designateLatitude()
+    lon = cdms2.createAxis(np.array([0.0, 120.0, 240.0]), id="lon")
+    lon.designateLongitude()
+
+    rng = np.random.default_rng(seed)
+    data = rng.random((12 * num_years, 2, 3)).astype(np.float32)
+    mask = rng.random(data.shape) < 0.1
+    var = cdms2.createVariable(
+        ma.masked_array(data, mask=mask), axes=[time, lat, lon], id="TS"
+    )
+    var.units = "K"
+    var.long_name = "Surface temperature"
+
+    return var
+
+
+class TestGetClimoFromTimeseries(TestCase):
+    def setUp(self):
+        self.parameter = CoreParameter()
+        self.parameter.test_timeseries_input = True
+        self.parameter.test_data_path = "test"
+        self.parameter.test_start_yr = 2000
+        self.parameter.test_end_yr = 2002
+        self.parameter.seasons = ["ANN", "JJA"]
+
+        self.dataset = Dataset(self.parameter, test=True)
+        self.dataset.var = "TS"
+        self.dataset.extra_vars = []
+
+    @mock.patch.object(Dataset, "_get_timeseries_var")
+    def test_climos_are_dropped_once_all_seasons_are_requested(
+        self, get_timeseries_var
+    ):
+        get_timeseries_var.return_value = [_create_monthly_variable(2000, 3)]
+
+        self.dataset._get_climo_from_timeseries("test", "ANN")
+        self.assertEqual(len(self.dataset._climo_bundles), 1)
+        self.dataset._get_climo_from_timeseries("test", "JJA")
+
+        # Both seasons were computed from a single read.
+        get_timeseries_var.assert_called_once()
+        self.assertEqual(self.dataset._climo_bundles, {})
+
+    @mock.patch.object(Dataset, "_get_timeseries_var")
+    def test_seasons_are_kept_when_a_month_is_requested_first(self, get_timeseries_var):
+        get_timeseries_var.side_effect = lambda data_path: [
+            _create_monthly_variable(2000, 3)
+        ]
+
+        for season in climo.CYCLES["ANNUALCYCLE"] + ["ANN", "JJA"]:
+            self.dataset._get_climo_from_timeseries("test", season)
+
+        # The months and the seasons were computed from a single read.
+        get_timeseries_var.assert_called_once()
+        self.assertEqual(self.dataset._climo_bundles, {})
+
+    @mock.patch.object(Dataset, "_get_timeseries_var")
+    def test_only_a_season_not_in_the_parameters_is_computed_again(
+        self, get_timeseries_var
+    ):
+        get_timeseries_var.side_effect = lambda data_path: [
+            _create_monthly_variable(2000, 3)
+        ]
+
+        with mock.patch.object(
+            climo, "ClimoBundle", wraps=climo.ClimoBundle
+        ) as climo_bundle:
+            for season in ["ANN", "DJF", "JJA"]:
+                self.dataset._get_climo_from_timeseries("test", season)
+
+        self.assertEqual(
+            [c.args[1] for c in climo_bundle.call_args_list],
+            [["ANN", "JJA", "ANN"], ["DJF"]],
+        )
+        self.assertEqual(self.dataset._climo_bundles, {})
+
+    def test_climos_from_chunks_match_single_read(self):
+        def get_timeseries_var(data_path, yrs=None):
+            var = _create_monthly_variable(2000, 3)
+            if yrs is None:
+                return [var]
+            return [var[(yrs[0] - 2000) * 12 : (yrs[1] - 2000 + 1) * 12]]
+
+        with mock.patch.object(
+            Dataset, "_get_timeseries_var", side_effect=get_timeseries_var
+        ):
+            expected = [
+                self.dataset._get_climo_from_timeseries("test", season)
+                for season in ["ANN", "JJA"]
+            ]
+
+            self.parameter.climo_chunk_mb = 1
+            with mock.patch.object(
+                Dataset, "_get_num_yrs_per_chunk", return_value=2
+            ) as get_num_yrs_per_chunk:
+                result = [
+                    self.dataset._get_climo_from_timeseries("test", season)
+                    for season in ["ANN", "JJA"]
+                ]
+
+        get_num_yrs_per_chunk.assert_called_once()
+        for r, e in zip(result, expected):
+            np.testing.assert_array_equal(r[0].mask, e[0].mask)
+            np.testing.assert_allclose(r[0].filled(0), e[0].filled(0), rtol=1e-6)
+
+    @mock.patch.object(Dataset, "_get_timeseries_var")
+    def test_annual_cycle_is_computed_in_a_single_pass(self, get_timeseries_var):
+        var = _create_monthly_variable(2000, 3)
+        get_timeseries_var.return_value = [var]
+
+        result = self.dataset.get_annual_cycle("TS")
+
+        get_timeseries_var.assert_called_once()
+        self.assertEqual(result.shape, (12, 2, 3))
+        np.testing.assert_array_equal(result.getTime()[:], np.arange(1, 13))
+        for index, month in enumerate(climo.CYCLES["ANNUALCYCLE"]):
+            expected = climo.climo(_create_monthly_variable(2000, 3), month)
+            np.testing.assert_array_equal(result[index].mask, expected.mask)
+            np.testing.assert_allclose(
+                result[index].filled(0), expected.filled(0), rtol=1e-6
+            )
+
+    @mock.patch("e3sm_diags.driver.utils.dataset.cdms2.open")
+    @mock.patch.object(
+        Dataset,
+        "_get_timeseries_file_path",
+        return_value="/data/TS_200001_200212.nc",
+    )
+    def test_num_yrs_per_chunk_counts_the_values_and_the_mask(
+        self, get_timeseries_file_path, cdms2_open
+    ):
+        file_var = mock.Mock(shape=(36, 2, 3), dtype=np.float32)
+        cdms2_open.return_value.__getitem__.return_value = file_var
+
+        # A year is 12 * 6 values of 4 bytes and 12 * 6 mask values of 1 byte.
+        self.parameter.climo_chunk_mb = 1000 / 1024**2
+        self.assertEqual(self.dataset._get_num_yrs_per_chunk("test", []), 2)
+
+        # The 2 sums of the 12 months take 2 * 12 * 6 * 8 bytes of the budget.
+        self.assertEqual(
+            self.dataset._get_num_yrs_per_chunk("test", ["ANNUALCYCLE"]), 1
+        )
+        self.parameter.climo_chunk_mb = (1000 + 1152) / 1024**2
+        self.assertEqual(
+            self.dataset._get_num_yrs_per_chunk("test", ["ANNUALCYCLE"]), 2
+        )
+
+        # At least a year is read at a time.
+        self.parameter.climo_chunk_mb = 1 / 1024**2
+        self.assertEqual(self.dataset._get_num_yrs_per_chunk("test", ["ANN"]), 1)
+
+
+class TestGetTimeseriesPoints(TestCase):
+    def setUp(self):
+        self.parameter = CoreParameter()
+        self.parameter.sets = ["streamflow"]
+        self.parameter.test_timeseries_input = True
+        self.parameter.test_data_path = "test"
+        self.parameter.test_start_yr = 2000
+        self.parameter.test_end_yr = 2000
+
+        self.dataset = Dataset(self.parameter, test=True)
+
+        # A (time, lat, lon) variable with 12 months, 4 lats and 5 lons.
+        data = np.arange(12 * 4 * 5, dtype=np.float64).reshape((12, 4, 5))
+        mask = np.zeros(data.shape, dtype=bool)
+        mask[:, 2, 3] = True
+        self.data: ma.MaskedArray = ma.masked_array(data, mask=mask)
+
+        # The (lat, lon slice) of each row read with cdms2, and the number of
+        # cells read with netCDF4.
+        self.rows_read: List[Tuple[int, slice]] = []
+        self.cells_read = 0
+
+        def fin(var, time=None, latitude=None, longitude=None):
+            self.rows_read.append((latitude.start, longitude))
+            return self.data[:, latitude, longitude]
+
+        self.fin = mock.MagicMock(side_effect=fin)
+        time_axis = self.fin.__getitem__.return_value.getTime.return_value
+        time_axis.mapIntervalExt.return_value = (0, 12, 1)
+
+        def get_cells(key):
+            times, lat, lons = key
+            self.assertIsInstance(lat, int)
+            # netCDF4 only takes increasing indices.
+            self.assertTrue((np.diff(lons) > 0).all())
+            cells = self.data[times, lat][:, lons]
+            self.cells_read += cells.size
+            return cells
+
+        variable = mock.MagicMock()
+        variable.__getitem__.side_effect = get_cells
+        self.nc = mock.MagicMock()
+        self.nc.variables = {"flow": variable}
+
+    def _get_points(self, fnm, lat_index, lon_index):
+        with mock.patch(
+            "e3sm_diags.driver.utils.dataset.netCDF4.Dataset", return_value=self.nc
+        ):
+            return self.dataset._get_points_from_file(
+                self.fin, fnm, "flow", None, lat_index, lon_index
+            )
+
+    def test_only_the_cells_of_the_points_are_read_from_netcdf_files(self):
+        lat_index = np.array([1, 3, 1, 1, 3])
+        lon_index = np.array([4, 0, 0, 2, 0])
+
+        result = self._get_points("/data/flow_200001_200012.nc", lat_index, lon_index)
+
+        # The 4 distinct cells, for each of the 12 months.
+        self.assertEqual(self.cells_read, 4 * 12)
+        self.assertEqual(self.rows_read, [])
+        self.nc.close.assert_called_once()
+        self.assertEqual(result.dtype, np.float32)
+        self.assertEqual(result.shape, (5, 12))
+        np.testing.assert_array_equal(
+            result, self.data[:, lat_index, lon_index].T.astype(np.float32)
+        )
+
+    def test_points_in_the_same_row_are_read_once(self):
+        lat_index = np.array([1, 3, 1, 1])
+        lon_index = np.array([4, 0, 0, 2])
+
+        result = self._get_points("/data/flow.xml", lat_index, lon_index)
+
+        self.assertEqual(
+            sorted(self.rows_read, key=lambda row: row[0]),
+            [(1, slice(0, 5)), (3, slice(0, 1))],
+        )
+        self.assertEqual(result.dtype, np.float32)
+        self.assertEqual(result.shape, (4, 12))
+        np.testing.assert_array_equal(
+            result, self.data[:, lat_index, lon_index].T.astype(np.float32)
+        )
+
+    def test_masked_values_are_nan(self):
+        lat_index = np.array([2, 0])
+        lon_index = np.array([3, 3])
+
+        for fnm in ["/data/flow_200001_200012.nc", "/data/flow.xml"]:
+            result = self._get_points(fnm, lat_index, lon_index)
+
+            self.assertTrue(np.isnan(result[0]).all())
+            np.testing.assert_array_equal(result[1], self.data[:, 0, 3])
+
+    @mock.patch("e3sm_diags.driver.utils.dataset.cdms2.open")
+    @mock.patch.object(
+        Dataset,
+        "_get_timeseries_file_path",
+        return_value="/data/flow_200001_200012.nc",
+    )
+    def test_returns_the_points_by_time(self, get_timeseries_file_path, cdms2_open):
+        cdms2_open.return_value = self.fin
+        lat_index = np.array([3, 0, 2])
+        lon_index = np.array([1, 4, 2])
+
+        with mock.patch(
+            "e3sm_diags.driver.utils.dataset.netCDF4.Dataset", return_value=self.nc
+        ):
+            result = self.dataset.get_timeseries_points("flow", lat_index, lon_index)
+
+        self.assertEqual(result.shape, (3, 12))
+        np.testing.assert_array_equal(
+            result, self.data[:, lat_index, lon_index].T.astype(np.float32)
+        )
+        time_axis = self.fin["flow"].getTime()
+        time_axis.mapIntervalExt.assert_called_once_with(
+            ("2000-01-15", "2000-12-15", "ccb")
+        )
+
+    @mock.patch.object(Dataset, "_get_timeseries_file_path", return_value="")
+    def test_raises_an_error_if_there_is_no_file(self, get_timeseries_file_path):
+        with self.assertRaisesRegex(RuntimeError, "doesn't have a file"):
+            self.dataset.get_timeseries_points("flow", np.array([0]), np.array([0]))
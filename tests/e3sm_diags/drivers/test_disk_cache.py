@@ -0,0 +1,70 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from e3sm_diags.driver.utils import disk_cache
+
+
+class TestDiskCache(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        disk_cache.set_cache_dir(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        disk_cache.set_cache_dir(None)
+
+    def test_get_path_is_none_without_a_cache_dir(self):
+        disk_cache.set_cache_dir(None)
+
+        self.assertIsNone(disk_cache.get_path("catalogs", "/data", ".json"))
+
+    def test_get_path_of_each_source(self):
+        path = disk_cache.get_path("catalogs", "/data", ".json")
+
+        assert path is not None
+        self.assertEqual(
+            os.path.dirname(path), os.path.join(self.cache_dir, "catalogs")
+        )
+        self.assertTrue(path.endswith(".json"))
+        self.assertNotEqual(path, disk_cache.get_path("catalogs", "/data2", ".json"))
+
+    def test_save(self):
+        fnm = os.path.join(self.cache_dir, "kind", "file.txt")
+
+        def write(path):
+            with open(path, "w") as f:
+                f.write("saved")
+
+        self.assertTrue(disk_cache.save(fnm, write))
+        with open(fnm) as f:
+            self.assertEqual(f.read(), "saved")
+        self.assertEqual(os.listdir(os.path.dirname(fnm)), ["file.txt"])
+
+    def test_failed_save_leaves_no_file(self):
+        fnm = os.path.join(self.cache_dir, "kind", "file.txt")
+
+        def write(path):
+            with open(path, "w") as f:
+                f.write("partial")
+            raise OSError("No space left on device")
+
+        self.assertFalse(disk_cache.save(fnm, write))
+        self.assertEqual(os.listdir(os.path.dirname(fnm)), [])
+
+    def test_get_checksum_of_the_contents(self):
+        fnm = os.path.join(self.cache_dir, "data.nc")
+        copy = os.path.join(self.cache_dir, "copy.nc")
+        with open(fnm, "wb") as f:
+            f.write(b"data")
+        shutil.copyfile(fnm, copy)
+
+        checksum = disk_cache.get_checksum(fnm)
+
+        self.assertEqual(checksum, hashlib.sha256(b"data").hexdigest())
+        self.assertEqual(disk_cache.get_checksum(copy), checksum)
+        with open(fnm, "wb") as f:
+            f.write(b"new data")
+        self.assertNotEqual(disk_cache.get_checksum(fnm), checksum)
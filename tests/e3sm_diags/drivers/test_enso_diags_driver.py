@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+import numpy as np
+import scipy.stats
+
+from e3sm_diags.driver.enso_diags_driver import linregress
+
+
+class TestLinregress(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = rng.random(40)
+        self.y = rng.random((40, 6))
+        # A grid point that is correlated with x.
+        self.y[:, 1] = 2 * self.x + 0.1 * rng.random(40)
+
+    def test_matches_scipy_linregress_for_each_point(self):
+        slope, pvalue = linregress(self.x, self.y)
+
+        for i in range(self.y.shape[1]):
+            expected = scipy.stats.linregress(self.x, self.y[:, i])
+            self.assertAlmostEqual(slope[i], expected.slope, places=10)
+            self.assertAlmostEqual(pvalue[i], expected.pvalue, places=10)
+
+    def test_constant_point_is_not_significant(self):
+        self.y[:, 2] = 1.0
+
+        slope, pvalue = linregress(self.x, self.y)
+
+        self.assertEqual(slope[2], 0.0)
+        self.assertEqual(pvalue[2], 1.0)
@@ -0,0 +1,55 @@
+from unittest import TestCase, mock
+
+import cdms2
+import numpy as np
+import numpy.ma as ma
+
+from e3sm_diags.driver import lat_lon_driver
+from e3sm_diags.driver.lat_lon_driver import _create_metrics_on_grids, create_metrics
+
+
+def _create_variable(data, mask):
+    lat = cdms2.createAxis(np.array([-60.0, -20.0, 20.0, 60.0]), id="lat")
+    lat.designateLatitude()
+    lat.setBounds(np.array([[-90.0, -40.0], [-40.0, 0.0], [0.0, 40.0], [40.0, 90.0]]))
+    lon = cdms2.createAxis(np.array([45.0, 135.0, 225.0, 315.0]), id="lon")
+    lon.designateLongitude()
+    lon.setBounds(
+        np.array([[0.0, 90.0], [90.0, 180.0], [180.0, 270.0], [270.0, 360.0]])
+    )
+
+    return cdms2.createVariable(ma.masked_array(data, mask=mask), axes=[lat, lon])
+
+
+class TestCreateMetrics(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.test = _create_variable(rng.random((4, 4)), rng.random((4, 4)) < 0.3)
+        self.ref = _create_variable(rng.random((4, 4)), rng.random((4, 4)) < 0.3)
+        self.diff = self.test - self.ref
+
+    def _create_metrics_with_genutil(self, *variables):
+        with mock.patch.object(
+            lat_lon_driver, "_create_metrics_on_grids", return_value=None
+        ):
+            return create_metrics(*variables)
+
+    def test_metrics_on_grids_match_genutil_on_masked_fields(self):
+        variables = (self.ref, self.test, self.ref, self.test, self.diff)
+
+        result = _create_metrics_on_grids(*variables)
+        expected = self._create_metrics_with_genutil(*variables)
+
+        self.assertEqual(result.keys(), expected.keys())
+        for name, metrics in expected.items():
+            self.assertEqual(result[name].keys(), metrics.keys())
+            for metric, value in metrics.items():
+                np.testing.assert_allclose(
+                    result[name][metric], value, rtol=1e-12, err_msg=metric
+                )
+
+    def test_fields_without_valid_values_use_genutil(self):
+        masked = _create_variable(np.ones((4, 4)), np.ones((4, 4), dtype=bool))
+        variables = (self.ref, masked, self.ref, masked, masked)
+
+        self.assertIsNone(_create_metrics_on_grids(*variables))
@@ -0,0 +1,98 @@
+from unittest import TestCase, mock
+
+import cdms2
+import numpy as np
+
+from e3sm_diags.driver.utils import mask
+from e3sm_diags.parameter.core_parameter import CoreParameter
+
+
+def _create_frac(values):
+    lat = cdms2.createUniformLatitudeAxis(-45.0, 2, 90.0)
+    lon = cdms2.createUniformLongitudeAxis(90.0, 2, 180.0)
+    return cdms2.createVariable(np.array(values), axes=[lat, lon], id="LANDFRAC")
+
+
+class TestGetRegionMask(TestCase):
+    def setUp(self):
+        self.land_frac = _create_frac([[1.0, 0.5], [0.7, 0.0]])
+        self.ocean_frac = 1 - self.land_frac
+        self.grid = self.land_frac.getGrid()
+        self.parameter = CoreParameter()
+
+    def tearDown(self):
+        mask._regridded_fracs.clear()
+        mask._masks.clear()
+
+    def test_land_and_ocean_masks_use_the_threshold_of_the_region(self):
+        land_mask = mask.get_region_mask(
+            "land", self.grid, self.land_frac, self.ocean_frac, self.parameter
+        )
+        ocean_mask = mask.get_region_mask(
+            "ocean", self.grid, self.land_frac, self.ocean_frac, self.parameter
+        )
+
+        np.testing.assert_array_equal(land_mask, [[False, True], [False, True]])
+        np.testing.assert_array_equal(ocean_mask, [[True, True], [True, False]])
+
+    def test_mask_is_only_computed_once_per_grid(self):
+        result1 = mask.get_region_mask(
+            "land", self.grid, self.land_frac, self.ocean_frac, self.parameter
+        )
+        # The fraction of another season with the same values.
+        result2 = mask.get_region_mask(
+            "land_TROPICS",
+            self.grid,
+            _create_frac([[1.0, 0.5], [0.7, 0.0]]),
+            self.ocean_frac,
+            self.parameter,
+        )
+
+        self.assertIs(result1, result2)
+        self.assertEqual(len(mask._masks), 1)
+
+    def test_other_regions_have_no_mask(self):
+        self.assertIsNone(
+            mask.get_region_mask(
+                "TROPICS", self.grid, self.land_frac, self.ocean_frac, self.parameter
+            )
+        )
+
+    def test_fracs_are_keyed_by_their_source(self):
+        dataset = mock.Mock()
+        dataset.get_climo_variable.side_effect = lambda var, season: (
+            self.land_frac if var == "LANDFRAC" else self.ocean_frac
+        )
+        dataset.get_source_key.return_value = ("test_ANN_climo.nc",)
+
+        land_frac, ocean_frac = mask.get_land_ocean_fracs(dataset, "ANN")
+        mask.get_region_mask("land", self.grid, land_frac, ocean_frac, self.parameter)
+
+        # The key is the source of the fraction, not a hash of its values.
+        self.assertEqual(
+            list(mask._masks)[0][0], ("test_ANN_climo.nc", "ANN", "LANDFRAC")
+        )
+
+    def test_fracs_are_only_hashed_once(self):
+        with mock.patch.object(
+            mask, "_set_frac_key", wraps=mask._set_frac_key
+        ) as set_frac_key:
+            for region in ["land", "land_TROPICS", "land_60S90S"]:
+                mask.get_region_mask(
+                    region, self.grid, self.land_frac, self.ocean_frac, self.parameter
+                )
+
+        set_frac_key.assert_called_once()
+
+    def test_least_recently_used_fracs_are_dropped(self):
+        # Room for a single regridded fraction of 4 float64 values.
+        with mock.patch.object(mask, "MAX_CACHED_MB", 40 / 1024**2):
+            for values in [[[1.0, 0.5], [0.7, 0.0]], [[0.0, 0.5], [0.7, 1.0]]]:
+                mask.get_region_mask(
+                    "land", self.grid, _create_frac(values), None, self.parameter
+                )
+
+        self.assertEqual(len(mask._regridded_fracs), 1)
+        np.testing.assert_array_equal(
+            list(mask._regridded_fracs.values())[0], [[0.0, 0.5], [0.7, 1.0]]
+        )
@@ -0,0 +1,364 @@
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+import cdms2
+import cdutil
+import numpy as np
+import numpy.ma as ma
+import scipy.sparse
+
+from e3sm_diags.derivations.acme import masked_view
+from e3sm_diags.driver.utils import disk_cache, general, regrid
+
+
+def _create_grid(lat_bnds, lon_bnds):
+    lat_bnds = np.array(lat_bnds, dtype=float)
+    lon_bnds = np.array(lon_bnds, dtype=float)
+    lat = cdms2.createAxis(lat_bnds.mean(axis=1), bounds=lat_bnds, id="lat")
+    lat.designateLatitude()
+    lon = cdms2.createAxis(lon_bnds.mean(axis=1), bounds=lon_bnds, id="lon")
+    lon.designateLongitude()
+
+    return cdms2.createRectGrid(lat, lon)
+
+
+class TestRegrid(TestCase):
+    def setUp(self):
+        # A 2x2 source grid and a 1x2 destination grid, each destination cell
+        # is the average of the two source cells in its longitude band.
+        self.src_grid = _create_grid([[-90, 0], [0, 90]], [[0, 180], [180, 360]])
+        self.dst_grid = _create_grid([[-90, 90]], [[0, 180], [180, 360]])
+        self.weights = scipy.sparse.csr_matrix(
+            np.array([[0.5, 0, 0.5, 0], [0, 0.5, 0, 0.5]])
+        )
+
+        self.weights_dir = tempfile.mkdtemp()
+        regrid.set_weights_dir(self.weights_dir)
+
+    def tearDown(self):
+        regrid.set_weights_dir(None)
+        regrid._weights.clear()
+        regrid.log_stats()
+        shutil.rmtree(self.weights_dir)
+
+    def _create_variable(self, data, mask):
+        var = cdms2.createVariable(
+            ma.masked_array(data, mask=mask),
+            axes=[self.src_grid.getLatitude(), self.src_grid.getLongitude()],
+            id="TS",
+        )
+        var.units = "K"
+        return var
+
+    def _cache_weights(self):
+        key = (
+            regrid._grid_hash(self.src_grid),
+            regrid._grid_hash(self.dst_grid),
+            "esmf",
+            "conservative",
+        )
+        regrid._weights[key] = self.weights
+
+    def test_masked_cells_are_excluded_from_the_average(self):
+        self._cache_weights()
+        var = self._create_variable(
+            np.array([[1.0, 2.0], [3.0, 4.0]]),
+            np.array([[False, True], [False, True]]),
+        )
+
+        result = regrid.regrid(var, self.dst_grid, "esmf", "conservative")
+
+        self.assertEqual(result.shape, (1, 2))
+        self.assertEqual(result.id, "TS")
+        np.testing.assert_allclose(result[0, 0], 2.0)
+        self.assertTrue(result.mask[0, 1])
+
+    def test_weights_are_reused_from_the_weights_dir(self):
+        self._cache_weights()
+        key = list(regrid._weights)[0]
+        disk_cache.save(
+            "{}/{}_{}_{}_{}.npz".format(self.weights_dir, key[2], key[3], *key[:2]),
+            lambda path: scipy.sparse.save_npz(path, self.weights),
+        )
+        regrid._weights.clear()
+
+        result = regrid.get_weights(
+            self.src_grid, self.dst_grid, "esmf", "conservative"
+        )
+
+        np.testing.assert_array_equal(result.toarray(), self.weights.toarray())
+
+    def test_batch_matches_regridding_each_variable(self):
+        self._cache_weights()
+        variables = [
+            self._create_variable(
+                np.array([[1.0, 2.0], [3.0, 4.0]]),
+                np.array([[False, True], [False, False]]),
+            ),
+            self._create_variable(np.ones((2, 2)), np.ones((2, 2), dtype=bool)),
+        ]
+
+        results = regrid.regrid_batch(variables, self.dst_grid, "esmf", "conservative")
+
+        self.assertEqual(len(results), 2)
+        for var, result in zip(variables, results):
+            expected = regrid.regrid(var, self.dst_grid, "esmf", "conservative")
+            np.testing.assert_array_equal(result.mask, expected.mask)
+            np.testing.assert_allclose(result.filled(0), expected.filled(0))
+
+    def test_batch_is_regridded_a_block_of_fields_at_a_time(self):
+        self._cache_weights()
+        lev = cdms2.createAxis(np.array([850.0, 500.0, 200.0]), id="plev")
+        lev.designateLevel()
+        rng = np.random.default_rng(0)
+        data: ma.MaskedArray = ma.masked_array(
+            rng.random((3, 2, 2)), mask=rng.random((3, 2, 2)) < 0.3
+        )
+        variables = [
+            cdms2.createVariable(
+                data,
+                axes=[lev, self.src_grid.getLatitude(), self.src_grid.getLongitude()],
+                id="T",
+            ),
+            self._create_variable(np.ones((2, 2)), np.zeros((2, 2), dtype=bool)),
+        ]
+        expected = regrid.regrid_batch(variables, self.dst_grid, "esmf", "conservative")
+
+        # Room for a single field of the 4 source cells at a time.
+        with mock.patch.object(regrid, "BATCH_MB", 32 / 1024**2):
+            results = regrid.regrid_batch(
+                variables, self.dst_grid, "esmf", "conservative"
+            )
+
+        for result, e in zip(results, expected):
+            self.assertEqual(result.shape, e.shape)
+            self.assertEqual(result.dtype, e.dtype)
+            np.testing.assert_array_equal(result.mask, e.mask)
+            np.testing.assert_array_equal(result.filled(0), e.filled(0))
+
+    def test_2d_fields_are_regridded_one_at_a_time(self):
+        lev = cdms2.createAxis(np.array([850.0, 500.0]), id="plev")
+        lev.designateLevel()
+        var = cdms2.createVariable(
+            np.arange(8, dtype=float).reshape((2, 2, 2)),
+            axes=[lev, self.src_grid.getLatitude(), self.src_grid.getLongitude()],
+            id="T",
+        )
+
+        result = regrid._regrid_2d_fields(var, self.dst_grid, "regrid2", "linear")
+
+        self.assertEqual(result.shape, (2, 1, 2))
+        self.assertEqual(result.id, "T")
+        self.assertEqual(result.getLevel().id, "plev")
+        for ilev in range(2):
+            expected = var[ilev].regrid(
+                self.dst_grid, regridTool="regrid2", regridMethod="linear"
+            )
+            np.testing.assert_allclose(result[ilev], expected)
+
+    def test_variable_on_the_destination_grid_is_not_regridded(self):
+        var = self._create_variable(np.ones((2, 2)), np.zeros((2, 2), dtype=bool))
+        grid = _create_grid([[-90, 1e-7], [1e-7, 90]], [[0, 180], [180, 360]])
+
+        result = regrid.regrid(var, grid, "esmf", "conservative")
+
+        self.assertIs(result, var)
+        self.assertEqual(regrid.stats["skipped"], 1)
+
+
+class TestRegridToLowerResBatch(TestCase):
+    def setUp(self):
+        # A 2x2 grid and a 2x4 grid, of higher resolution in longitude.
+        self.low_grid = _create_grid([[-90, 0], [0, 90]], [[0, 180], [180, 360]])
+        self.high_grid = _create_grid(
+            [[-90, 0], [0, 90]], [[0, 90], [90, 180], [180, 270], [270, 360]]
+        )
+
+    def tearDown(self):
+        regrid.log_stats()
+
+    def _create_variable(self, grid, units):
+        var = cdms2.createVariable(
+            np.ones((2, len(grid.getLongitude()))),
+            axes=[grid.getLatitude(), grid.getLongitude()],
+            grid=grid,
+            id="TS",
+        )
+        var.units = units
+        return var
+
+    def _regrid_batch(self, variables, grid, regrid_tool, regrid_method):
+        return [self._create_variable(grid, "") for _ in variables]
+
+    def _assert_is_copy(self, result, var):
+        """The variable that isn't regridded can be modified in place."""
+        np.testing.assert_array_equal(result, var)
+        self.assertEqual(result.units, var.units)
+        result[:] = 2
+        np.testing.assert_array_equal(var, 1)
+
+    def test_variables_on_the_same_grid_are_copied(self):
+        # A region of a variable, which shares its data.
+        mv1 = self._create_variable(self.low_grid, "K")
+        mv1_domain = masked_view(mv1, np.array([[True, False], [False, False]]))
+        mv2 = self._create_variable(self.low_grid, "K")
+
+        mv1_reg, mv2_reg = general.regrid_to_lower_res(
+            mv1_domain, mv2, "esmf", "conservative"
+        )
+
+        self._assert_is_copy(mv1_reg, mv1_domain)
+        self._assert_is_copy(mv2_reg, mv2)
+        np.testing.assert_array_equal(mv1, 1)
+        self.assertEqual(regrid.stats["skipped"], 1)
+
+    def test_variables_are_regridded_to_the_lower_resolution(self):
+        mv1s = [self._create_variable(self.high_grid, "K") for _ in range(2)]
+        mv2s = [
+            self._create_variable(self.low_grid, "degC"),
+            self._create_variable(self.high_grid, "degC"),
+        ]
+
+        with mock.patch.object(
+            regrid, "regrid_batch", side_effect=self._regrid_batch
+        ) as regrid_batch:
+            mv1s_reg, mv2s_reg = general.regrid_to_lower_res_batch(
+                mv1s, mv2s, "esmf", "conservative"
+            )
+
+        # Only the first mv1 is regridded, to the grid of the first mv2.
+        regrid_batch.assert_called_once()
+        self.assertEqual(regrid_batch.call_args[0][0], [mv1s[0]])
+        self.assertEqual(len(mv1s_reg[0].getLongitude()), 2)
+        self._assert_is_copy(mv2s_reg[0], mv2s[0])
+        # The units of the regridded variables are kept.
+        self.assertEqual(mv1s_reg[0].units, "K")
+        # The variables on the same grid aren't regridded.
+        self._assert_is_copy(mv1s_reg[1], mv1s[1])
+        self._assert_is_copy(mv2s_reg[1], mv2s[1])
+        self.assertEqual(regrid.stats["skipped"], 1)
+
+    def test_variables_to_the_same_grid_are_regridded_together(self):
+        mv1s = [self._create_variable(self.low_grid, "K") for _ in range(2)]
+        mv2s = [self._create_variable(self.high_grid, "K") for _ in range(2)]
+
+        with mock.patch.object(
+            regrid, "regrid_batch", side_effect=self._regrid_batch
+        ) as regrid_batch:
+            mv1s_reg, mv2s_reg = general.regrid_to_lower_res_batch(
+                mv1s, mv2s, "esmf", "conservative"
+            )
+
+        regrid_batch.assert_called_once()
+        self.assertEqual(regrid_batch.call_args[0][0], mv2s)
+        for mv1_reg, mv1 in zip(mv1s_reg, mv1s):
+            self._assert_is_copy(mv1_reg, mv1)
+        for mv2_reg in mv2s_reg:
+            self.assertEqual(len(mv2_reg.getLongitude()), 2)
+            self.assertEqual(mv2_reg.units, "K")
+
+
+class TestRegridZonalMean(TestCase):
+    def setUp(self):
+        self.src_grid = _create_grid(
+            np.stack([np.arange(-90, 90, 10), np.arange(-80, 91, 10)], axis=1),
+            np.stack([np.arange(0, 360, 10), np.arange(10, 361, 10)], axis=1),
+        )
+        self.dst_grid = _create_grid(
+            np.stack([np.arange(-90, 90, 30), np.arange(-60, 91, 30)], axis=1),
+            np.stack([np.arange(0, 360, 20), np.arange(20, 361, 20)], axis=1),
+        )
+        lev = cdms2.createAxis(np.array([850.0, 500.0]), id="plev")
+        lev.designateLevel()
+
+        rng = np.random.default_rng(0)
+        self.var = cdms2.createVariable(
+            rng.random((2, 18, 36)),
+            axes=[lev, self.src_grid.getLatitude(), self.src_grid.getLongitude()],
+            grid=self.src_grid,
+            id="T",
+        )
+
+    def tearDown(self):
+        regrid._weights.clear()
+        regrid.log_stats()
+
+    def test_conservative_matches_the_zonal_mean_of_the_regridded_variable(self):
+        var_reg = regrid.regrid(self.var, self.dst_grid, "esmf", "conservative")
+        expected = cdutil.averager(var_reg, axis="x")
+
+        result = regrid.regrid_zonal_mean(
+            cdutil.averager(self.var, axis="x"),
+            self.dst_grid.getLatitude(),
+            "conservative",
+        )
+
+        self.assertEqual(result.shape, (2, 6))
+        np.testing.assert_allclose(result, expected, rtol=1e-6)
+
+    def test_linear_interpolates_in_latitude(self):
+        zonal_mean = cdutil.averager(self.var, axis="x")
+        lat = self.dst_grid.getLatitude()
+
+        result = regrid.regrid_zonal_mean(zonal_mean, lat, "linear")
+
+        src_lat = self.src_grid.getLatitude()[:]
+        for i in range(2):
+            np.testing.assert_allclose(
+                result[i], np.interp(lat[:], src_lat, zonal_mean[i])
+            )
+
+
+class TestRemap(TestCase):
+    def setUp(self):
+        # A map file from 3 native columns to a 1x2 lat/lon grid, the first
+        # cell is the average of the first two columns.
+        self.tmp_dir = tempfile.mkdtemp()
+        self.map_file = "{}/map_ne_to_1x2.nc".format(self.tmp_dir)
+        with cdms2.open(self.map_file, "w") as f:
+            for name, values, dim in [
+                ("S", [0.5, 0.5, 1.0], "n_s"),
+                ("row", [1, 1, 2], "n_s"),
+                ("col", [1, 2, 3], "n_s"),
+                ("xc_a", [0.0, 90.0, 270.0], "n_a"),
+                ("xc_b", [90.0, 270.0], "n_b"),
+                ("yc_b", [0.0, 0.0], "n_b"),
+                ("dst_grid_dims", [2, 1], "dst_grid_rank"),
+            ]:
+                values = np.array(values)
+                axis = cdms2.createAxis(np.arange(len(values)), id=dim)
+                f.write(cdms2.createVariable(values, axes=[axis], id=name))
+
+    def tearDown(self):
+        regrid._map_files.clear()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_columns_are_remapped_to_the_lat_lon_grid(self):
+        time = cdms2.createAxis(np.array([0.0, 31.0]), id="time")
+        time.designateTime()
+        ncol = cdms2.createAxis(np.arange(3), id="ncol")
+        var = cdms2.createVariable(
+            ma.masked_array(
+                [[1.0, 3.0, 5.0], [2.0, 4.0, 6.0]],
+                mask=[[False, False, False], [False, True, False]],
+            ),
+            axes=[time, ncol],
+            id="TS",
+        )
+        var.units = "K"
+
+        result = regrid.remap(var, self.map_file)
+
+        self.assertEqual(result.shape, (2, 1, 2))
+        self.assertEqual(result.units, "K")
+        np.testing.assert_allclose(result[0, 0], [2.0, 5.0])
+        # The masked column is left out of the average.
+        np.testing.assert_allclose(result[1, 0], [2.0, 6.0])
+        np.testing.assert_allclose(result.getLongitude()[:], [90.0, 270.0])
+
+    def test_variables_not_on_the_native_grid_are_not_remapped(self):
+        lev = cdms2.createAxis(np.array([1.0, 2.0]), id="lev")
+        hyam = cdms2.createVariable(np.array([0.1, 0.2]), axes=[lev], id="hyam")
+
+        self.assertIs(regrid.remap(hyam, self.map_file), hyam)
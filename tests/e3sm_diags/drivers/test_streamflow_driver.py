@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import scipy.io
+
+from e3sm_diags.driver.streamflow_driver import (
+    get_monthly_matrix,
+    get_seasonality,
+    load_gsim,
+)
+from e3sm_diags.driver.utils import disk_cache
+
+
+class TestGetSeasonality(TestCase):
+    def test_all_streamflow_in_one_month(self):
+        monthly = np.zeros((12, 3))
+        monthly[6] = 5.0
+
+        seasonality_index, peak_month = get_seasonality(monthly)
+
+        self.assertEqual(seasonality_index, 12)
+        self.assertEqual(peak_month, 6)
+
+    def test_equal_streamflow_peaks_in_the_first_month(self):
+        seasonality_index, peak_month = get_seasonality(np.ones((12, 1)))
+
+        self.assertAlmostEqual(seasonality_index, 1)
+        self.assertEqual(peak_month, 0)
+
+    def test_gauges_match_single_gauges(self):
+        rng = np.random.default_rng(0)
+        series = rng.random((4, 36))
+        series[1, 5] = np.nan
+
+        seasonality_index, peak_month = get_seasonality(get_monthly_matrix(series))
+
+        for i in range(series.shape[0]):
+            expected = get_seasonality(series[i].reshape(-1, 12).T)
+            self.assertAlmostEqual(seasonality_index[i], expected[0])
+            self.assertEqual(peak_month[i], expected[1])
+
+
+class TestLoadGSIM(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        disk_cache.set_cache_dir(self.cache_dir)
+        self.mat_file = os.path.join(self.dir, "GSIM_198601_198712.mat")
+
+        # Columns for the year, the month and 3 gauges.
+        self.gsim = np.random.default_rng(0).random((24, 5))
+        self.gsim[:, 0] = np.repeat([1986, 1987], 12)
+        self.gsim[:, 1] = np.tile(np.arange(1, 13), 2)
+        scipy.io.savemat(self.mat_file, {"GSIM": self.gsim})
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        shutil.rmtree(self.cache_dir)
+        disk_cache.set_cache_dir(None)
+
+    def test_cached_matrix_is_memory_mapped(self):
+        load_gsim(self.mat_file)
+        flow, info = load_gsim(self.mat_file)
+        npy_file = disk_cache.get_path("gsim", self.mat_file, ".npy")
+
+        self.assertIsInstance(flow, np.memmap)
+        assert npy_file is not None
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.cache_dir, "gsim")))[1],
+            os.path.basename(npy_file),
+        )
+        # Nothing is written next to the .mat file.
+        self.assertEqual(os.listdir(self.dir), ["GSIM_198601_198712.mat"])
+        np.testing.assert_array_equal(flow[[2, 0]].T, self.gsim[:, [4, 2]])
+        self.assertEqual(info["origin_ids"], [1, 2, 3])
+        self.assertEqual(info["months"], self.gsim[:, 1].astype(int).tolist())
+
+    def test_matrix_is_loaded_in_memory_without_a_cache_dir(self):
+        disk_cache.set_cache_dir(None)
+
+        flow, info = load_gsim(self.mat_file)
+
+        self.assertNotIsInstance(flow, np.memmap)
+        np.testing.assert_array_equal(flow[[2, 0]].T, self.gsim[:, [4, 2]])
+        self.assertEqual(os.listdir(self.cache_dir), [])
@@ -1,25 +1,25 @@
+import os
 import shutil
 import tempfile
-from typing import TYPE_CHECKING, Dict, Union
-from unittest import TestCase
-from unittest.mock import MagicMock
+from typing import Dict, Union
+from unittest import TestCase, mock
 
+import cdms2
 import numpy as np
 from netCDF4 import Dataset
 
 from e3sm_diags.driver.tc_analysis_driver import (
-    BASIN_DICT,
     _calc_mean_ace,
-    _calc_num_storms_and_max_len,
     _calc_seasonal_cycle,
     _calc_ts_intensity_dist,
+    _derive_metrics_per_basin,
     _get_mon_wind,
     _get_monthmc_yearic,
-    _get_vars_from_te_stitch,
+    _get_tracks_from_te_stitch,
+    _load_obs_metrics,
+    _save_obs_metrics,
 )
-
-if TYPE_CHECKING:
-    from cdms2.dataset import DatasetVariable
+from e3sm_diags.driver.utils import disk_cache
 
 
 class TestRunDiags(TestCase):
@@ -32,75 +32,63 @@ class TestGenerateTCMetricsFromTEStitchFile(TestCase):
     pass
 
 
-class TestCalcNumStormAndMaxLen(TestCase):
-    def test_correct_output(self):
-        lines = ["s", "a", "a", "s"]
-
-        expected_num_storms = 2
-        expected_max_len = 2
-        num_storms, max_len = _calc_num_storms_and_max_len(lines)
-
-        self.assertEqual(num_storms, expected_num_storms)
-        self.assertEqual(max_len, expected_max_len)
-
-
-class TestGetVarsFromTEStitch(TestCase):
+class TestGetTracksFromTEStitch(TestCase):
     def test_correct_output(self):
         lines = [
-            "storm\tfoo\t90\t180\tfoo\t1\t1\t1",
-            "test\tfoo\t90\t180\tfoo\t1\t1\t1",
+            "start\t2\t2000\t1\t1\t0",
+            "\t1\t280\t20\t1000\t20\t2000\t8",
+            "\t1\t285\t25\t1000\t30\t2000\t8",
+            "start\t1\t2001\t1\t1\t0",
+            "\t1\t150\t-20\t1000\t10\t2001\t2",
         ]
-        max_len = 2
-        num_storms = 2
-
-        expected: Dict[str, Union[np.ndarray, int]] = {
-            "longmc": np.array([[90, np.nan]]),
-            "latmc": np.array([[180, np.nan]]),
-            "vsmc": np.array([[1.94, np.nan]]),
-            "yearmc": np.array([[1, np.nan]]),
-            "monthmc": np.array([[1, np.nan]]),
-            "year_start": 90,
-            "year_end": 90,
-            "num_years": 1,
-        }
-        result = _get_vars_from_te_stitch(lines, max_len, num_storms)
 
-        np.array_equal(result["longmc"], expected["longmc"])
-        np.array_equal(result["latmc"], expected["latmc"])
-        np.array_equal(result["vsmc"], expected["vsmc"])
-        np.array_equal(result["yearmc"], expected["yearmc"])
-        np.array_equal(result["monthmc"], expected["monthmc"])
-        self.assertEqual(result["year_start"], expected["year_start"])
-        self.assertEqual(result["year_end"], expected["year_end"])
-        self.assertEqual(result["num_years"], expected["num_years"])
+        result = _get_tracks_from_te_stitch(lines)
+
+        np.testing.assert_array_equal(result["storm_start"], [0, 2, 3])
+        np.testing.assert_array_equal(result["longmc"], [280, 285, 150])
+        np.testing.assert_array_equal(result["latmc"], [20, 25, -20])
+        np.testing.assert_allclose(result["vsmc"], [38.8, 58.2, 19.4])
+        np.testing.assert_array_equal(result["yearmc"], [2000, 2000, 2001])
+        np.testing.assert_array_equal(result["monthmc"], [8, 8, 2])
+        self.assertEqual(result["year_start"], 2000)
+        self.assertEqual(result["year_end"], 2001)
+        self.assertEqual(result["num_years"], 2)
 
 
 class TestDeriveMetricsPerBasin(TestCase):
     def test_correct_output(self):
-        te_stitch_vars: Dict[str, Union[np.ndarray, int]] = {  # noqa
-            "longmc": np.array([[90, np.nan]]),
-            "latmc": np.array([[180, np.nan]]),
-            "vsmc": np.array([[1.94, np.nan]]),
-            "yearmc": np.array([[1, np.nan]]),
-            "monthmc": np.array([[1, np.nan]]),
-            "year_start": 90,
-            "year_end": 90,
-            "num_years": 1,
+        tracks: Dict[str, Union[np.ndarray, int]] = {
+            "longmc": np.array([280, 285, 150, 300]),
+            "latmc": np.array([20, 25, -20, 30]),
+            "vsmc": np.array([38.8, 58.2, 19.4, 40.0]),
+            "yearmc": np.array([2000, 2000, 2001, 2001]),
+            "monthmc": np.array([8, 8, 2, 9]),
+            "storm_start": np.array([0, 2, 3, 4]),
+            "year_start": 2000,
+            "year_end": 2001,
+            "num_years": 2,
         }
-        num_storms = 2  # noqa
-        basin_info = BASIN_DICT["NA"]  # noqa
 
-        # FIXME: Figure out how to add return value when calling a DatasetVariable
-        # For example, ocnfranc[0,0]
-        ocnfranc: "DatasetVariable" = MagicMock()
-        ocnfranc.getLatitude.return_value = np.array([-90, -45, 0, 45, 90])
-        ocnfranc.getLongitude.return_value = np.array([-180, -90, 0, 90, 180])
+        lat = cdms2.createAxis(np.array([-20.0, 20.0, 30.0]), id="lat")
+        lon = cdms2.createAxis(np.array([150.0, 280.0, 300.0]), id="lon")
+        # The first point of the last storm is over land.
+        ocnfrac = cdms2.createVariable(
+            np.array([[1.0, 1.0, 1.0], [1.0, 1.0, 1.0], [1.0, 1.0, 0.0]]),
+            axes=[lat, lon],
+        )
 
-        # TODO: Add an expected value
-        expected = None  # noqa
-        # result = _derive_metrics_per_basin(num_storms, te_stitch_vars, ocnfranc, basin_info)  # noqa
+        result = _derive_metrics_per_basin(tracks, ocnfrac)
 
-        # self.assertEqual(result, expected)
+        self.assertEqual(result["NA"]["mod_num"], 2)
+        self.assertEqual(result["NA"]["mod_num_ocn"], 1)
+        np.testing.assert_array_equal(result["NA"]["mod_mon"], [8])
+        np.testing.assert_allclose(result["NA"]["mod_wnd"], [58.2])
+        self.assertAlmostEqual(
+            result["NA"]["mod_ace_mean"], (38.8**2 + 58.2**2) / 1e4 / 2
+        )
+        self.assertEqual(result["SP"]["mod_num_ocn"], 1)
+        self.assertEqual(result["SP"]["mod_ace_mean"], 0)
+        self.assertEqual(result["WP"]["mod_num"], 0)
 
 
 class TestGenerateTCMetricsFromObsFiles(TestCase):
@@ -122,6 +110,87 @@ class TestGenerateTCMetricsFromObsFiles(TestCase):
         shutil.rmtree(self.test_dir)
 
 
+class TestObsMetricsCache(TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.obs_file = os.path.join(self.test_dir, "IBTrACS.NA.v04r00.nc")
+        with open(self.obs_file, "wb") as f:
+            f.write(b"IBTrACS")
+        disk_cache.set_cache_dir(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.cache_dir)
+        disk_cache.set_cache_dir(None)
+
+    def test_metrics_are_cached_in_the_cache_dir(self):
+        self.assertIsNone(_load_obs_metrics(self.obs_file))
+
+        metrics = (0.5, np.ones(6), np.full(12, 1 / 12))
+        _save_obs_metrics(self.obs_file, metrics)
+        result = _load_obs_metrics(self.obs_file)
+
+        assert result is not None
+        self.assertEqual(result[0], metrics[0])
+        np.testing.assert_array_equal(result[1], metrics[1])
+        np.testing.assert_array_equal(result[2], metrics[2])
+        # Nothing is written next to the obs file.
+        self.assertEqual(os.listdir(self.test_dir), ["IBTrACS.NA.v04r00.nc"])
+
+    def test_metrics_of_a_modified_file_are_not_loaded(self):
+        _save_obs_metrics(self.obs_file, (0.5, np.ones(6), np.full(12, 1 / 12)))
+
+        with open(self.obs_file, "wb") as f:
+            f.write(b"IBTrACS v2")
+        self.assertIsNone(_load_obs_metrics(self.obs_file))
+
+    def test_metrics_of_a_file_replaced_with_the_same_size_and_mtime_are_not_loaded(
+        self,
+    ):
+        _save_obs_metrics(self.obs_file, (0.5, np.ones(6), np.full(12, 1 / 12)))
+        st = os.stat(self.obs_file)
+
+        # Like ``cp -p`` or ``rsync``, which keep the modification time.
+        new_file = os.path.join(self.test_dir, "new.nc")
+        with open(new_file, "wb") as f:
+            f.write(b"ibtracs")
+        os.utime(new_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(new_file, self.obs_file)
+
+        self.assertIsNone(_load_obs_metrics(self.obs_file))
+
+    def test_metrics_of_a_copy_of_the_file_are_loaded(self):
+        metrics = (0.5, np.ones(6), np.full(12, 1 / 12))
+        _save_obs_metrics(self.obs_file, metrics)
+
+        copy = os.path.join(self.test_dir, "copy.nc")
+        shutil.copyfile(self.obs_file, copy)
+        result = _load_obs_metrics(copy)
+
+        assert result is not None
+        self.assertEqual(result[0], metrics[0])
+
+    def test_the_checksum_is_only_computed_once_per_file(self):
+        _save_obs_metrics(self.obs_file, (0.5, np.ones(6), np.full(12, 1 / 12)))
+
+        with mock.patch("hashlib.sha256") as sha256:
+            self.assertIsNotNone(_load_obs_metrics(self.obs_file))
+            # A new process only has the checksum saved in the cache dir.
+            disk_cache._checksums.clear()
+            self.assertIsNotNone(_load_obs_metrics(self.obs_file))
+
+        sha256.assert_not_called()
+
+    def test_metrics_are_not_cached_without_a_cache_dir(self):
+        disk_cache.set_cache_dir(None)
+
+        _save_obs_metrics(self.obs_file, (0.5, np.ones(6), np.full(12, 1 / 12)))
+
+        self.assertIsNone(_load_obs_metrics(self.obs_file))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
 class TestGetMonthsMCYearsIC(TestCase):
     def test_extracts_vars(self):
         time = np.ma.array(
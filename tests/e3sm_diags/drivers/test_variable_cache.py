@@ -0,0 +1,54 @@
+from unittest import TestCase, mock
+
+import cdms2
+import numpy as np
+
+from e3sm_diags.driver.utils import variable_cache
+
+
+def _create_variable(num_values):
+    return cdms2.createVariable(np.ones(num_values), id="TS")
+
+
+class TestVariableCache(TestCase):
+    def setUp(self):
+        variable_cache.clear()
+        # Room for two variables of 64 KB.
+        variable_cache.set_max_mb(0.15)
+
+    def tearDown(self):
+        variable_cache.clear()
+        variable_cache.set_max_mb(0)
+        variable_cache.log_stats()
+
+    def test_cached_variables_are_copied_once_per_use(self):
+        var = _create_variable(8192)
+        with mock.patch.object(
+            type(var), "clone", autospec=True, side_effect=type(var).clone
+        ) as clone:
+            added = variable_cache.add("TS", [var])
+            self.assertEqual(clone.call_count, 1)
+            added[0][:] = 2
+
+            result = variable_cache.get("TS")
+            self.assertEqual(clone.call_count, 2)
+            result[0][:] = 3
+
+        np.testing.assert_array_equal(variable_cache.get("TS")[0], 1)
+
+    def test_variables_are_not_copied_without_the_cache(self):
+        variable_cache.set_max_mb(0)
+        var = _create_variable(8192)
+
+        self.assertIs(variable_cache.add("TS", [var])[0], var)
+        self.assertIsNone(variable_cache.get("TS"))
+
+    def test_least_recently_used_variables_are_dropped(self):
+        for key in ["a", "b"]:
+            variable_cache.add(key, [_create_variable(8192)])
+        variable_cache.get("a")
+        variable_cache.add("c", [_create_variable(8192)])
+
+        self.assertIsNotNone(variable_cache.get("a"))
+        self.assertIsNone(variable_cache.get("b"))
+        self.assertIsNotNone(variable_cache.get("c"))
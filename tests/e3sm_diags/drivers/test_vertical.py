@@ -0,0 +1,125 @@
+from unittest import TestCase, mock
+
+import cdms2
+import numpy as np
+import numpy.ma as ma
+
+from e3sm_diags.driver.utils import vertical
+
+
+class TestLogLinearInterpolation(TestCase):
+    def setUp(self):
+        lev = cdms2.createAxis(np.array([1000.0, 500.0, 100.0]), id="lev")
+        lev.designateLevel()
+        lev.units = "mb"
+        lat = cdms2.createAxis(np.array([-45.0, 45.0]), id="lat")
+        lat.designateLatitude()
+
+        data = np.array([[300.0, 290.0], [250.0, 240.0], [200.0, 190.0]])
+        mask = np.array([[False, True], [False, False], [False, False]])
+        self.var = cdms2.createVariable(
+            ma.masked_array(data, mask=mask), axes=[lev, lat], id="T"
+        )
+        self.var.units = "K"
+
+    def test_levels_are_interpolated_in_log_pressure(self):
+        result = vertical.log_linear_interpolation(
+            self.var, self.var.getLevel()[:], [500.0, 200.0, 850.0]
+        )
+
+        self.assertEqual(result.shape, (3, 2))
+        self.assertEqual(result.dtype, np.float32)
+        self.assertEqual(result.units, "K")
+        np.testing.assert_allclose(result.getLevel()[:], [500.0, 200.0, 850.0])
+        np.testing.assert_allclose(result[0], [250.0, 240.0])
+        expected = 200.0 + np.log(200.0 / 100.0) / np.log(500.0 / 100.0) * 50.0
+        np.testing.assert_allclose(result[1], [expected, expected - 10], rtol=1e-6)
+        # The level below 850 mb is masked for the second column.
+        self.assertFalse(result.mask[2, 0])
+        self.assertTrue(result.mask[2, 1])
+
+    def test_levels_outside_of_the_pressure_are_masked(self):
+        result = vertical.log_linear_interpolation(
+            self.var, self.var.getLevel()[:], [1010.0, 50.0]
+        )
+
+        self.assertTrue(result.mask.all())
+
+    def test_levels_can_be_on_any_axis(self):
+        var = self.var.reorder("yz")
+        plev = [500.0, 200.0, 850.0]
+
+        result = vertical.log_linear_interpolation(var, var.getLevel()[:], plev)
+        expected = vertical.log_linear_interpolation(
+            self.var, self.var.getLevel()[:], plev
+        )
+
+        self.assertEqual(result.getOrder(), "yz")
+        np.testing.assert_array_equal(result.mask, expected.mask.T)
+        np.testing.assert_allclose(result.filled(0), expected.filled(0).T)
+
+    def test_pressure_field_matches_pressure_levels(self):
+        pressure = np.repeat(self.var.getLevel()[:, np.newaxis], 2, axis=1)
+        plev = [700.0, 300.0, 100.0]
+
+        result = vertical.log_linear_interpolation(self.var, pressure, plev)
+        expected = vertical.log_linear_interpolation(
+            self.var, self.var.getLevel()[:], plev
+        )
+
+        np.testing.assert_array_equal(result.mask, expected.mask)
+        np.testing.assert_allclose(result.filled(0), expected.filled(0))
+
+
+class TestCachedPressure(TestCase):
+    def setUp(self):
+        vertical.clear()
+
+    def test_pressure_is_only_computed_once_per_key(self):
+        calls = []
+
+        def compute_pressure():
+            calls.append(1)
+            return np.array([100.0, 500.0, 1000.0])
+
+        first = vertical.get_cached_pressure(("test", "ANN"), compute_pressure)
+        second = vertical.get_cached_pressure(("test", "ANN"), compute_pressure)
+        vertical.get_cached_pressure(("test", "JJA"), compute_pressure)
+
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 2)
+
+    def test_least_recently_used_pressures_are_dropped(self):
+        pressure = np.array([[1000.0, 990.0], [500.0, 510.0], [100.0, 90.0]])
+
+        # Room for two pressures of 48 bytes, without weights.
+        with mock.patch.object(vertical, "MAX_CACHED_MB", 100 / 1024**2):
+            vertical.get_cached_pressure("ANN", lambda: pressure)
+            vertical.get_cached_pressure("JJA", lambda: pressure)
+            self.assertEqual(list(vertical._pressures), ["ANN", "JJA"])
+
+            # The weights of JJA are counted, so only JJA is kept.
+            cached = vertical.get_cached_pressure("JJA", lambda: pressure)
+            cached.weights["plev"] = vertical.get_weights(pressure, np.array([700.0]))
+            vertical.get_cached_pressure("JJA", lambda: pressure)
+
+        self.assertEqual(list(vertical._pressures), ["JJA"])
+
+    def test_cached_weights_give_the_same_result(self):
+        lev = cdms2.createAxis(np.array([1000.0, 500.0, 100.0]), id="lev")
+        lev.designateLevel()
+        var = cdms2.createVariable(
+            np.array([[300.0, 290.0], [250.0, 240.0], [200.0, 190.0]]),
+            axes=[lev, cdms2.createAxis(np.array([0.0, 1.0]), id="x")],
+            id="T",
+        )
+        pressure = np.array([[1000.0, 990.0], [500.0, 510.0], [100.0, 90.0]])
+        cached = vertical.get_cached_pressure("key", lambda: pressure)
+
+        expected = vertical.log_linear_interpolation(var, pressure, [700.0, 200.0])
+        for _ in range(2):
+            result = vertical.log_linear_interpolation(
+                var, cached.pressure, [700.0, 200.0], weights_cache=cached.weights
+            )
+            np.testing.assert_array_equal(result, expected)
+        self.assertEqual(len(cached.weights), 1)
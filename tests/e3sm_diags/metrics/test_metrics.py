@@ -0,0 +1,72 @@
+from unittest import TestCase, mock
+
+import cdms2
+import numpy as np
+import numpy.ma as ma
+
+from e3sm_diags import metrics
+from e3sm_diags.metrics import (
+    area_weights,
+    corr,
+    field_metrics,
+    max_cdms,
+    mean,
+    min_cdms,
+    rmse,
+    rmse_corr,
+    std,
+)
+
+
+def _create_variable(data, mask):
+    lat = cdms2.createAxis(np.array([-60.0, -20.0, 20.0, 60.0]), id="lat")
+    lat.designateLatitude()
+    lat.setBounds(np.array([[-90.0, -40.0], [-40.0, 0.0], [0.0, 40.0], [40.0, 90.0]]))
+    lon = cdms2.createAxis(np.array([45.0, 135.0, 225.0, 315.0]), id="lon")
+    lon.designateLongitude()
+    lon.setBounds(
+        np.array([[0.0, 90.0], [90.0, 180.0], [180.0, 270.0], [270.0, 360.0]])
+    )
+
+    return cdms2.createVariable(ma.masked_array(data, mask=mask), axes=[lat, lon])
+
+
+class TestFusedMetrics(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.model = _create_variable(rng.random((4, 4)), rng.random((4, 4)) < 0.2)
+        self.obs = _create_variable(rng.random((4, 4)), rng.random((4, 4)) < 0.2)
+        self.weights = area_weights(self.model)
+
+    def test_field_metrics_match_the_separate_metrics(self):
+        result = field_metrics(self.model, self.weights, with_std=True)
+
+        self.assertEqual(result["min"], min_cdms(self.model))
+        self.assertEqual(result["max"], max_cdms(self.model))
+        self.assertAlmostEqual(result["mean"], float(mean(self.model)), places=12)
+        self.assertAlmostEqual(result["std"], std(self.model), places=12)
+
+    def test_rmse_corr_match_the_separate_metrics(self):
+        result = rmse_corr(self.model, self.obs, self.weights)
+
+        self.assertAlmostEqual(result["rmse"], rmse(self.model, self.obs), places=12)
+        self.assertAlmostEqual(result["corr"], corr(self.model, self.obs), places=12)
+
+    def test_area_weights_are_cached_per_grid(self):
+        self.assertIs(area_weights(self.obs), self.weights)
+
+    def test_least_recently_used_area_weights_are_dropped(self):
+        lat = cdms2.createAxis(np.array([-45.0, 45.0]), id="lat")
+        lat.designateLatitude()
+        lat.setBounds(np.array([[-90.0, 0.0], [0.0, 90.0]]))
+        lon = cdms2.createAxis(np.array([180.0]), id="lon")
+        lon.designateLongitude()
+        lon.setBounds(np.array([[0.0, 360.0]]))
+        other = cdms2.createVariable(ma.zeros((2, 1)), axes=[lat, lon])
+
+        # Room for the weights of one grid only.
+        with mock.patch.object(metrics, "MAX_CACHED_MB", 1 / 1024**2):
+            area_weights(other)
+
+        self.assertEqual(len(metrics._area_weights), 1)
+        self.assertIsNot(area_weights(self.model), self.weights)
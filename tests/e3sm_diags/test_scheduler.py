@@ -0,0 +1,178 @@
+from unittest import TestCase
+
+from e3sm_diags.parameter.core_parameter import CoreParameter
+from e3sm_diags.parameter.enso_diags_parameter import EnsoDiagsParameter
+from e3sm_diags.parameter.zonal_mean_2d_parameter import ZonalMean2dParameter
+from e3sm_diags.scheduler import group_tasks, run_tasks, split_tasks
+
+
+def _create_parameter(parameter_class, sets, **kwargs):
+    parameter = parameter_class()
+    parameter.sets = sets
+    parameter.variables = ["T"]
+    parameter.seasons = ["ANN"]
+    parameter.regions = ["global"]
+    parameter.test_data_path = "test"
+    # Nothing is read before the tasks are run.
+    parameter.variable_cache_mb = 0
+    for attr, value in kwargs.items():
+        setattr(parameter, attr, value)
+
+    return parameter
+
+
+def _get_key(parameter):
+    return (
+        parameter.sets[0],
+        parameter.variables[0],
+        parameter.seasons[0],
+        tuple(parameter.plevs),
+    )
+
+
+class TestSplitTasks(TestCase):
+    def test_split_by_set(self):
+        parameter = _create_parameter(CoreParameter, ["lat_lon", "polar"])
+
+        tasks = split_tasks([parameter])
+
+        self.assertEqual(sorted(t.set_name for t in tasks), ["lat_lon", "polar"])
+        for task in tasks:
+            self.assertEqual(task.parameter.sets, [task.set_name])
+        # The original parameter isn't modified.
+        self.assertEqual(parameter.sets, ["lat_lon", "polar"])
+
+    def test_split_on_granulated_attrs(self):
+        parameter = _create_parameter(
+            CoreParameter,
+            ["lat_lon"],
+            variables=["T", "U"],
+            seasons=["ANN", "JJA"],
+            plevs=[850.0, 200.0],
+        )
+
+        tasks = split_tasks([parameter])
+
+        self.assertEqual(len(tasks), 8)
+        self.assertEqual(len(set(t.key for t in tasks)), 8)
+        for task in tasks:
+            self.assertEqual(len(task.parameter.plevs), 1)
+
+    def test_zonal_mean_2d_keeps_all_plevs_in_one_task(self):
+        parameter = _create_parameter(
+            ZonalMean2dParameter, ["zonal_mean_2d"], seasons=["ANN", "JJA"]
+        )
+
+        tasks = split_tasks([parameter])
+
+        self.assertEqual(len(tasks), 2)
+        for task in tasks:
+            self.assertEqual(task.parameter.plevs, parameter.plevs)
+
+    def test_enso_diags_keeps_all_seasons_in_one_task(self):
+        parameter = _create_parameter(
+            EnsoDiagsParameter, ["enso_diags"], seasons=["ANN", "JJA"]
+        )
+
+        tasks = split_tasks([parameter])
+
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0].parameter.seasons, ["ANN", "JJA"])
+
+    def test_tasks_are_sorted_by_decreasing_cost(self):
+        parameters = [
+            _create_parameter(CoreParameter, ["lat_lon"], variables=["T", "U"]),
+            _create_parameter(
+                ZonalMean2dParameter, ["zonal_mean_2d"], test_timeseries_input=True
+            ),
+            _create_parameter(CoreParameter, ["polar"]),
+        ]
+
+        tasks = split_tasks(parameters)
+
+        costs = [t.cost for t in tasks]
+        self.assertEqual(costs, sorted(costs, reverse=True))
+        self.assertEqual(tasks[0].set_name, "zonal_mean_2d")
+
+
+class TestGroupTasks(TestCase):
+    def test_tasks_are_not_grouped_without_the_variable_cache(self):
+        parameters = [
+            _create_parameter(
+                CoreParameter,
+                ["lat_lon", "polar"],
+                variables=["T", "U"],
+                plevs=[850.0, 200.0],
+            ),
+            _create_parameter(ZonalMean2dParameter, ["zonal_mean_2d"]),
+        ]
+        tasks = split_tasks(parameters)
+
+        groups = group_tasks(tasks)
+
+        self.assertEqual(len(groups), len(tasks))
+        # The tasks are submitted largest first.
+        self.assertEqual([g.tasks[0] for g in groups], tasks)
+
+    def test_tasks_of_a_variable_and_season_are_grouped(self):
+        parameters = [
+            _create_parameter(
+                CoreParameter,
+                ["lat_lon", "polar"],
+                variables=["T", "U"],
+                plevs=[850.0, 200.0],
+                variable_cache_mb=1024,
+            ),
+            _create_parameter(
+                ZonalMean2dParameter, ["zonal_mean_2d"], variable_cache_mb=1024
+            ),
+        ]
+
+        groups = group_tasks(split_tasks(parameters))
+
+        self.assertEqual(len(groups), 2)
+        for group in groups:
+            variables = set(t.parameter.variables[0] for t in group.tasks)
+            self.assertEqual(len(variables), 1)
+        group_t = [g for g in groups if g.key[0] == ("T",)][0]
+        self.assertEqual(
+            sorted(t.set_name for t in group_t.tasks),
+            ["lat_lon", "lat_lon", "polar", "polar", "zonal_mean_2d"],
+        )
+        # The group of T also has the zonal_mean_2d task.
+        self.assertEqual(groups[0], group_t)
+
+    def test_tasks_of_different_test_data_are_not_grouped(self):
+        parameters = [
+            _create_parameter(CoreParameter, ["lat_lon"], variable_cache_mb=1024),
+            _create_parameter(
+                CoreParameter,
+                ["lat_lon"],
+                test_data_path="other",
+                variable_cache_mb=1024,
+            ),
+        ]
+
+        groups = group_tasks(split_tasks(parameters))
+
+        self.assertEqual(len(groups), 2)
+
+
+class TestRunTasks(TestCase):
+    def test_returns_the_results_of_every_task(self):
+        parameters = [
+            _create_parameter(
+                CoreParameter,
+                ["lat_lon", "polar"],
+                variables=["T", "U"],
+                seasons=["ANN", "JJA"],
+                plevs=[850.0, 200.0],
+            ),
+            _create_parameter(ZonalMean2dParameter, ["zonal_mean_2d"]),
+        ]
+        tasks = split_tasks(parameters)
+
+        results = run_tasks(_get_key, tasks, 3)
+
+        self.assertEqual(len(results), 17)
+        self.assertEqual(sorted(results), sorted(_get_key(t.parameter) for t in tasks))